@@ -0,0 +1,334 @@
+"""
+KG 구축 파이프라인 실행 (변경된 단계만 다시 실행)
+
+- 단계마다 입력(스크립트, manifest, PDF, 앞 단계 산출물)과 출력을 선언
+- 파일 내용 해시(sha1)를 output/.build_state.json 에 저장해두고,
+  입력/스크립트가 바뀌었거나 출력이 없어졌/수정된 단계만 다시 실행
+  (크기/수정시각이 같으면 이전 해시를 재사용 -> 변경 없는 재실행은 stat 만 하고 끝남)
+- 앞 단계가 다시 실행됐어도 출력 내용이 같으면 뒤 단계는 건너뜀
+- 서로 의존하지 않는 단계(과목/졸업요건/대체 표 추출 등)는 병렬 실행
+- 단계별 로그는 output/logs/<단계>.log, 마지막에 단계별 소요시간 출력
+
+실행 (KG 디렉터리 기준 경로, 어디서 실행해도 됨):
+    python KG/build.py                      # 전체 (변경된 단계만)
+    python KG/build.py --dry-run            # 실행될 단계만 확인
+    python KG/build.py subject includes     # 해당 단계와 그 앞 단계만
+    python KG/build.py --force substitutes  # 해당 단계 강제 재실행
+    python KG/build.py --skip-upload        # Neo4j 업로드 제외
+    python KG/build.py --mark-current       # 지금 있는 산출물을 최신으로 기록 (실행 없이)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+STATE_FILE = "output/.build_state.json"
+LOG_DIR = "output/logs"
+
+# 단계 정의 (경로는 KG 디렉터리 기준, 스크립트도 입력에 포함)
+# - manifest: 표 추출 단계는 manifest 에 적힌 PDF 도 입력으로 봄
+# - after: 파일로 이어지지 않는 순서 (업로드가 DB를 비우므로 업데이트는 업로드 뒤에)
+# - upload: --skip-upload 대상
+# create_*.py 는 Gemini 호출을 ../llm_scheduler.py 로 보내므로 그 파일도 입력
+SCHEDULER = "../llm_scheduler.py"
+STAGES = [
+    {"name": "extract_subject", "script": "extract_tables.py",
+     "args": ["manifest/subject.json", "output/subject_tables.json"],
+     "manifest": "manifest/subject.json",
+     "inputs": ["manifest/subject.json"], "outputs": ["output/subject_tables.json"]},
+    {"name": "extract_requirement", "script": "extract_tables.py",
+     "args": ["manifest/requirement.json", "output/requirement_tables.json"],
+     "manifest": "manifest/requirement.json",
+     "inputs": ["manifest/requirement.json"], "outputs": ["output/requirement_tables.json"]},
+    {"name": "extract_substitutes", "script": "extract_tables.py",
+     "args": ["manifest/substitutes.json", "output/substitutes_tables.json"],
+     "manifest": "manifest/substitutes.json",
+     "inputs": ["manifest/substitutes.json"], "outputs": ["output/substitutes_tables.json"]},
+    {"name": "extract_includes", "script": "extract_tables_includes.py",
+     "manifest": "manifest/includes.json",
+     "inputs": ["manifest/includes.json"], "outputs": ["output/includes_tables.json"]},
+    {"name": "subject", "script": "create_subject.py",
+     "inputs": [SCHEDULER, "output/subject_tables.json"], "outputs": ["output/subject_nodes.json"]},
+    {"name": "requirement", "script": "create_requirement.py",
+     "inputs": [SCHEDULER, "output/requirement_tables.json"], "outputs": ["output/requirement_nodes.json"]},
+    {"name": "includes", "script": "create_includes.py",
+     "inputs": [SCHEDULER, "output/includes_tables.json", "output/subject_nodes.json",
+                "output/requirement_nodes.json"],
+     "outputs": ["output/includes_relationships.json"]},
+    {"name": "substitutes", "script": "create_substitutes.py",
+     "inputs": [SCHEDULER, "id_resolver.py", "output/substitutes_tables.json", "output/subject_nodes.json"],
+     "outputs": ["output/substitutes_relationships.json", "output/new_subject_nodes.json"]},
+    {"name": "upload", "script": "uplaod_neo4j.py", "upload": True,
+     "inputs": ["output/subject_nodes.json", "output/requirement_nodes.json",
+                "output/includes_relationships.json"],
+     "outputs": []},
+    {"name": "update", "script": "update_neo4j.py", "upload": True, "after": ["upload"],
+     "inputs": ["output/new_subject_nodes.json", "output/substitutes_relationships.json"],
+     "outputs": []},
+]
+
+
+# =========================================================
+# 파일 해시 (크기/수정시각이 같으면 이전 해시 재사용)
+# =========================================================
+class FileHasher:
+    def __init__(self, cache=None):
+        self.cache = {} if cache is None else cache        # 경로 -> [크기, 수정시각(ns), sha1]
+
+    def hash(self, path):
+        full = os.path.join(BASE_DIR, path)
+        try:
+            st = os.stat(full)
+        except FileNotFoundError:
+            return None
+
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        h = hashlib.sha1()
+        with open(full, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def hash_all(self, paths):
+        return {p: self.hash(p) for p in paths}
+
+
+def load_state():
+    try:
+        with open(os.path.join(BASE_DIR, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"files": {}, "stages": {}}
+
+
+def save_state(state):
+    path = os.path.join(BASE_DIR, STATE_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+# =========================================================
+# 단계 입력 / 의존 관계
+# =========================================================
+def stage_inputs(stage):
+    # 스크립트 + 선언된 입력 + manifest 에 적힌 PDF
+    inputs = [stage["script"]] + stage["inputs"]
+    if stage.get("manifest"):
+        try:
+            with open(os.path.join(BASE_DIR, stage["manifest"]), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            inputs += sorted({item["file_path"] for item in manifest if item.get("file_path")})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+    return inputs
+
+
+def dependencies(stages):
+    # 단계 -> 먼저 끝나야 하는 단계 (입력을 만드는 단계 + after)
+    producer = {out: s["name"] for s in stages for out in s["outputs"]}
+    deps = {}
+    for s in stages:
+        names = {producer[p] for p in s["inputs"] if p in producer}
+        names.update(s.get("after", []))
+        deps[s["name"]] = names - {s["name"]}
+    return deps
+
+
+def select_stages(stages, targets, deps):
+    # 지정한 단계와 그 앞 단계 전부 (지정 없으면 전체)
+    if not targets:
+        return stages
+    known = {s["name"] for s in stages}
+    unknown = [t for t in targets if t not in known]
+    if unknown:
+        raise SystemExit(f"알 수 없는 단계: {', '.join(unknown)} (가능: {', '.join(sorted(known))})")
+
+    selected = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(deps[name])
+    return [s for s in stages if s["name"] in selected]
+
+
+def stale_reason(stage, record, input_hashes, hasher, forced, ran_before):
+    # 다시 실행해야 하는 이유 (최신이면 None)
+    if forced:
+        return "강제 실행"
+    if record is None:
+        return "처음 실행"
+    for path, digest in input_hashes.items():
+        if record["inputs"].get(path) != digest:
+            return f"입력 변경: {path}"
+    for path in stage["outputs"]:
+        digest = hasher.hash(path)
+        if digest is None:
+            return f"출력 없음: {path}"
+        if record["outputs"].get(path) != digest:
+            return f"출력 수정됨: {path}"
+    for name in stage.get("after", []):
+        if name in ran_before:
+            return f"{name} 다시 실행됨"
+    return None
+
+
+def run_stage(stage):
+    # 단계 스크립트 실행 (KG 디렉터리에서, 출력은 로그 파일로)
+    cmd = [sys.executable, stage["script"]] + stage.get("args", [])
+    log_path = os.path.join(BASE_DIR, LOG_DIR, f"{stage['name']}.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run(cmd, cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+    return proc.returncode, time.perf_counter() - start, log_path
+
+
+# =========================================================
+# 실행
+# =========================================================
+def build(targets=(), force=(), dry_run=False, skip_upload=False, jobs=4, mark_current=False):
+    total_start = time.perf_counter()
+    state = load_state()
+    hasher = FileHasher(state.setdefault("files", {}))
+    records = state.setdefault("stages", {})
+
+    all_deps = dependencies(STAGES)
+    stages = select_stages(STAGES, targets, all_deps)
+    by_name = {s["name"]: s for s in stages}
+    deps = {name: all_deps[name] & set(by_name) for name in by_name}
+    force = set(force)
+    if "all" in force:
+        force = set(by_name)
+
+    results = {}        # 단계 -> {"status", "seconds", "reason"}
+    ran = set()
+    pending = [s["name"] for s in stages]
+    running = {}        # future -> (단계, 입력 해시)
+
+    def finished(name):
+        return name in results and results[name]["status"] != "실행 중"
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            # 1. 앞 단계가 모두 끝난 단계를 실행하거나 건너뜀
+            for name in list(pending):
+                if not all(finished(d) for d in deps[name]):
+                    continue
+                pending.remove(name)
+                stage = by_name[name]
+
+                failed = [d for d in deps[name] if results[d]["status"] in ("실패", "중단")]
+                if failed:
+                    results[name] = {"status": "중단", "seconds": 0.0, "reason": f"{failed[0]} 실패"}
+                    continue
+                if skip_upload and stage.get("upload"):
+                    results[name] = {"status": "제외", "seconds": 0.0, "reason": "--skip-upload"}
+                    continue
+
+                input_hashes = hasher.hash_all(stage_inputs(stage))
+                if dry_run and any(d in ran for d in deps[name]):
+                    reason = "앞 단계 실행 예정"
+                else:
+                    reason = stale_reason(stage, records.get(name), input_hashes, hasher,
+                                          name in force, ran)
+                if reason is None:
+                    results[name] = {"status": "최신", "seconds": 0.0, "reason": ""}
+                    continue
+
+                if mark_current:
+                    # 이미 만들어둔 산출물(output/)을 다시 만들지 않고 기록만 함
+                    records[name] = {"inputs": input_hashes, "outputs": hasher.hash_all(stage["outputs"]),
+                                     "seconds": 0.0, "finished_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+                    results[name] = {"status": "기록", "seconds": 0.0, "reason": reason}
+                    continue
+
+                ran.add(name)
+                if dry_run:
+                    results[name] = {"status": "실행 예정", "seconds": 0.0, "reason": reason}
+                    continue
+                print(f"[실행] {name}: {reason}")
+                results[name] = {"status": "실행 중", "seconds": 0.0, "reason": reason}
+                running[pool.submit(run_stage, stage)] = (name, input_hashes)
+
+            if not running:
+                continue
+
+            # 2. 실행 중인 단계 하나 이상 끝날 때까지 대기
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, input_hashes = running.pop(future)
+                code, seconds, log_path = future.result()
+                results[name]["seconds"] = seconds
+                stage = by_name[name]
+
+                outputs = hasher.hash_all(stage["outputs"])
+                if code != 0 or any(h is None for h in outputs.values()):
+                    results[name]["status"] = "실패"
+                    results[name]["reason"] = f"종료 코드 {code}, 로그: {os.path.relpath(log_path)}"
+                    records.pop(name, None)
+                    continue
+
+                results[name]["status"] = "완료"
+                records[name] = {
+                    "inputs": input_hashes,
+                    "outputs": outputs,
+                    "seconds": round(seconds, 3),
+                    "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                save_state(state)
+
+    if not dry_run:
+        save_state(state)
+
+    # Neo4j 에 다시 올렸으면 챗봇 프로세스들의 공유 캐시 무효화 (SHARED_CACHE_URL 설정 시)
+    if os.getenv("SHARED_CACHE_URL") and any(
+            by_name[name].get("upload") and r["status"] == "완료" for name, r in results.items()):
+        subprocess.run([sys.executable, "shared_cache.py", "bump"], cwd=ROOT_DIR)
+
+    print_report(stages, results, time.perf_counter() - total_start)
+    return all(r["status"] not in ("실패", "중단") for r in results.values())
+
+
+def print_report(stages, results, total):
+    print()
+    print(f"{'단계':<22} {'상태':<8} {'시간(s)':>9}  사유")
+    print("-" * 70)
+    for s in stages:
+        r = results.get(s["name"], {"status": "-", "seconds": 0.0, "reason": ""})
+        print(f"{s['name']:<22} {r['status']:<8} {r['seconds']:>9.2f}  {r['reason']}")
+    print("-" * 70)
+    print(f"{'전체':<22} {'':<8} {total:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KG 구축 파이프라인 (변경된 단계만 실행)")
+    parser.add_argument("targets", nargs="*", help="실행할 단계 (앞 단계 포함, 없으면 전체)")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                        help="최신이어도 다시 실행할 단계 (all: 전체)")
+    parser.add_argument("--dry-run", action="store_true", help="실행하지 않고 실행될 단계만 출력")
+    parser.add_argument("--skip-upload", action="store_true", help="Neo4j 업로드/업데이트 제외")
+    parser.add_argument("--jobs", type=int, default=4, help="동시에 실행할 단계 수")
+    parser.add_argument("--mark-current", action="store_true",
+                        help="실행하지 않고 현재 산출물을 최신 상태로 기록")
+    args = parser.parse_args()
+
+    ok = build(args.targets, args.force, args.dry_run, args.skip_upload, args.jobs, args.mark_current)
+    sys.exit(0 if ok else 1)
@@ -1,7 +1,11 @@
 import google.generativeai as genai
 import json
 import os
+import sys
 from dotenv import load_dotenv 
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_scheduler import get_scheduler   # Gemini 호출은 batch 클래스 (LLM_BATCH_RPM 로 채팅 몫을 남김)
 from collections import defaultdict
 
 load_dotenv() 
@@ -146,7 +150,7 @@ def create_includes_relationships(chunks, subject_nodes, requirement_nodes):
         prompt = build_prompt(chunk, optimized_subjects, req_id)
 
         try:
-            response = model.generate_content(prompt)
+            response = get_scheduler().run(lambda: model.generate_content(prompt), cls="batch")
             raw = json.loads(response.text)
             raw_rels = raw.get("relationships", [])
         except Exception as e:
@@ -1,8 +1,12 @@
 import google.generativeai as genai
 import json
 import os
+import sys
 from dotenv import load_dotenv 
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_scheduler import get_scheduler   # Gemini 호출은 batch 클래스 (LLM_BATCH_RPM 로 채팅 몫을 남김)
+
 # --- 설정 ---
 load_dotenv() 
 
@@ -103,7 +107,7 @@ def create_requirement_nodes(chunks):
         prompt = build_prompt(chunk)
 
         try:
-            response = model.generate_content(prompt)
+            response = get_scheduler().run(lambda: model.generate_content(prompt), cls="batch")
             data = json.loads(response.text)
             new_nodes = data.get("nodes", [])
         except Exception as e:
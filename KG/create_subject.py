@@ -1,8 +1,12 @@
 import google.generativeai as genai
 import json
 import os
+import sys
 from dotenv import load_dotenv 
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_scheduler import get_scheduler   # Gemini 호출은 batch 클래스 (LLM_BATCH_RPM 로 채팅 몫을 남김)
+
 load_dotenv() 
 
 api_key = os.getenv("GOOGLE_API_KEY")
@@ -92,7 +96,7 @@ def create_subject_nodes(chunks):
         prompt = build_prompt(chunk)
             
         try:
-            response = model.generate_content(prompt)
+            response = get_scheduler().run(lambda: model.generate_content(prompt), cls="batch")
             new_nodes = json.loads(response.text).get('nodes', [])
             
             for node in new_nodes:
@@ -1,9 +1,13 @@
 import google.generativeai as genai
 import json
 import os
-import re
+import sys
 from dotenv import load_dotenv 
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_scheduler import get_scheduler   # Gemini 호출은 batch 클래스 (LLM_BATCH_RPM 로 채팅 몫을 남김)
+from id_resolver import resolve_substitutes
+
 load_dotenv() 
 
 try:
@@ -18,28 +22,6 @@ OUTPUT_REL_FILE = "output/substitutes_relationships.json"
 OUTPUT_NODE_FILE = "output/new_subject_nodes.json" 
 
 
-def is_real_id(text):
-    if not text: return False
-    return bool(re.search(r'[A-Za-z]', text) and re.search(r'[0-9]', text))
-
-# 노드 모양을 기존 데이터와 똑같이 맞춤
-def format_node_schema(node):
-    credits_val = node.get('credits')
-    try:
-        if credits_val:
-            credits_val = int(credits_val)
-    except:
-        pass 
-
-    return {
-        "id": node.get('id'),
-        "type": "Subject",          
-        "name": node.get('name'),
-        "credits": credits_val,
-        "credits_note": None        
-    }
-
-
 def build_substitute_prompt(chunk, subject_list):
     metadata = chunk['metadata']
     metadata_str = json.dumps(metadata, ensure_ascii=False, indent=2)
@@ -96,16 +78,12 @@ def build_substitute_prompt(chunk, subject_list):
 
 def run_substitute_execution(chunks, subject_nodes):
     subject_list_prompt = [{"name": n["name"], "id": n["id"]} for n in subject_nodes]
-    valid_ids = set(n['id'] for n in subject_nodes) 
-    
-    # 이름 확인용 매핑 테이블 
-    id_name_map = {n['id']: n['name'] for n in subject_nodes}
 
     generation_config = {"response_mime_type": "application/json", "temperature": 0.0}
     model = genai.GenerativeModel("gemini-2.5-flash", generation_config=generation_config)
     
-    all_relationships = [] 
-    all_new_nodes = {} 
+    # 표별 LLM 결과만 모아두고, id 정리(임시 id -> 학수번호 승격 등)는 마지막에 한 번에 처리
+    chunk_results = []
     
     print(f"\n[대체 과목 분석] 총 {len(chunks)}개 데이터 처리 시작...")
 
@@ -116,77 +94,20 @@ def run_substitute_execution(chunks, subject_nodes):
         prompt = build_substitute_prompt(chunk, subject_list_prompt)
         
         try:
-            response = model.generate_content(prompt)
+            response = get_scheduler().run(lambda: model.generate_content(prompt), cls="batch")
             result = json.loads(response.text)
             
             raw_rels = result.get('relationships', [])
             raw_nodes = result.get('new_nodes', [])
-
-            # 1. 노드 처리
-            for node in raw_nodes:
-                new_id = node.get('id')
-                new_name = node.get('name')
-                
-                if new_id and (new_id not in valid_ids):
-                    formatted_node = format_node_schema(node)
-                    
-                    # 새 노드가 생기면 이름 매핑에도 추가
-                    id_name_map[new_id] = new_name 
-
-                    # Case 1: id 승격
-                    if is_real_id(new_id) and (new_name in all_new_nodes):
-                        old_dummy_id = new_name
-                        del all_new_nodes[old_dummy_id]
-                        all_new_nodes[new_id] = formatted_node
-                        
-                        if old_dummy_id in id_name_map: del id_name_map[old_dummy_id]
-                        id_name_map[new_id] = new_name
-                        
-                        print(f"    ✨ [ID 승격] {old_dummy_id} -> {new_id}")
-
-                        for rel in all_relationships:
-                            if rel['source_id'] == old_dummy_id: rel['source_id'] = new_id
-                            if rel['target_id'] == old_dummy_id: rel['target_id'] = new_id
-                    
-                    # Case 2: 일반
-                    else:
-                        if new_id not in all_new_nodes:
-                            all_new_nodes[new_id] = formatted_node
-                        else:
-                            existing = all_new_nodes[new_id]
-                            if (not existing.get('credits') or existing['credits']==0) and formatted_node.get('credits'):
-                                existing['credits'] = formatted_node.get('credits')
-
-            # 2. 관계 수집
-            for rel in raw_rels:
-                s_id = rel.get('source_id')
-                t_id = rel.get('target_id')
-
-                # id가 둘 다 있고, 자기 자신을 대체하는 것이 아닌 경우 추가
-                if s_id and t_id and (s_id != t_id):
-                    rel['type'] = "SUBSTITUTES"
-                    all_relationships.append(rel)
+            chunk_results.append((raw_nodes, raw_rels))
             
             print(f"    => 관계 {len(raw_rels)}개, 새 과목 {len(raw_nodes)}개")
             
         except Exception as e:
             print(f"    [오류] {e}")
 
-    # 3. 저장 및 후처리
-    unique_rels_map = {}
-    
-    for r in all_relationships:
-        s_id = r['source_id']
-        t_id = r['target_id']
-        
-        r['source_name'] = id_name_map.get(s_id, s_id) 
-        r['target_name'] = id_name_map.get(t_id, t_id)
-
-        key = (s_id, t_id, r['department'], r.get('year'))
-        unique_rels_map[key] = r
-    
-    final_rels = list(unique_rels_map.values())
-    final_new_nodes = list(all_new_nodes.values())
+    # 3. id 정리 및 저장
+    final_rels, final_new_nodes = resolve_substitutes(chunk_results, subject_nodes)
 
     with open(OUTPUT_REL_FILE, 'w', encoding='utf-8') as f:
         json.dump({"relationships": final_rels}, f, ensure_ascii=False, indent=2)
@@ -8,8 +8,10 @@ PDF에서 과목/졸업요건/대체 관련 표를 추출해 JSON으로 저장
 import json
 import fitz 
 import os
+import sys
 
 # 입출력 데이터는 생성할 노드/관계 종류에 따라 변경
+# (python extract_tables.py <manifest> <output> 으로도 지정 가능, build.py 가 사용)
 INPUT = 'manifest/subject.json' 
 OUTPUT = "output/subject_tables.json" 
 
@@ -76,6 +78,8 @@ def extract_table(file_path):
 
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        INPUT, OUTPUT = sys.argv[1], sys.argv[2]
     chunks = extract_table(INPUT)
 
     if chunks:
@@ -0,0 +1,131 @@
+"""
+대체 과목 ID 정리 (create_substitutes.py 후처리)
+
+LLM 은 학수번호를 모르면 과목명을 id로 쓰고(임시 id), 다른 표에서 같은 과목의 학수번호가 나오면 그때 알게 됨
+-> 처리하면서 "같은 과목" 쌍(임시 id <-> 학수번호, 과목명 <-> 기존 과목 id)만 모아두고,
+   마지막에 union-find 로 묶어서 대표 id를 정한 뒤 관계를 한 번만 다시 씀
+
+대표 id 우선순위: 기존 과목 노드 id > 학수번호(영문+숫자) > 새 노드 id > 그 외, 같으면 사전순
+(학수번호가 서로 다른 두 과목은 이름이 같아도 합치지 않음)
+기존 과목 중 이름이 같은 과목이 여러 개면(캡스톤디자인 -> CSE406 / AI4001) 과목명만으로는 어느 과목인지
+알 수 없으므로 그 이름은 기존 과목 id 와 합치지 않음 (다른 학과 과목으로 바뀌는 것 방지)
+모든 쌍을 정렬한 뒤 합치므로 표 처리 순서와 관계없이 결과가 같음
+"""
+
+import re
+from collections import Counter
+
+
+def is_real_id(text):
+    if not text: return False
+    return bool(re.search(r'[A-Za-z]', text) and re.search(r'[0-9]', text))
+
+# 노드 모양을 기존 데이터와 똑같이 맞춤
+def format_node_schema(node):
+    credits_val = node.get('credits')
+    try:
+        if credits_val:
+            credits_val = int(credits_val)
+    except:
+        pass 
+
+    return {
+        "id": node.get('id'),
+        "type": "Subject",          
+        "name": node.get('name'),
+        "credits": credits_val,
+        "credits_note": None        
+    }
+
+
+class IdResolver:
+    def __init__(self, existing_ids=(), node_ids=()):
+        self.existing_ids = set(existing_ids)
+        self.node_ids = set(node_ids)
+        self.parent = {}
+
+    def rank(self, x):
+        return (x not in self.existing_ids, not is_real_id(x), x not in self.node_ids, x)
+
+    def is_fixed(self, x):
+        # 서로 합치면 안 되는 id (실제 과목)
+        return x in self.existing_ids or is_real_id(x)
+
+    def find(self, x):
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]   # 경로 절반 압축
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return True
+        if self.is_fixed(ra) and self.is_fixed(rb):
+            return False
+        if self.rank(rb) < self.rank(ra):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        return True
+
+
+def resolve_substitutes(chunk_results, subject_nodes):
+    """
+    chunk_results: 표별 LLM 결과 [(new_nodes, relationships), ...]
+    subject_nodes: 기존 과목 노드 (subject_nodes.json)
+    -> (대체 관계 목록, 새 과목 노드 목록)
+    """
+    valid_ids = {n['id'] for n in subject_nodes}
+    raw_nodes = [n for nodes, _ in chunk_results for n in nodes
+                 if n.get('id') and n['id'] not in valid_ids]
+    raw_rels = [r for _, rels in chunk_results for r in rels]
+
+    resolver = IdResolver(valid_ids, {n['id'] for n in raw_nodes})
+
+    # 1. 같은 과목 쌍 모으기 (여러 기존 과목이 같이 쓰는 이름은 제외)
+    name_counts = Counter(n.get('name') for n in subject_nodes)
+    pairs = set()
+    for n in subject_nodes:
+        if n.get('name') and n['name'] != n['id'] and name_counts[n['name']] == 1:
+            pairs.add((n['id'], n['name']))
+    for n in raw_nodes:
+        if n.get('name') and n['name'] != n['id']:
+            pairs.add((n['id'], n['name']))
+
+    # 2. 정렬해서 합치기 (처리 순서와 무관, 대표가 우선인 쌍부터)
+    for a, b in sorted(pairs, key=lambda p: (resolver.rank(p[0]), resolver.rank(p[1]))):
+        resolver.union(a, b)
+
+    # 3. 새 노드: 대표 id 기준으로 합침 (기존 과목으로 합쳐진 것은 제외)
+    id_name_map = {n['id']: n['name'] for n in subject_nodes}
+    new_nodes = {}
+    for n in sorted(raw_nodes, key=lambda n: resolver.rank(n['id'])):
+        canonical = resolver.find(n['id'])
+        if canonical in valid_ids:
+            continue
+        node = format_node_schema(n)
+        existing = new_nodes.get(canonical)
+        if existing is None:
+            node['id'] = canonical
+            new_nodes[canonical] = node
+            id_name_map[canonical] = node['name']
+        elif (not existing.get('credits') or existing['credits'] == 0) and node.get('credits'):
+            existing['credits'] = node['credits']
+
+    # 4. 관계: id를 대표 id로 한 번에 바꾸고 중복 제거
+    unique_rels_map = {}
+    for r in raw_rels:
+        s_id, t_id = r.get('source_id'), r.get('target_id')
+        if not s_id or not t_id:
+            continue
+        s_id, t_id = resolver.find(s_id), resolver.find(t_id)
+        if s_id == t_id:
+            continue
+        rel = dict(r, source_id=s_id, target_id=t_id, type="SUBSTITUTES")
+        rel['source_name'] = id_name_map.get(s_id, s_id)
+        rel['target_name'] = id_name_map.get(t_id, t_id)
+        unique_rels_map[(s_id, t_id, rel.get('department'), rel.get('year'))] = rel
+
+    return list(unique_rels_map.values()), list(new_nodes.values())
@@ -0,0 +1,239 @@
+"""
+자주 묻는 질문 답변 미리 생성 (precomputed answer store)
+
+학생 정보 조합(입학년도 x 학과 x 전공유형)은 많지 않고, 질문도 대부분 자주 나오는 몇십 개가 반복됨
+-> 자주 묻는 질문을 모든 조합에 대해 chat() 파이프라인으로 미리 답변해두고,
+   chat()은 이전 대화가 없는 질문이면 저장된 답변부터 찾음 (정규화된 질문 기준 일치)
+
+- 저장 파일에는 만들 때의 데이터 버전(KG/Vector DB 산출물 해시)을 기록
+  -> Vector DB나 KG가 바뀌면 버전이 달라져서 사용하지 않음 (다시 생성 필요)
+
+실행 (프로젝트 루트에서):
+    # 직접 정리한 질문 목록 (한 줄에 한 질문)
+    python answer_store.py --questions questions.txt --workers 4
+
+    # 요청 trace 로그(CHATBOT_TRACE_LOG)에서 많이 나온 질문 상위 50개
+    python answer_store.py --trace-log traces.jsonl --top 50
+"""
+
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from singleflight import normalize_query
+from llm_scheduler import llm_priority
+from metrics import run_in_context
+from trace_recorder import MASKS
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+ANSWER_STORE_PATH = os.path.join(ROOT_DIR, "precomputed_answers.json")
+
+MAJOR_TYPES = ["단일전공", "다전공", "부전공"]
+
+# 답변에 영향을 주는 데이터 (Neo4j 업로드 파일, Vector DB 설정/색인)
+DATA_FILES = [
+    os.path.join(ROOT_DIR, "KG", "output", "*_nodes.json"),
+    os.path.join(ROOT_DIR, "KG", "output", "*_relationships.json"),
+    os.path.join(ROOT_DIR, "vector_db", "config.json"),
+    os.path.join(ROOT_DIR, "vector_db", "lexical_index.json"),
+]
+
+
+def data_version(patterns=DATA_FILES):
+    # 데이터 파일 내용의 해시 (파일이 바뀌면 미리 만든 답변은 무효)
+    h = hashlib.sha1()
+    for path in sorted(itertools.chain.from_iterable(glob.glob(p) for p in patterns)):
+        h.update(os.path.relpath(path, ROOT_DIR).encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:16]
+
+
+def answer_key(query, admission_year, department, major_type):
+    return json.dumps([normalize_query(query), int(admission_year), department, major_type], ensure_ascii=False)
+
+
+class AnswerStore:
+    def __init__(self, version=None, answers=None, built_at=None):
+        self.version = version or data_version()
+        self.answers = answers or {}
+        self.built_at = built_at
+
+    def get(self, query, admission_year, department, major_type):
+        item = self.answers.get(answer_key(query, admission_year, department, major_type))
+        if item is None:
+            return None
+        return item["answer"], item["sources"]
+
+    def put(self, query, admission_year, department, major_type, answer, sources):
+        self.answers[answer_key(query, admission_year, department, major_type)] = {
+            "answer": answer, "sources": sources,
+        }
+
+    def is_current(self):
+        return self.version == data_version()
+
+    def save(self, path=ANSWER_STORE_PATH):
+        self.built_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "built_at": self.built_at, "answers": self.answers},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=ANSWER_STORE_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["version"], data["answers"], data.get("built_at"))
+
+
+def load_current_store(path=ANSWER_STORE_PATH):
+    # 파일이 없거나 데이터 버전이 다르면 None
+    if not os.path.exists(path):
+        return None
+    store = AnswerStore.load(path)
+    if not store.is_current():
+        print(f"⚠️ 미리 생성한 답변({path})이 현재 데이터와 버전이 달라 사용하지 않습니다. 다시 생성해주세요.")
+        return None
+    return store
+
+
+# ============================================================
+# 질문 목록
+# ============================================================
+def read_questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def top_questions_from_traces(path, top=50):
+    # trace 로그에서 이전 대화 없이 들어온 질문을 정규화해서 빈도순으로
+    # (trace 의 query 는 익명화된 값, 개인정보가 마스킹된 질문은 제외)
+    counts = Counter()
+    originals = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            attrs = json.loads(line).get("attrs", {})
+            if not attrs.get("query") or attrs.get("history_turns"):
+                continue
+            if any(mask in attrs["query"] for _, mask in MASKS):
+                continue
+            key = normalize_query(attrs["query"])
+            counts[key] += 1
+            originals.setdefault(key, attrs["query"])
+    return [originals[key] for key, _ in counts.most_common(top)]
+
+
+# ============================================================
+# 답변 생성
+# ============================================================
+def skip_reason(sources, trace):
+    """
+    저장하면 안 되는 답변이면 이유, 아니면 None
+    (저장된 답변은 다시 만들 때까지 모든 학생에게 그대로 나가므로 정상 경로로 만든 답변만 저장)
+    """
+    attrs = (trace or {}).get("attrs", {})
+    if trace is None:
+        return "trace 없음"
+    if attrs.get("degraded"):
+        return "장애 대체(" + ", ".join(attrs["degraded"]) + ")"
+    if attrs.get("timed_out"):
+        return "시간 초과"
+    if attrs.get("router_fallback"):
+        return f"질문 분류 실패({attrs['router_fallback']})"
+    if not sources or sources == "[]":
+        return "출처 없음"
+    return None
+
+
+def build_answer_store(bot, questions, years=None, major_types=MAJOR_TYPES, workers=4):
+    """
+    모든 (입학년도, 학과, 전공유형, 질문) 조합에 대해 chat()을 실행해서 AnswerStore 생성
+    workers: 동시에 실행할 chat() 수 (LLM API 요청 제한에 맞게 조정)
+    years: 입학년도 목록 (없으면 학과 목록의 교육과정 연도 전체)
+    """
+    store = AnswerStore()
+    bot.answer_store = None     # 기존 저장 답변을 쓰지 않고 새로 생성
+
+    jobs = list(itertools.product(years or bot.registry.years, bot.get_departments(), major_types, questions))
+    failed, skipped = 0, Counter()
+
+    def run_job(year, dept, question, major_type):
+        # 답변과 함께 그 요청의 trace (last_trace 는 스레드별이므로 같은 worker 에서)
+        answer, sources = bot.chat(year, dept, question, None, major_type)
+        return answer, sources, bot.metrics.last_trace()
+
+    # Gemini 호출은 batch 클래스 (같은 프로세스의 채팅 요청이 먼저)
+    with llm_priority("batch"), ThreadPoolExecutor(max_workers=workers) as pool:
+        chat = run_in_context(run_job)
+        futures = {
+            pool.submit(chat, year, dept, question, major_type): (year, dept, major_type, question)
+            for year, dept, major_type, question in jobs
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            year, dept, major_type, question = futures[future]
+            if i % 50 == 0 or i == len(jobs):
+                print(f"   {i}/{len(jobs)} 완료")
+            try:
+                answer, sources, trace = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {year} {dept} {major_type} '{question}': {e}")
+                continue
+            reason = skip_reason(sources, trace)
+            if reason:
+                skipped[reason] += 1
+                continue
+            store.put(question, year, dept, major_type, answer, sources)
+
+    print(f"✅ {len(store.answers)}개 답변 생성 (실패 {failed}개, 저장 안 함 {sum(skipped.values())}개, "
+          f"데이터 버전 {store.version})")
+    for reason, count in skipped.most_common():
+        print(f"   저장 안 함 - {reason}: {count}개")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자주 묻는 질문 답변 미리 생성")
+    parser.add_argument("--questions", help="질문 목록 파일 (한 줄에 한 질문)")
+    parser.add_argument("--trace-log", help="요청 trace 로그(JSONL)에서 많이 나온 질문 사용")
+    parser.add_argument("--top", type=int, default=50, help="--trace-log 에서 사용할 질문 수")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 실행할 chat() 수")
+    parser.add_argument("--output", default=ANSWER_STORE_PATH)
+    parser.add_argument("--offline", action="store_true", help="가짜 LLM/DB로 실행 (동작 확인용)")
+    args = parser.parse_args()
+
+    questions = []
+    if args.questions:
+        questions += read_questions(args.questions)
+    if args.trace_log:
+        questions += top_questions_from_traces(args.trace_log, args.top)
+    questions = list({normalize_query(q): q for q in questions}.values())
+    if not questions:
+        parser.error("--questions 또는 --trace-log 가 필요합니다.")
+
+    if args.offline:
+        from benchmarks.fakes import build_offline_chatbot
+        bot = build_offline_chatbot()
+    else:
+        from backend import StreamlitRAGChatbot
+        bot = StreamlitRAGChatbot()
+
+    try:
+        store = build_answer_store(bot, questions, workers=args.workers)
+    finally:
+        bot.close()
+    store.save(args.output)
+    print(f"💾 {args.output} 저장됨")
+
+
+if __name__ == "__main__":
+    main()
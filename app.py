@@ -80,6 +80,17 @@ def initialize_chatbot():
 
 rag_chatbot = initialize_chatbot()
 
+# 외부 서비스 장애로 로컬 데이터를 사용 중일 때 제한 모드 안내
+SERVICE_NAMES = {"neo4j": "졸업요건 DB", "pinecone": "문서 검색", "gemini": "답변 생성 AI"}
+
+def limited_mode_notice(services):
+    names = ", ".join(SERVICE_NAMES.get(s, s) for s in services)
+    return (f"⚠️ 제한 모드: {names} 서비스가 원활하지 않아 로컬에 저장된 데이터로 응답합니다. "
+            "답변이 평소보다 간단하거나 최근 공지가 빠져 있을 수 있습니다.")
+
+if rag_chatbot.degraded_services():
+    st.warning(limited_mode_notice(rag_chatbot.degraded_services()))
+
 # 세션 상태 초기화
 if "messages" not in st.session_state:
     st.session_state["messages"] = [
@@ -87,7 +98,7 @@ if "messages" not in st.session_state:
     ]
 
 # --- 2. 사용자 설정(Sidebar) ---
-MIN_YEAR = 2020  
+MIN_YEAR = rag_chatbot.FIRST_YEAR
 MAX_YEAR = rag_chatbot.LATEST_YEAR 
 year_options = list(range(MIN_YEAR, MAX_YEAR + 1))[::-1] 
 
@@ -161,9 +172,13 @@ with tab1:
                         history=history,
                         major_type=major_type 
                     )
+                    st.session_state["last_trace"] = rag_chatbot.metrics.last_trace()
                 
                     # 답변 출력
                     st.markdown(response)
+                    degraded = (st.session_state["last_trace"] or {}).get("attrs", {}).get("degraded")
+                    if degraded:
+                        st.caption(limited_mode_notice(degraded))
                     if source:
                         with st.expander("📚 출처 확인"):
                             for src in source:
@@ -173,6 +188,8 @@ with tab1:
                                 # PDF 파일인 경우
                                 else:
                                     display_text = f"📄 **{src['name']}**"
+                                    if src.get('page'):
+                                        display_text += f" (p.{src['page']})"
                                     st.markdown(display_text)
 
         # 기록 저장
@@ -183,13 +200,32 @@ with tab1:
 with tab2:
     st.markdown("##### 📝 수강한 과목을 입력하세요")
     st.caption("(쉼표, 줄바꿈으로 구분)")
+
+    # 과목명 자동완성: 검색 결과를 누르면 입력란에 추가
+    def add_course(name):
+        current = st.session_state.get("taken_input", "").rstrip(", \n")
+        st.session_state["taken_input"] = f"{current}, {name}" if current else name
+        st.session_state["course_search"] = ""
+
+    course_search = st.text_input("과목 검색", placeholder="과목명 또는 학수번호 일부 (예: 자료, CSE1)",
+                                  key="course_search")
+    if course_search:
+        suggestions = rag_chatbot.suggest_courses(course_search)
+        if suggestions:
+            cols = st.columns(4)
+            for i, subject in enumerate(suggestions):
+                cols[i % 4].button(subject["name"], key=f"suggest_{subject['id']}",
+                                   on_click=add_course, args=(subject["name"],), use_container_width=True)
+        else:
+            st.caption("일치하는 과목이 없습니다.")
     
     # 수강한 과목 입력받기
     taken_input = st.text_area(
         "과목 입력",
         placeholder="예시: 자료구조, 운영체제, 컴퓨터구조, 캡스톤디자인",
         height=150,
-        label_visibility="collapsed"
+        label_visibility="collapsed",
+        key="taken_input"
     )
     
     if st.button("진단 시작", type="primary", use_container_width=True):
@@ -204,6 +240,24 @@ with tab2:
                 req_info, missing_result, credit_status = rag_chatbot.check_graduation_status(
                     admission_year, department, major_type, taken_list
                 )
+                st.session_state["last_trace"] = rag_chatbot.metrics.last_trace()
+                degraded = (st.session_state["last_trace"] or {}).get("attrs", {}).get("degraded")
+                if degraded:
+                    st.warning(limited_mode_notice(degraded))
+
+                # 입력값이 다른 이름으로 인식된 경우 / 인식하지 못한 경우 안내
+                resolved = rag_chatbot.resolve_courses(taken_list)
+                renamed = [f"{text} → {name}" for text, subs in resolved.items()
+                           for name in dict.fromkeys(sub["name"] for sub in subs) if name != text]
+                unknown = [text for text, subs in resolved.items() if not subs]
+                if renamed:
+                    st.info("입력한 과목을 다음과 같이 인식했습니다: " + ", ".join(renamed))
+                if unknown:
+                    st.warning("찾을 수 없는 과목 (이수 학점에 포함하지 않음): " + ", ".join(unknown))
+                    # 오타로 보이는 입력은 후보만 안내 (확인 후 정확한 과목명으로 다시 입력)
+                    for text, candidates in rag_chatbot.course_suggestions(unknown).items():
+                        if candidates:
+                            st.caption(f"'{text}' 혹시 이 과목인가요? " + ", ".join(c["name"] for c in candidates))
                 
                 st.divider()
 
@@ -252,3 +306,79 @@ with tab2:
                             for sub in subjects:
 
                                 st.markdown(f"- **{sub['name']}** ({sub['credits']}학점)")
+
+                st.divider()
+
+                # 다른 연도 교육과정을 적용했을 때와 비교 (남은 학점이 적은 순)
+                st.subheader("(3) 교육과정별 비교")
+                st.caption("다른 연도 교육과정을 적용하면 남은 학점이 어떻게 달라지는지 비교합니다.")
+                options = rag_chatbot.compare_curricula(department, taken_list)
+                st.dataframe(
+                    [
+                        {
+                            "교육과정": f"{opt['year']}년 {opt['major_type']}"
+                                        + (" (현재)" if (opt['year'], opt['major_type']) == (admission_year, major_type) else ""),
+                            "남은 학점": opt["total_remaining"],
+                            **{cat: v["remaining"] for cat, v in opt["status"].items()},
+                            "미이수 필수 과목": ", ".join(opt["missing"]) or "-",
+                        }
+                        for opt in options
+                        if opt["major_type"] == major_type
+                    ],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+                st.divider()
+
+                # 남은 영역별 학점을 모두 채우는 최소 학점 과목 조합
+                st.subheader("(4) 추천 수강 과목")
+                plan = rag_chatbot.plan_graduation(admission_year, department, major_type, taken_list)
+                if not plan or not plan["courses"]:
+                    st.success("추가로 들어야 할 전공 과목이 없습니다.")
+                else:
+                    st.caption(f"아래 과목(총 {plan['total_credits']}학점)을 들으면 전공 영역별 졸업 학점을 모두 채울 수 있습니다.")
+                    st.dataframe(
+                        [
+                            {
+                                "과목": course["name"],
+                                "학점": course["credits"],
+                                "영역": course["classification"] + (" (필수)" if course["required"] else ""),
+                                "대체 가능 과목": ", ".join(course["alternatives"]) or "-",
+                            }
+                            for course in plan["courses"]
+                        ],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+                    if plan["unmet"]:
+                        st.warning("과목으로 채울 수 없는 학점: "
+                                   + ", ".join(f"{cat} {n}학점" for cat, n in plan["unmet"].items())
+                                   + " (현장실습 등 활동별로 인정 학점이 다른 과목은 학과에 문의하세요)")
+
+
+# --- 4. 디버그 패널: 마지막 요청의 단계별 소요시간 ---
+with st.sidebar:
+    st.divider()
+    if st.toggle("🔍 디버그 정보 보기", key="show_debug"):
+        trace = st.session_state.get("last_trace")
+
+        if not trace:
+            st.caption("아직 처리한 요청이 없습니다.")
+        else:
+            st.caption(f"{trace['kind']} · 총 {trace['total_ms']:.0f}ms · {trace['started_at']}")
+            st.dataframe(
+                [
+                    {
+                        "단계": span["name"],
+                        "시작(ms)": span["start_ms"],
+                        "소요(ms)": span["duration_ms"],
+                        "속성": ", ".join(f"{k}={v}" for k, v in span.get("attrs", {}).items()),
+                    }
+                    for span in trace["spans"]
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+            with st.expander("요청 정보 (토큰 수, 문서 수 등)"):
+                st.json(trace["attrs"])
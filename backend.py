@@ -1,52 +1,152 @@
 import os
 import json
+import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
-from neo4j import GraphDatabase
 from dotenv import load_dotenv
 from langchain_pinecone import PineconeVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.schema import Document
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from context_compactor import compact_documents, year_label
+from vector_db.lexical_index import LexicalIndex, LEXICAL_INDEX_PATH, reciprocal_rank_fusion, doc_key
+from vector_db.onnx_embeddings import load_embeddings
+from vector_db.department_registry import load_registry, namespace_for, NAMESPACE_MODE
+from metrics import Metrics, current_trace, run_in_context
+from trace_recorder import load_recorder, anonymize
+from kg_access import KGAccess
+from singleflight import SingleFlight, DEFAULT_LOCK_DIR, chat_key, normalize_query
+from shared_cache import load_shared_cache
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from kg_snapshot import KG_OUTPUT_DIR
+from llm_hedging import HedgedCaller, DeadlineExceeded, deadline_after, remaining, REQUEST_BUDGET, ROUTER_TIMEOUT
+from llm_scheduler import get_scheduler, Overloaded
+from answer_store import load_current_store, ANSWER_STORE_PATH
+from course_resolver import CourseResolver
+from substitution_index import SubstitutionIndex
+from curriculum_advisor import CurriculumAdvisor
+from graduation_planner import plan_courses
+
+logger = logging.getLogger(__name__)
+from retrieval_selector import (TokenCounter, select_matches, relative_cutoff, fit_budget,
+                                LEXICAL_CUTOFF, CONTEXT_TOKEN_BUDGET)
 
 
 load_dotenv()
 
+LIMITED_MODE_NOTICE = "⚠️ 현재 답변 생성 서비스가 원활하지 않아, 질문과 관련된 규정 원문 일부를 그대로 보여드립니다."
+
+# "2022년도", "22학번", "24 교육과정" 같은 연도 표현
+YEAR_PATTERN = re.compile(r"(?<![\dA-Za-z])(20\d\d)(?!\d)|(?<![\dA-Za-z])(\d\d)(?=\s*(?:년|학번|교육과정))")
+
+
+def parse_years(values, text, latest_year):
+    # 라우터가 준 연도 목록 검증, 없으면 질문에서 직접 추출 (2000 ~ 최신 연도만)
+    years = []
+    for v in values or []:
+        try:
+            years.append(int(v))
+        except (TypeError, ValueError):
+            continue
+    if not years:
+        for full, short in YEAR_PATTERN.findall(text or ""):
+            years.append(int(full) if full else 2000 + int(short))
+    return list(dict.fromkeys(y for y in years if 2000 <= y <= latest_year))
+
+
 class StreamlitRAGChatbot:
 # RAG(Vector DB + Knowledge graph)기반 챗봇
 
-    def __init__(self):
+    def __init__(self, llm=None, router=None, neo4j_driver=None, vectorstore=None, lexical_index=None,
+                 shared_cache=None, llm_scheduler=None, registry=None):
+        # 인자로 넘긴 구성요소는 그대로 사용 (오프라인 벤치마크 등에서 가짜 객체 주입용)
         self.INDEX_NAME = "chatbot-project"
         self.EMBEDDING_MODEL_NAME = "dragonkue/BGE-m3-ko"
-        self.LATEST_YEAR = 2025
+        self.CONTEXT_TOKEN_BUDGET = CONTEXT_TOKEN_BUDGET   # 프롬프트에 넣을 검색 결과 최대 토큰 수
+        self.REQUEST_BUDGET = REQUEST_BUDGET               # 요청 하나의 LLM 호출 전체 시간(초)
+        self.ROUTER_TIMEOUT = ROUTER_TIMEOUT               # 질문 분류 최대 시간(초), 넘으면 Vector
         self.MODEL_NAME = "gemini-2.5-flash"
-        
-        self.DEPARTMENT_TO_COLLEGE_MAP = {
-            '컴퓨터공학과': '소프트웨어융합대학 공통',
-            '인공지능학과': '소프트웨어융합대학 공통',
-            '소프트웨어융합학과': '소프트웨어융합대학 공통',
+
+        # 학과 -> 단과대학, 교육과정 연도 목록 (vector_db/department_registry.py, 데이터에서 읽음)
+        self.registry = registry or load_registry()
+        self.LATEST_YEAR = self.registry.latest_year
+        self.FIRST_YEAR = self.registry.first_year
+        # Vector DB 연도별 namespace 사용 여부 (none: 기본 namespace 하나 + 연도 / 학과 복합 필터)
+        self.VECTOR_NAMESPACES = NAMESPACE_MODE
+
+        # 단계별 소요시간 / 토큰 수 등 지표 수집 (METRICS_PORT 설정 시 /metrics 제공)
+        self.metrics = Metrics()
+        if os.getenv("METRICS_PORT"):
+            self.metrics.start_http_exporter(os.getenv("METRICS_PORT"))
+        # 성능 테스트 재생용 요청 기록 (CHATBOT_CAPTURE_DIR 설정 시, benchmarks/replay.py)
+        self.recorder = load_recorder(self.metrics)
+
+        # 외부 서비스별 circuit breaker (장애가 이어지면 바로 실패 -> 로컬 대체 데이터 / 제한 모드로 응답)
+        self.breakers = {
+            "neo4j": CircuitBreaker("neo4j", slow_seconds=3.0, max_concurrent=32, metrics=self.metrics),
+            "pinecone": CircuitBreaker("pinecone", slow_seconds=2.0, max_concurrent=16, metrics=self.metrics),
+            "gemini": CircuitBreaker("gemini", max_concurrent=32, metrics=self.metrics, ignore=(Overloaded,)),
         }
 
         # Google Gemini 설정
         self.api_key = os.getenv("GOOGLE_API_KEY")
         genai.configure(api_key=self.api_key) # Router용
+        self.router = router    # (system_prompt, user_query) -> JSON 문자열, None이면 Gemini 사용
         
-        self.llm = ChatGoogleGenerativeAI(    # 답변 생성용
+        # 답변 생성용, 마감 시간이 지난 요청이 pool 스레드를 계속 차지하지 않도록 HTTP 제한시간 = 요청 예산
+        # (실패 시 재시도는 hedger 가 하므로 클라이언트 재시도는 끔)
+        self.llm = llm or ChatGoogleGenerativeAI(
             model=self.MODEL_NAME, 
             google_api_key=self.api_key,
-            temperature=0
+            temperature=0,
+            timeout=self.REQUEST_BUDGET,
+            max_retries=0,
         )
+        # LLM 호출 마감 시간 + 느린 요청 hedge (llm_hedging.py), 대기열 초과로 거절된 시도는 다시 보내지 않음
+        self.hedger = HedgedCaller(metrics=self.metrics, give_up=(Overloaded,))
+        # 프로세스 전체 Gemini 호출 우선순위 / 요청량 제어 (llm_scheduler.py), 채팅은 interactive
+        self.llm_scheduler = llm_scheduler or get_scheduler(self.metrics)
 
         # Neo4j(KG) 설정
         self.NEO4J_URI = os.getenv("NEO4J_URI")
         self.NEO4J_AUTH = ("neo4j", os.getenv("NEO4J_PASSWORD"))
-        self.neo4j_driver = GraphDatabase.driver(self.NEO4J_URI, auth=self.NEO4J_AUTH)
+        self.kg = KGAccess(self.NEO4J_URI, self.NEO4J_AUTH, driver=neo4j_driver, metrics=self.metrics,
+                           breaker=self.breakers["neo4j"], snapshot_dir=KG_OUTPUT_DIR)
+        self.neo4j_driver = self.kg.driver
+
+        #  Pinecone(Vector) 설정 (EMBEDDING_BACKEND=onnx 이면 int8 ONNX 모델로 질문 임베딩)
+        if vectorstore is None:
+            embeddings = load_embeddings(self.EMBEDDING_MODEL_NAME)
+            vectorstore = PineconeVectorStore.from_existing_index(self.INDEX_NAME, embeddings)
+        self.vectorstore = vectorstore
+
+        # 로컬 키워드 색인(BM25) - DB 구축 시 생성된 파일이 있을 때만 사용
+        if lexical_index is None and os.path.exists(LEXICAL_INDEX_PATH):
+            lexical_index = LexicalIndex.load(LEXICAL_INDEX_PATH)
+        self.lexical_index = lexical_index
 
-        #  Pinecone(Vector) 설정
-        embeddings = HuggingFaceEmbeddings(model_name=self.EMBEDDING_MODEL_NAME)
-        self.vectorstore = PineconeVectorStore.from_existing_index(self.INDEX_NAME, embeddings)
+        # 같은 질문이 동시에 들어오면 한 번만 처리 (SINGLEFLIGHT_DIR="" 이면 프로세스 간 공유 안 함)
+        self.single_flight = SingleFlight(lock_dir=os.getenv("SINGLEFLIGHT_DIR", DEFAULT_LOCK_DIR) or None)
+
+        # 여러 Streamlit 프로세스가 함께 쓰는 검색/KG/답변 캐시 (SHARED_CACHE_URL 이 없으면 사용 안 함)
+        self.shared_cache = shared_cache if shared_cache is not None else load_shared_cache()
+
+        # 자주 묻는 질문의 미리 생성된 답변 (answer_store.py 로 생성, 데이터 버전이 같을 때만 사용)
+        self.answer_store = load_current_store(os.getenv("ANSWER_STORE_PATH", ANSWER_STORE_PATH))
+
+        # 과목명 정규화/자동완성 색인 (처음 사용할 때 Neo4j Subject 노드로 생성)
+        self._course_resolver = None
+        self._substitution_index = None     # 학과/입학년도별 대체 과목 묶음 (처음 사용할 때 생성)
+        self._advisors = {}                 # 학과 -> 교육과정 비교용 행렬 (처음 사용할 때 생성)
+
+        # 프롬프트 토큰 예산 계산용 (로컬 tokenizer.json, 없으면 글자 수 근사)
+        self.token_counter = TokenCounter.load()
+
+        # Pinecone 검색(연도별 namespace) 병렬 실행용
+        self.executor = ThreadPoolExecutor(max_workers=8)
 
         #  응답 프롬프트 설정
         self.prompt = ChatPromptTemplate.from_template("""
@@ -83,16 +183,34 @@ class StreamlitRAGChatbot:
         self.document_chain = create_stuff_documents_chain(self.llm, self.prompt)
 
     def close(self):
-        if self.neo4j_driver:
-            self.neo4j_driver.close()
+        self.kg.close()
+        self.executor.shutdown(wait=False)
+
+    def cached(self, kind, parts, fn):
+        # 공유 캐시에 있으면 사용, 없으면 fn() 결과를 저장 (캐시를 안 쓰면 fn() 그대로)
+        if self.shared_cache is None:
+            return fn()
+        value = self.shared_cache.get(kind, parts)
+        self.metrics.cache_hit(kind, value is not None)
+        if value is None:
+            value = fn()
+            # 장애로 대체 데이터를 쓴 결과는 저장하지 않음
+            trace = current_trace()
+            if value is not None and not (trace and trace.attrs.get("degraded")):
+                self.shared_cache.set(kind, parts, value)
+        return value
+
+    def degraded_services(self):
+        # circuit breaker 가 열린 서비스 (app.py 의 제한 모드 안내용)
+        return [name for name, breaker in self.breakers.items() if breaker.is_open]
 
     def get_departments(self):
-        return list(self.DEPARTMENT_TO_COLLEGE_MAP.keys())
+        return self.registry.departments()
 
     # ============================================================
     # 1. 질문 유형 파악
     # ============================================================
-    def analyze_intent(self, user_query, history_text):
+    def analyze_intent(self, user_query, history_text, deadline=None):
         """
         질문을 분석하여 분류
         1. 여러 연도의 정보를 비교해야하는 질문 -> kg
@@ -129,163 +247,313 @@ class StreamlitRAGChatbot:
         -> final_query: "성적장학금 받으려면 신청해야돼" (문맥이 이어지지 않으므로 그대로 둠)
 
         
-        --- 2. 검색 tool 결정 ---
-        - VectorDB의 한계 
-            현재 시스템의 Vector DB는 아래 두 가지 정보만 검색할 수 있습니다.
-            1. 사용자의 입학년도에 해당하는 정보
-            2. 가장 최신 연도(2025년)의 정보  
-            따라서 위 두 연도를 제외한 다른 연도의 정보나, 여러 연도 간의 비교는 Vector DB로 처리할 수 없습니다.
-        
-        - 분류 기준 
-            1) Knowledge graph
-             - 서로 다른 연도의 졸업요건이나 교육과정을 비교하는 질문
-             - Vector DB로 검색할 수 없는 연도에 대한 질문
+        --- 2. 연도 / 검색 tool 결정 ---
+        - years: [질문]이 가리키는 교육과정 연도 목록 (예: "22학번", "2022년도" -> [2022]), 없으면 []
+        - tool
+            1) "KG": 서로 다른 연도의 졸업요건이나 교육과정을 비교하거나, 다른 교육과정으로 변경을 고민하는 질문
              예) "2020년도 졸업요건과 2023년도 졸업요건의 차이점이 무엇인가요?"
-             예) "24 교육과정으로 변경 시 어떤 점이 유리한가요?
+             예) "24 교육과정으로 변경 시 어떤 점이 유리한가요?"
+            2) "Vector": 그 외 모든 질문 (특정 연도 하나에 대한 질문 포함)
 
-            2) Vector DB
-            - 위 1번 조건에 해당하지 않는 모든 질문
-        
-                
         --- 출력 형식 (JSON) ---
         {{
             "final_query": "문맥이 반영된 완성된 질문",
-            "tool": "KG" 또는 "Vector"
+            "tool": "KG" 또는 "Vector",
+            "years": [연도, ...]
         }}
         """
         
+        # 질문 분류는 ROUTER_TIMEOUT 과 요청 마감 시간 중 먼저 오는 때까지만
+        router_deadline = deadline_after(self.ROUTER_TIMEOUT)
+        if deadline is not None:
+            router_deadline = min(router_deadline, deadline)
+
+        with self.metrics.span("route") as span:
+            try:
+                # hedge 로 한 번 더 보내는 요청도 scheduler 자리 / 분당 요청 수를 따로 차지
+                response = self.breakers["gemini"].call(lambda: self.hedger.call(
+                    "router", lambda: self.llm_scheduler.run(
+                        lambda: self.generate_router_response(prompt, user_query, remaining(router_deadline)),
+                        router_deadline),
+                    router_deadline,
+                ))
+                self.metrics.capture(router=response)
+                result = json.loads(response)
+                if not isinstance(result, dict):
+                    raise ValueError("JSON 객체가 아님")
+            except DeadlineExceeded:
+                span["error"] = "timeout"
+                result = {"tool": "Vector"}
+            except CircuitOpen:
+                span["error"] = "circuit_open"
+                self.metrics.degraded("gemini")
+                result = {"tool": "Vector"}
+            except Overloaded:
+                # 대기열이 꽉 참 (quota 부족) -> 분류 없이 Vector 로 진행
+                span["error"] = "overloaded"
+                result = {"tool": "Vector"}
+            except Exception as e:
+                # 응답 형식 오류 / API 오류: 기본값(Vector)으로 진행하되 기록은 남김
+                span["error"] = type(e).__name__
+                self.metrics.inc("chatbot_llm_errors_total", call="router", error=type(e).__name__)
+                result = {"tool": "Vector"}
+            trace = current_trace()
+            if "error" in span and trace:
+                # 분류 없이 Vector 로 진행한 요청 (미리 생성하는 답변에서는 제외)
+                trace.set(router_fallback=span["error"])
+            # 연도를 빠뜨리거나 잘못 준 경우 질문에서 직접 찾음
+            result["years"] = parse_years(result.get("years"), result.get("final_query") or user_query,
+                                          self.LATEST_YEAR)
+            span["tool"] = result.get("tool", "Vector")
+            span["years"] = result["years"]
+        return result
+
+    def generate_router_response(self, system_prompt, user_query, timeout=None):
+        # Router LLM 호출 (JSON 문자열 반환), timeout: HTTP 요청 제한시간(초)
+        if self.router:
+            return self.router(system_prompt, user_query)
+
         model = genai.GenerativeModel(
             model_name=self.MODEL_NAME,
-            system_instruction= prompt,
+            system_instruction= system_prompt,
             generation_config={"response_mime_type": "application/json"}
         )
-        try:
-            response = model.generate_content(user_query)
-            return json.loads(response.text)
-        except:
-            return {"tool": "Vector"} 
+        # 남은 시간이 0 이어도 제한시간 없이 보내지 않음
+        request_options = {"timeout": max(timeout, 0.1)} if timeout is not None else None
+        response = model.generate_content(user_query, request_options=request_options)
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            self.metrics.tokens("router", usage.prompt_token_count, usage.candidates_token_count)
+        return response.text
 
     # ============================================================
     #  2. KG 데이터 검색(비교 질문에 사용):
     #       사용자가 선택한 학과와 전공유형에 해당하는 모든 연도의 졸업요건 데이터를 Neo4j에서 가져옴
     # ============================================================
     def get_kg_data(self, department, major_type):
-    
-
-        cypher_query = """
-        MATCH (req:Requirement {department: $dept, major_type: $type})
-        MATCH (req)-[r:INCLUDES]->(sub:Subject)
-        OPTIONAL MATCH (sub)-[s:SUBSTITUTES]->(alt:Subject)
-        RETURN 
-            req.year AS year,
-            properties(req) AS req_props,
-            properties(r) AS rel_props,
-            properties(sub) AS sub_props,
-            COLLECT({rel: properties(s), subject: properties(alt)}) AS substitutes
-        ORDER BY req.year ASC
-        """
-        
-        params = {"dept": department, "type": major_type}
         
-        context_text = ""
-        with self.neo4j_driver.session() as session:
-            records = session.run(cypher_query, params)
-            
-            data_list = []
-            for record in records:
-                item = {
-                    "연도": record['year'],
-                    "졸업요건_요약": record['req_props'],
-                    "과목정보": {
-                        "과목명": record['sub_props'].get('name'),
-                        "학수번호": record['sub_props'].get('id'),
-                        "이수구분": record['rel_props'].get('classification'),
-                        "상세구분": record['rel_props'].get('sub_classification')
-                    }
+        def to_item(record):
+            return {
+                "연도": record['year'],
+                "졸업요건_요약": record['req_props'],
+                "과목정보": {
+                    "과목명": record['sub_props'].get('name'),
+                    "학수번호": record['sub_props'].get('id'),
+                    "이수구분": record['rel_props'].get('classification'),
+                    "상세구분": record['rel_props'].get('sub_classification')
                 }
-                data_list.append(item)
-            
-            json_str = json.dumps(data_list, ensure_ascii=False, indent=2)
-            
-            return [Document(page_content=json_str, metadata={"source": "소프트웨어융합대학 교육과정 문서"})]
+            }
+
+        data_list = self.cached("kg_data", [department, major_type],
+                                lambda: self.kg.read("kg_data", transform=to_item, dept=department, type=major_type))
+        json_str = json.dumps(data_list, ensure_ascii=False, indent=2)
+        
+        return [Document(page_content=json_str, metadata={"source": "소프트웨어융합대학 교육과정 문서"})]
     
     # ============================================================
     #  2-1. KG 데이터 검색(일반 질문에 사용):
     #       사용자 정보에 해당하는 졸업요건 노드만 가져옴
     # ============================================================
     def get_user_subgraph(self, year, dept, major_type):
-        query = """
-        MATCH (req:Requirement {year: $year, department: $dept, major_type: $type})
-        RETURN properties(req) AS info
-        """
+        return self.cached("user_subgraph", [int(year), dept, major_type],
+                           lambda: self._get_user_subgraph(year, dept, major_type))
+
+    def _get_user_subgraph(self, year, dept, major_type):
+        record = self.kg.read_single("user_subgraph", year=int(year), dept=dept, type=major_type)
         
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, year=int(year), dept=dept, type=major_type)
-            record = result.single() 
-            
-            if record:
-                return str(record["info"])
-            return ""
+        if record:
+            return str(record["info"])
+        return ""
         
 
     # ============================================================
     # 3. VectorDB 데이터 검색(일반 질문에 사용):
-    #       사용자가 선택한 학과와 연도를 기준으로 검색
+    #       사용자가 선택한 학과와 질문 연도(없으면 입학년도) + 최신 연도를 한 번에 검색
     # ============================================================
-    def get_vector_context(self, admission_year, department, query):
-        college = self.DEPARTMENT_TO_COLLEGE_MAP.get(department)
-        
-        # 1차 검색: 사용자가 선택학 연도의 문서 검색
-        filter_primary = {  
-            "$and": [
-                {"year": {"$eq": admission_year}},
-                {"$or": [{"department": {"$eq": department}}, {"department": {"$eq": college}}]}
-            ]
-        }
-
-        # 2차 검색: 가장 최근 연도 문서 검색(개편된 정보 반영하기 위함)
-        filter_secondary = {
+    def get_vector_context(self, admission_year, department, query, k=8, years=None):
+        # 같은 학생 정보 + 질문(정규화) + 연도의 검색 결과는 공유 캐시에서
+        parts = [int(admission_year), department, normalize_query(query), k, sorted(int(y) for y in years or [])]
+        return self.cached("retrieval", parts,
+                           lambda: self._get_vector_context(admission_year, department, query, k, years))
+
+    def _get_vector_context(self, admission_year, department, query, k=8, years=None):
+        college = self.registry.common_department(department)
+        departments = [department, college]
+
+        # 질문이 가리키는 연도(없으면 입학년도) + 가장 최근 연도(개편된 정보 반영)
+        search_years = list(dict.fromkeys([int(y) for y in (years or [admission_year])] + [self.LATEST_YEAR]))
+
+        with self.metrics.span("embed"):
+            embedding = self.vectorstore.embeddings.embed_query(query)
+
+        # 연도별 namespace 를 동시에 검색 (필요한 연도의 청크만 조회, 학과 조건은 scope 필드 하나)
+        # none: 기본 namespace 에서 연도 $in 으로 한 번에 검색, 연도별 최대 k개씩 나눔
+        # (한 연도 문서만 상위에 몰려도 다른 연도 몫이 남도록 넉넉히 가져옴)
+        search = run_in_context(self.search_by_vector)
+        legacy_filter = {
             "$and": [
-                {"year": {"$eq": self.LATEST_YEAR}},
+                {"year": {"$in": search_years}},
                 {"$or": [{"department": {"$eq": department}}, {"department": {"$eq": college}}]}
             ]
         }
-        
-        retriever_p = self.vectorstore.as_retriever(search_kwargs={'k': 8, 'filter': filter_primary})
-        retriever_s = self.vectorstore.as_retriever(search_kwargs={'k': 8, 'filter': filter_secondary})
-        
-        docs = retriever_p.invoke(query) + retriever_s.invoke(query)
+        if self.VECTOR_NAMESPACES == "year":
+            scope_filter = {"scope": {"$eq": department}}
+            futures = [self.executor.submit(search, embedding, k * 2, scope_filter, str(year),
+                                            namespace_for({"year": year}, "year"))
+                       for year in search_years]
+        else:
+            futures = [self.executor.submit(search, embedding, k * len(search_years) * 2, legacy_filter, "years")]
+
+        # Pinecone 검색 동안 로컬 키워드 검색 수행
+        lexical = {year: self.get_lexical_context(query, year, departments, k) for year in search_years}
+
+        # 연도별 최대 k개 -> 상대 점수 컷 + MMR (후보 전체를 한 번에)
+        matches, failed = [], False
+        for future in futures:
+            try:
+                matches += future.result()
+            except Exception:
+                # Pinecone 장애(breaker open 포함): 로컬 키워드 색인(청크 전체 사본)의 결과만 사용
+                if self.lexical_index is None:
+                    raise
+                self.metrics.degraded("pinecone")
+                failed = True
+
+        if self.VECTOR_NAMESPACES == "year" and not matches and not failed:
+            # 연도별 namespace / scope 가 없는 인덱스 (다시 구축하기 전) -> 기본 namespace 복합 필터로 한 번 더
+            logger.warning("연도별 namespace 검색 결과 없음 (%s), 기본 namespace 로 검색 "
+                           "(다시 구축하기 전 인덱스면 VECTOR_NAMESPACES=none)", search_years)
+            self.metrics.inc("chatbot_vector_namespace_fallback_total")
+            try:
+                matches = self.search_by_vector(embedding, k * len(search_years) * 2, legacy_filter, "years")
+            except Exception:
+                if self.lexical_index is None:
+                    raise
+                self.metrics.degraded("pinecone")
+        matches.sort(key=lambda match: -match[1])
+
+        candidates, counts = [], dict.fromkeys(search_years, 0)
+        for match in matches:
+            year = int(match[0].metadata.get("year", 0))
+            if year in counts and counts[year] < k:
+                counts[year] += 1
+                candidates.append(match)
+
+        with self.metrics.span("select") as span:
+            selected = select_matches(embedding, candidates)
+            span.update(candidates=len(candidates), kept=len(selected))
+
+        vector = {year: [] for year in search_years}
+        for doc in selected:
+            vector[int(doc.metadata.get("year", 0))].append(doc)
+
+        # 연도별로 Vector 결과와 키워드 결과를 RRF로 결합한 뒤, 순위별로 번갈아 배치
+        # (토큰 예산으로 뒤쪽이 잘려도 연도마다 상위 결과는 남음)
+        key = lambda d: doc_key(d.metadata)
+        fused = [reciprocal_rank_fusion([vector[year], lexical[year]], key=key, limit=k) for year in search_years]
+        docs = [ranked[i] for i in range(k) for ranked in fused if i < len(ranked)]
         
         unique_docs = { (doc.metadata['source'], doc.metadata.get('seq_num', 0)): doc for doc in docs }
         return list(unique_docs.values())
+
+    def search_by_vector(self, embedding, k, search_filter, label, namespace=None):
+        # 유사도 점수와 벡터(MMR 용)도 같이 받음 -> [(Document, 점수, 벡터)]
+        # namespace 가 없으면 vectorstore 기본 namespace
+        with self.metrics.span("retrieve", filter=label) as span:
+            response = self.breakers["pinecone"].call(lambda: self.vectorstore.index.query(
+                vector=embedding, top_k=k, filter=search_filter,
+                include_values=True, include_metadata=True,
+                namespace=namespace or getattr(self.vectorstore, "_namespace", None),
+            ))
+            text_key = getattr(self.vectorstore, "_text_key", "text")
+            matches = []
+            for match in response["matches"]:
+                metadata = dict(match["metadata"])
+                text = metadata.pop(text_key, None)
+                if text is not None:
+                    matches.append((Document(page_content=text, metadata=metadata), match["score"], match["values"]))
+            span["docs"] = len(matches)
+        self.metrics.docs("vector", len(matches))
+        return matches
+
+    # ============================================================
+    # 3-1. 로컬 키워드 검색(BM25):
+    #       학수번호, 과목명처럼 정확한 단어 매칭이 필요한 질문 보완
+    # ============================================================
+    def get_lexical_context(self, query, year, departments, k=8):
+        if not self.lexical_index:
+            return []
+
+        with self.metrics.span("lexical", year=year) as span:
+            results = self.lexical_index.search(query, k=k, years=[year], departments=departments)
+            # 최고 점수 대비 너무 낮은 결과는 제외
+            keep = relative_cutoff([score for score, _ in results], LEXICAL_CUTOFF, min_keep=1)
+            results = [r for r, kept in zip(results, keep) if kept]
+            span["docs"] = len(results)
+        self.metrics.docs("lexical", len(results))
+        return [Document(page_content=d["page_content"], metadata=d["metadata"]) for _, d in results]
     
     # ============================================================
     # 4. 남은 학점 계산기(자가 졸업진단 기능)
     # ============================================================
+    def get_course_resolver(self):
+        if self._course_resolver is None:
+            self._course_resolver = CourseResolver(self.kg.read("subjects"))
+        return self._course_resolver
+
+    def get_substitution_index(self):
+        if self._substitution_index is None:
+            self._substitution_index = SubstitutionIndex(self.kg.read("substitutes"), self.registry.years)
+        return self._substitution_index
+
+    def suggest_courses(self, text, limit=8):
+        # 과목 입력 자동완성
+        return self.get_course_resolver().suggest(text, limit)
+
+    def resolve_courses(self, taken_subjects_list):
+        # 입력한 과목명 -> 일치하는 Subject 노드 목록 (정확히 일치할 때만, 못 찾으면 [])
+        return self.get_course_resolver().resolve_many(taken_subjects_list)
+
+    def taken_subjects(self, resolved):
+        """
+        resolve_courses() 결과 -> (이수 과목명/별칭 set, 이수 과목 id set)
+        입력한 과목과 이름/별칭이 같은 과목은 모두 이수로 봄 (학과마다 학수번호가 다른 졸업논문 등)
+        졸업 자가진단 / 교육과정 비교 / 추천 과목이 같은 기준으로 이수 여부를 판단하도록 함께 사용
+        """
+        resolver = self.get_course_resolver()
+        names = set(resolved)
+        for subjects in resolved.values():
+            for subject in subjects:
+                names.add(subject["name"])
+                names.update(subject["aliases"])
+        ids = {subject["id"] for name in names for subject in resolver.resolve(name)}
+        return names, ids
+
+    def course_suggestions(self, taken_subjects_list):
+        # 인식하지 못한 입력 -> "혹시 이 과목인가요?" 후보 (이수 과목으로 인정하지 않음)
+        resolver = self.get_course_resolver()
+        return {text: resolver.did_you_mean(text) for text in taken_subjects_list if not resolver.resolve(text)}
+
     def check_graduation_status(self, year, dept, major_type, taken_subjects_list):
-        # 1. 입력값 Set 변환
-        taken_set = set(taken_subjects_list)
+        with self.metrics.trace("graduation", year=year, department=dept, major_type=major_type,
+                                taken_count=len(taken_subjects_list)):
+            self.metrics.capture(taken=list(taken_subjects_list))
+            return self._check_graduation_status(year, dept, major_type, taken_subjects_list)
+
+    def _check_graduation_status(self, year, dept, major_type, taken_subjects_list):
+        # 1. 입력값 Set 변환 (띄어쓰기, 괄호, 학수번호를 정규화해서 정확히 일치한 과목의 과목명/별칭도 추가)
+        with self.metrics.span("resolve_courses") as span:
+            resolved = self.resolve_courses(taken_subjects_list)
+            taken_set, taken_ids = self.taken_subjects(resolved)
+            span["unresolved"] = sum(1 for s in resolved.values() if not s)
+
+        # 여러 번 바뀐 과목(A→B→C)도 인정하도록 대체 과목 묶음 사용
+        substitution = self.get_substitution_index()
+        subject_names = self.get_course_resolver().subjects
 
         # 2. DB 쿼리 
-        query = """
-        MATCH (req:Requirement {year: $year, department: $dept, major_type: $type})
-        MATCH (req)-[r:INCLUDES]->(subject:Subject)
-        WHERE r.classification IN ['전공필수', '전공기초', '전공선택'] 
-        OPTIONAL MATCH (subject)-[s:SUBSTITUTES]->(alternative:Subject)
-        RETURN 
-            properties(req) AS req_props, 
-            r.classification AS classification,        
-            r.sub_classification AS sub_classification, 
-            subject.name AS subject_name, 
-            subject.aliases AS subject_aliases, 
-            subject.credits AS subject_credits,
-            alternative.name AS alternative_name, 
-            alternative.aliases AS alternative_aliases, 
-            s.note AS note
-        """
-        
-        with self.neo4j_driver.session() as session:
-            data = [dict(r) for r in session.run(query, year=int(year), dept=dept, type=major_type)]
+        data = self.kg.read("graduation", year=int(year), dept=dept, type=major_type)
 
         # 3. 초기화
         req_info = data[0]['req_props'] if data else {}
@@ -307,7 +575,8 @@ class StreamlitRAGChatbot:
                 (r['alternative_aliases'] or [])
             )
             candidates.discard(None)  # None 제거
-            is_taken = bool(candidates & taken_set) 
+            equivalents = substitution.equivalents(dept, year, r['subject_id'])
+            is_taken = bool(candidates & taken_set) or not taken_ids.isdisjoint(equivalents)
 
             # 학점 계산
             if is_taken:    # 남은 학점 계산
@@ -323,6 +592,8 @@ class StreamlitRAGChatbot:
                     existing = next((x for x in missing_list if x["name"] == subj_name), None)
                     
                     current_alt = r['alternative_name']
+                    chain_alts = [subject_names[sid]["name"] for sid in sorted(equivalents)
+                                  if sid != r['subject_id'] and sid in subject_names]
 
                     if existing:
                         if current_alt:
@@ -334,7 +605,7 @@ class StreamlitRAGChatbot:
                         entry = {
                             "name": subj_name, 
                             "credits": credits, 
-                            "alternatives": current_alt or "없음", 
+                            "alternatives": ", ".join(dict.fromkeys(chain_alts)) or current_alt or "없음", 
                             "note": r['note'] or ""
                         }
                         missing_list.append(entry)
@@ -351,10 +622,158 @@ class StreamlitRAGChatbot:
 
         return req_info, missing, status
 
+    def get_advisor(self, dept):
+        advisor = self._advisors.get(dept)
+        if advisor is None:
+            with self.metrics.span("build_advisor"):
+                rows = self.kg.read("department_requirements", dept=dept)
+                advisor = self._advisors[dept] = CurriculumAdvisor(dept, rows, self.get_substitution_index())
+        return advisor
+
+    def compare_curricula(self, dept, taken_subjects_list):
+        """
+        수강 과목으로 학과의 모든 교육과정(연도 x 전공유형)을 한 번에 진단
+        -> [{"year", "major_type", "total_remaining", "status", "missing"}, ...] (남은 학점이 적은 순)
+        """
+        with self.metrics.trace("curriculum_compare", department=dept, taken_count=len(taken_subjects_list)):
+            advisor = self.get_advisor(dept)
+            # 대체 과목은 advisor 가 연도별로 반영 (check_graduation_status 와 같은 SubstitutionIndex)
+            _, taken_ids = self.taken_subjects(self.resolve_courses(taken_subjects_list))
+            with self.metrics.span("evaluate", options=len(advisor.options)):
+                return advisor.evaluate(taken_ids)
+
+    def plan_graduation(self, year, dept, major_type, taken_subjects_list):
+        """
+        남은 영역별 학점을 모두 채우는 최소 학점 과목 조합 (graduation_planner.py)
+        -> {"courses", "total_credits", "unmet"} (해당 졸업요건이 없으면 None)
+        """
+        with self.metrics.trace("graduation_plan", year=year, department=dept, major_type=major_type,
+                                taken_count=len(taken_subjects_list)):
+            advisor = self.get_advisor(dept)
+            names = {sid: s["name"] for sid, s in self.get_course_resolver().subjects.items()}
+            # check_graduation_status 와 같은 이수 과목 (같은 이름 / 별칭의 과목 + 이 연도의 대체 과목)
+            _, taken_ids = self.taken_subjects(self.resolve_courses(taken_subjects_list))
+            substitution = self.get_substitution_index()
+            taken_ids |= {alt for sid in taken_ids for alt in substitution.equivalents(dept, year, sid)}
+            with self.metrics.span("plan"):
+                return plan_courses(advisor, taken_ids, year, major_type, names)
+
     # ============================================================
     #  4. 메인 Chat 함수
     # ============================================================
     def chat(self, admission_year: int, department: str, query: str, history=None, major_type="단일전공"):
+        with self.metrics.trace("chat", admission_year=admission_year, department=department, major_type=major_type,
+                                query=anonymize(query), history_turns=len(history or [])):
+            # trace 로그(CHATBOT_TRACE_LOG)에는 익명화한 질문만, 원문은 capture(기록 시 익명화)로만
+            self.metrics.capture(query=query, history=history)
+            # 이전 대화 없는 질문은 미리 생성된 답변부터 확인
+            if self.answer_store and not history:
+                hit = self.answer_store.get(query, admission_year, department, major_type)
+                self.metrics.cache_hit("precomputed", hit is not None)
+                if hit:
+                    return hit
+
+            # 처리 중인 같은 질문(질문, 학생 정보, 최근 대화)이 있으면 그 결과를 함께 사용
+            # (다른 프로세스가 이미 답한 질문이면 공유 캐시에서)
+            key = chat_key(query, admission_year, department, major_type, history)
+            try:
+                # 같은 질문을 처리 중인 요청이 요청 예산 안에 끝나지 않으면 기다리지 않고 직접 처리
+                result, shared = self.single_flight.do(
+                    key, lambda: self.cached("answer", [key],
+                                             lambda: self._chat(admission_year, department, query, history, major_type)),
+                    timeout=self.REQUEST_BUDGET,
+                )
+            except DeadlineExceeded:
+                # 답변 생성이 요청 예산(LLM_REQUEST_BUDGET) 안에 끝나지 않음 (캐시에 저장하지 않음)
+                current_trace().set(timed_out=True)
+                return "답변 생성이 지연되고 있습니다. 잠시 후 다시 시도해주세요.", []
+            self.metrics.cache_hit("singleflight", shared)
+            return result
+
+    def _chat(self, admission_year, department, query, history, major_type):
+        deadline = deadline_after(self.REQUEST_BUDGET)
+        prepared = self.prepare_answer(admission_year, department, query, history, major_type, deadline)
+        if prepared is None:
+            return "관련된 정보를 찾을 수 없었습니다.", "[]"
+        inputs, passages = prepared
+
+        # 남은 예산 안에서만 기다림, 느리면 같은 요청을 한 번 더 보내고 먼저 끝난 답변 사용
+        # (대기열이 꽉 찼거나 Gemini 장애면 제한 모드)
+        try:
+            with self.metrics.span("generate"):
+                response, usage = self.breakers["gemini"].call(lambda: self.hedger.call(
+                    "answer", lambda: self.llm_scheduler.run(lambda: self.generate_answer(inputs), deadline), deadline))
+        except (CircuitOpen, Overloaded):
+            self.metrics.degraded("gemini")
+            return self.parse_sources(self.limited_answer(passages), passages)
+        self.record_answer_tokens(usage)
+        self.metrics.capture(answer=response)
+        
+        with self.metrics.span("parse_sources"):
+            return self.parse_sources(response, passages)
+
+    def chat_stream(self, admission_year, department, query, history=None, major_type="단일전공"):
+        """
+        chat()의 스트리밍 버전 (HTTP SSE 용)
+        ("token", 텍스트 조각) ... ("done", {"answer": 전체 답변, "sources": 출처}) 순서로 yield
+        """
+        with self.metrics.trace("chat", admission_year=admission_year, department=department,
+                                major_type=major_type, stream=True):
+            self.metrics.capture(query=query, history=history)
+            # 공유 캐시에 답변이 있으면 한 번에 보냄
+            key = chat_key(query, admission_year, department, major_type, history)
+            hit = self.shared_cache.get("answer", [key]) if self.shared_cache else None
+            if self.shared_cache:
+                self.metrics.cache_hit("answer", hit is not None)
+            if hit:
+                yield "token", hit[0]
+                yield "done", {"answer": hit[0], "sources": hit[1]}
+                return
+
+            # 스트리밍 답변은 중복 요청을 보낼 수 없으므로 질문 분류와 대기열 대기에만 마감 시간 적용
+            deadline = deadline_after(self.REQUEST_BUDGET)
+            prepared = self.prepare_answer(admission_year, department, query, history, major_type, deadline)
+            if prepared is None:
+                answer = "관련된 정보를 찾을 수 없었습니다."
+                yield "token", answer
+                yield "done", {"answer": answer, "sources": []}
+                return
+            inputs, passages = prepared
+
+            buffer, sent = "", 0
+            try:
+                with self.metrics.span("generate"), self.llm_scheduler.slot(deadline), self.breakers["gemini"].guard():
+                    usage = UsageMetadataCallbackHandler()
+                    for chunk in self.document_chain.stream(inputs, config={"callbacks": [usage]}):
+                        buffer += chunk
+
+                        # [[REF: ...]] 부분은 사용자에게 보내지 않음 (마커가 잘려서 올 수 있으므로 끝 5글자는 보류)
+                        marker = buffer.find("[[REF:")
+                        safe = marker if marker != -1 else max(sent, len(buffer) - 5)
+                        if safe > sent:
+                            yield "token", buffer[sent:safe]
+                            sent = safe
+            except (CircuitOpen, Overloaded):
+                # Gemini 장애 / 대기열 초과 (스트림 시작 전에만 거절하므로 아직 보낸 내용 없음) -> 제한 모드
+                self.metrics.degraded("gemini")
+                answer, sources = self.parse_sources(self.limited_answer(passages), passages)
+                yield "token", answer
+                yield "done", {"answer": answer, "sources": sources}
+                return
+            self.record_answer_tokens(usage)
+            self.metrics.capture(answer=buffer)
+
+            with self.metrics.span("parse_sources"):
+                response, sources = self.parse_sources(buffer, passages)
+            if len(response) > sent and "[[REF:" not in buffer:
+                yield "token", response[sent:]
+            if self.shared_cache and not current_trace().attrs.get("degraded"):
+                self.shared_cache.set("answer", [key], (response, sources))
+            yield "done", {"answer": response, "sources": sources}
+
+    def prepare_answer(self, admission_year, department, query, history, major_type, deadline=None):
+        # 질문 분류 ~ 프롬프트 구성 (답변 생성 직전까지), 검색 결과가 없으면 None
+        trace = current_trace()
         
         # 1. 히스토리 포맷팅
         history_text = ""
@@ -366,10 +785,10 @@ class StreamlitRAGChatbot:
             history_text = "이전 대화 없음."
 
         # 2. 의도 파악
-        intent_result = self.analyze_intent(query, history_text) 
+        intent_result = self.analyze_intent(query, history_text, deadline)
         tool = intent_result.get("tool", "Vector")
         final_query = intent_result.get("final_query", query)
-        print(f"Original: {query} -> Refined: {final_query}")   #디버깅용
+        trace.set(route=tool, final_query=anonymize(final_query))
         
         # 3. 데이터 검색 (KG 또는 Vector)
         docs = []
@@ -379,21 +798,8 @@ class StreamlitRAGChatbot:
             docs = self.get_kg_data(department, major_type)
             source_data = "소프트웨어융합대학 교육과정 PDF"
         else:
-            docs = self.get_vector_context(admission_year, department, final_query) # 검색시에는 다시 생성된 쿼리로 
-             # ===== 디버깅용 =====
-            '''
-            print(f"검색된 문서 수: {len(docs)}")
-            if docs:
-                for i, doc in enumerate(docs[:3]):
-                    print(f"\n--- Doc {i+1} ---")
-                    print(f"Source: {doc.metadata.get('source', 'Unknown')}")
-                    print(f"Year: {doc.metadata.get('year', 'Unknown')}")
-                    print(f"Dept: {doc.metadata.get('department', 'Unknown')}")
-                    print(f"Content (first 150 chars): {doc.page_content[:150]}")
-            else:
-                print("검색된 문서 0개")
-            '''
-            # ===== 끝 =====
+            # 검색시에는 다시 생성된 쿼리로, 질문이 가리키는 연도 기준
+            docs = self.get_vector_context(admission_year, department, final_query, years=intent_result.get("years"))
             kg_data = self.get_user_subgraph(admission_year, department, "졸업요건")
 
             # 쿼리에 kg 데이터 같이 포함시킴
@@ -402,36 +808,66 @@ class StreamlitRAGChatbot:
             
             chunk_nums = sorted([int(d.metadata.get('seq_num', 0)) for d in docs if d.metadata.get('seq_num') is not None])
             source_data = ", ".join(map(str, chunk_nums)) if chunk_nums else "없음"
+        self.metrics.capture(years=intent_result.get("years"), docs=[list(doc_key(d.metadata)) for d in docs])
 
-        # 4. 답변 생성
+        # 4. 답변 생성용 입력 구성
         if not docs:
-            return "관련된 정보를 찾을 수 없었습니다.", "[]"
+            return None
         
-        numbered_docs = []
-        for i, doc in enumerate(docs):
-            
-            doc_year = doc.metadata.get("year")
-        
-            # 각 청크 앞에 번호와 연도를 적어서 llm에 전달
-            new_content = f"[{i+1}] ({doc_year}년 규정) {doc.page_content}"
-            
-            new_doc = Document(
-                page_content= new_content,
-                metadata= doc.metadata
-            )
-            numbered_docs.append(new_doc)
+        with self.metrics.span("prompt") as span:
+            # 연속 청크 병합 + 연도 간 중복 규정 제거 -> 토큰 예산 안에서만 (번호는 그 뒤에 붙임)
+            compacted = compact_documents(docs)
+            passages, context_tokens = fit_budget(compacted, self.token_counter, self.CONTEXT_TOKEN_BUDGET)
+
+            numbered_docs = []
+            for i, passage in enumerate(passages):
+                
+                # 각 passage 앞에 번호와 연도를 적어서 llm에 전달
+                new_content = f"[{i+1}] ({year_label(passage['years'])}년 규정) {passage['text']}"
+                
+                new_doc = Document(
+                    page_content= new_content,
+                    metadata= passage['docs'][0].metadata
+                )
+                numbered_docs.append(new_doc)
+            span.update(docs=len(docs), passages=len(passages), dropped=len(compacted) - len(passages),
+                        context_tokens=context_tokens,
+                        context_chars=sum(len(d.page_content) for d in numbered_docs))
+        self.metrics.docs("context", len(passages))
             
-        response = self.document_chain.invoke({
+        inputs = {
             "input": query, # 답변 생성시에는 원래 쿼리로
             "context": numbered_docs,  
             "admission_year": admission_year,
             "department": department,
             "major_type": major_type,
             "history": history_text
-        }) 
-        
+        }
+        return inputs, passages
+
+    def limited_answer(self, passages, n=2, max_chars=600):
+        # 제한 모드(Gemini 장애): LLM 없이 관련도가 높은 규정 원문 일부를 그대로 보여줌
+        parts = [LIMITED_MODE_NOTICE]
+        for i, passage in enumerate(passages[:n]):
+            text = passage["text"]
+            parts.append(f"[{i + 1}] {text[:max_chars]}{'...' if len(text) > max_chars else ''}")
+        refs = ", ".join(str(i + 1) for i in range(min(n, len(passages))))
+        return "\n\n".join(parts) + f"\n[[REF: {refs}]]"
+
+    def generate_answer(self, inputs):
+        # 답변 생성 요청 하나 (hedge 시 요청마다 토큰 사용량을 따로 받음)
+        usage = UsageMetadataCallbackHandler()
+        response = self.document_chain.invoke(inputs, config={"callbacks": [usage]})
+        return response, usage
+
+    def record_answer_tokens(self, usage):
+        # 답변 생성 LLM의 토큰 수 (모델별로 집계된 값을 합침)
+        for model_usage in usage.usage_metadata.values():
+            self.metrics.tokens("answer", model_usage.get("input_tokens"), model_usage.get("output_tokens"))
+
+    def parse_sources(self, response, passages):
         # 5. 답변 출처 필터링
-        selected_docs = []
+        selected = []
         
         if "[[REF:" in response:
             # 답변만 남김
@@ -440,10 +876,13 @@ class StreamlitRAGChatbot:
             
             # llm로부터 받은 출처번호 유효성 확인
             indices = [int(n)-1 for n in re.findall(r'\d+', ref_str)]
-            selected_docs = [docs[i] for i in indices if 0 <= i < len(docs)]
+            selected = [passages[i] for i in indices if 0 <= i < len(passages)]
         
-        if not selected_docs:
-            selected_docs = docs[:3]
+        if not selected:
+            selected = passages[:3]
+
+        # passage 번호 -> 원본 청크
+        selected_docs = [doc for passage in selected for doc in passage['docs']]
 
         # 6. UI 출처 표시
         source_data = []
@@ -463,7 +902,7 @@ class StreamlitRAGChatbot:
             else:
                 name = source.split("/")[-1] 
                 url = None  
-                page = None 
+                page = doc.metadata.get("page")     # 표/제목 단위 청크만 페이지 번호가 있음
             
             # 중복 제거하고 리스트에 추가
             if (name, page, url) not in seen:
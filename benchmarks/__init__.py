@@ -0,0 +1 @@
+"""오프라인 성능 측정 도구 (가짜 LLM / Vector DB / KG 사용)"""
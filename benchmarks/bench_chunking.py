@@ -0,0 +1,262 @@
+"""
+청크 분할 방식 비교: RecursiveCharacterTextSplitter(1000자, 겹침 200자) vs vector_db/chunking.py
+
+- 청크 수, 저장 용량(본문 + 메타데이터 바이트), 머리행 없이 잘린 표 조각 수
+- 대표 질문마다 학과/연도 조건으로 상위 k개를 검색(BM25)해서 프롬프트에 들어가는 토큰 수 평균
+  (compact_documents 로 압축한 뒤, 토큰 수는 글자 수로 근사 - 한글 1글자 ≒ 1토큰)
+- 과목 질문("<과목명> 몇 학점이야?")마다 해당 과목 행이 표 머리행과 같은 청크에 있는 결과가
+  몇 번째에 나오는지 -> 답을 찾은 비율, 그때까지 읽은 토큰 수 평균
+
+입력:
+- 교육과정 PDF(vector_db/config.json)와 pymupdf4llm 이 있으면 실제 to_markdown 결과
+- 없으면 KG/output/*_tables.json 의 표 추출 결과를 페이지별 마크다운으로 바꿔서 사용 (--source fixture)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_chunking
+    python -m benchmarks.bench_chunking --source pdf --k 8
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+from collections import defaultdict
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.fakes import KG_OUTPUT_DIR
+from benchmarks.run_benchmark import VECTOR_QUESTIONS
+from context_compactor import compact_documents
+from vector_db.chunking import TABLE_SEP_RE, chunk_markdown_pages
+from vector_db.lexical_index import LexicalIndex
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VECTOR_DB_DIR = os.path.join(ROOT_DIR, "vector_db")
+
+QUESTIONS = VECTOR_QUESTIONS + [
+    "객체지향프로그래밍은 몇 학년 과목이야?",
+    "컴퓨터구조 학수번호 알려줘",
+    "전공기초 과목 목록 알려줘",
+    "캡스톤디자인 대체 과목이 뭐야?",
+    "선형대수는 몇 학점이야?",
+]
+PAGE_HEADER_RE = re.compile(r"^--- 페이지 (\d+), 표 (\d+) ---$", re.M)
+
+
+# ============================================================
+# 입력 (섹션별 페이지 마크다운)
+# ============================================================
+def to_markdown_table(rows):
+    cells = [[(c or "").replace("\n", " ").strip() for c in row] for row in rows]
+    width = max(len(r) for r in cells)
+    lines = ["| " + " | ".join(r + [""] * (width - len(r))) + " |" for r in cells]
+    lines.insert(1, "|" + "---|" * width)
+    return "\n".join(lines)
+
+
+def fixture_sections():
+    """
+    KG/output 표 추출 결과 -> [(메타데이터, [(페이지, 마크다운)])]
+    표마다 "## 표 n" 제목, 학과/연도마다 "# 연도 학과 교육과정" 제목
+    """
+    grouped = defaultdict(lambda: defaultdict(list))
+    for name in ("requirement_tables.json", "subject_tables.json", "substitutes_tables.json"):
+        with open(os.path.join(KG_OUTPUT_DIR, name), "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        for table in tables:
+            meta = table["metadata"]
+            text = table["table_data_as_string"]
+            headers = list(PAGE_HEADER_RE.finditer(text))
+            for i, m in enumerate(headers):
+                body = text[m.end():headers[i + 1].start() if i + 1 < len(headers) else len(text)].strip()
+                try:
+                    rows = ast.literal_eval(body)
+                except (ValueError, SyntaxError):
+                    continue
+                if rows:
+                    page = int(m.group(1))
+                    grouped[(meta.get("year"), meta.get("department"))][page].append(
+                        f"## 표 {m.group(2)}\n\n{to_markdown_table(rows)}")
+
+    sections = []
+    for (year, dept), pages in sorted(grouped.items(), key=lambda x: (x[0][0] or 0, str(x[0][1]))):
+        ordered = sorted(pages.items())
+        first_page = ordered[0][0]
+        page_texts = [(p, "\n\n".join(parts)) for p, parts in ordered]
+        page_texts[0] = (first_page, f"# {year} {dept} 교육과정\n\n{page_texts[0][1]}")
+        meta = {"source": f"소프트웨어융합대학_교육과정_{year}.pdf", "year": year, "department": dept}
+        sections.append((meta, page_texts))
+    return sections
+
+
+def pdf_sections():
+    # create_db.py 와 같은 방식으로 config.json 의 PDF 구간을 페이지별 마크다운으로 변환
+    from pymupdf4llm import to_markdown
+
+    with open(os.path.join(VECTOR_DB_DIR, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    sections = []
+    for file in config:
+        path = next((p for p in (os.path.join(VECTOR_DB_DIR, file["file_path"]),
+                                 os.path.join(ROOT_DIR, file["file_path"])) if os.path.exists(p)), None)
+        if path is None:
+            continue
+        for section in file["sections"]:
+            pages = list(range(section["start_page"], section["end_page"] + 1))
+            page_texts = [(p["metadata"].get("page"), p["text"].replace("�", " "))
+                          for p in to_markdown(path, pages=pages, page_chunks=True)]
+            meta = dict(file.get("common_metadata", {}), **section.get("metadata", {}))
+            meta["source"] = os.path.basename(path)
+            sections.append((meta, [(p, t) for p, t in page_texts if t.strip()]))
+    if not sections:
+        raise SystemExit("config.json 의 PDF 파일을 찾을 수 없음 (--source fixture 사용)")
+    return sections
+
+
+# ============================================================
+# 분할 / 측정
+# ============================================================
+def split_recursive(sections):
+    # 이전 create_db.py: 구간 전체 마크다운을 1000자/200자 겹침으로 분할
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    docs = []
+    for meta, pages in sections:
+        chunks = splitter.create_documents(["\n\n".join(t for _, t in pages)])
+        for chunk in chunks:
+            chunk.metadata.update(meta)
+        docs += chunks
+    return docs
+
+
+def split_structured(sections):
+    docs = []
+    for meta, pages in sections:
+        docs += chunk_markdown_pages(pages, meta)
+    return docs
+
+
+def headerless_tables(docs):
+    # 표 행으로 시작하는데 머리행(다음 줄이 구분선)이 없는 청크 = 표 중간에서 잘린 조각
+    count = 0
+    for d in docs:
+        lines = d.page_content.strip().split("\n")
+        if lines[0].startswith("|") and not (len(lines) > 1 and TABLE_SEP_RE.match(lines[1].strip())):
+            count += 1
+    return count
+
+
+def has_row_with_header(text, name):
+    # 과목 행 위쪽에 표 구분선(머리행)이 있는지
+    seen_header = False
+    for line in text.split("\n"):
+        line = line.strip()
+        if TABLE_SEP_RE.match(line):
+            seen_header = True
+        elif seen_header and line.startswith("|") and f" {name} " in line:
+            return True
+    return False
+
+
+def course_questions(sections, per_section=10):
+    # 구간마다 표에 나오는 과목명 일부 (과목 노드 이름 기준)
+    with open(os.path.join(KG_OUTPUT_DIR, "subject_nodes.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    nodes = data.get("nodes", []) if isinstance(data, dict) else data
+    names = sorted({n["name"] for n in nodes if n.get("name")})
+
+    questions = []
+    for meta, pages in sections:
+        text = "\n".join(t for _, t in pages)
+        found = [n for n in names if f" {n} " in text][:per_section]
+        questions += [(meta.get("year"), meta.get("department"), n) for n in found]
+    return questions
+
+
+def measure(docs, k, course_qs):
+    for i, d in enumerate(docs):
+        d.metadata["seq_num"] = i + 1
+    index = LexicalIndex()
+    index.add_documents(docs)
+
+    stored = sum(len(d.page_content.encode("utf-8")) + len(json.dumps(d.metadata, ensure_ascii=False).encode("utf-8"))
+                 for d in docs)
+    profiles = sorted({(d.metadata.get("year"), d.metadata.get("department")) for d in docs},
+                      key=lambda p: (p[0] or 0, str(p[1])))
+
+    retrieved, chunks = [], []
+    for year, dept in profiles:
+        for q in QUESTIONS:
+            results = index.search(q, k=k, years=[year], departments=[dept])
+            if not results:
+                continue
+            found = [d for d in docs if (d.metadata["seq_num"]) in {r["metadata"]["seq_num"] for _, r in results}]
+            passages = compact_documents(found)
+            retrieved.append(sum(len(p["text"]) for p in passages))
+            chunks.append(len(found))
+
+    # 과목 행 + 머리행이 있는 청크가 나올 때까지 읽는 토큰 수
+    answered, tokens_to_answer = 0, []
+    for year, dept, name in course_qs:
+        results = index.search(f"{name} 몇 학점이야?", k=k, years=[year], departments=[dept])
+        read = 0
+        for _, r in results:
+            read += len(r["page_content"])
+            if has_row_with_header(r["page_content"], name):
+                answered += 1
+                tokens_to_answer.append(read)
+                break
+
+    return {
+        "chunks": len(docs),
+        "stored_kb": round(stored / 1024, 1),
+        "avg_chunk_chars": round(sum(len(d.page_content) for d in docs) / max(len(docs), 1)),
+        "headerless_tables": headerless_tables(docs),
+        "avg_retrieved_tokens": round(sum(retrieved) / max(len(retrieved), 1)),
+        "avg_retrieved_chunks": round(sum(chunks) / max(len(chunks), 1), 1),
+        "answer_rate": f"{answered / max(len(course_qs), 1):.0%}",
+        "tokens_to_answer": round(sum(tokens_to_answer) / max(len(tokens_to_answer), 1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="청크 분할 방식 비교")
+    parser.add_argument("--source", choices=["auto", "pdf", "fixture"], default="auto")
+    parser.add_argument("--k", type=int, default=8, help="질문별 검색 청크 수")
+    args = parser.parse_args()
+
+    source = args.source
+    if source == "auto":
+        try:
+            sections = pdf_sections()
+            source = "pdf"
+        except (ImportError, SystemExit):
+            source = "fixture"
+    if source == "fixture":
+        sections = fixture_sections()
+    elif args.source == "pdf":
+        sections = pdf_sections()
+
+    course_qs = course_questions(sections)
+    before = measure(split_recursive(sections), args.k, course_qs)
+    after = measure(split_structured(sections), args.k, course_qs)
+
+    print(f"입력: {source} ({len(sections)}개 구간, {sum(len(p) for _, p in sections)}쪽, 과목 질문 {len(course_qs)}개)")
+    print(f"{'항목':<22} {'이전(1000/200)':>16} {'표/제목 단위':>14}")
+    labels = {
+        "chunks": "청크 수",
+        "stored_kb": "저장 용량(KB)",
+        "avg_chunk_chars": "청크 평균 글자 수",
+        "headerless_tables": "머리행 없는 표 조각",
+        "avg_retrieved_tokens": f"검색 결과 토큰(top-{args.k})",
+        "avg_retrieved_chunks": "검색 청크 수(평균)",
+        "answer_rate": "과목 행+머리행 검색됨",
+        "tokens_to_answer": "답까지 읽은 토큰",
+    }
+    for key, label in labels.items():
+        print(f"{label:<22} {before[key]:>16} {after[key]:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+학과 수를 늘렸을 때 Vector 검색 범위 비교 (vector_db/department_registry.py)
+
+- year: 연도별 namespace 에서 필요한 연도만, 학과 조건은 scope 필드 하나 (현재 기본)
+- none: 기본 namespace 하나에서 연도 $in + 학과 / 단과대학 공통 $or 복합 필터 (예전 색인)
+
+가짜 캠퍼스: 단과대학 --colleges 개 x 학과 --departments 개, 교육과정 연도 --years 개
+학과 / 연도마다 청크 --chunks 개 + 단과대학 / 연도마다 공통 문서 --common-chunks 개
+(청크 텍스트는 고정 코퍼스에서 재사용, 메타데이터만 학과 / 연도별로 다름)
+같은 (학과, 입학년도, 질문) 목록으로 _get_vector_context 를 실행해서
+지연시간 p50/p95, 검색 한 번에 필터를 검사한 청크 수, 두 방식의 검색 결과 일치율 비교
+(같은 텍스트의 청크가 여러 개라 점수가 같은 청크의 순서 차이로 일치율이 1 보다 조금 낮을 수 있음)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_departments
+    python -m benchmarks.bench_departments --colleges 12 --departments 6 --chunks 40 --vector-only
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from langchain.schema import Document
+
+from benchmarks.bench_retrieval import load_golden
+from benchmarks.fakes import HashEmbeddings, build_offline_chatbot, load_fixture_corpus
+from benchmarks.run_benchmark import RESULTS_DIR, git_commit, summarize
+from vector_db.department_registry import COMMON_SUFFIX, DepartmentRegistry
+from vector_db.lexical_index import doc_key
+
+MODES = ("none", "year")
+
+
+class CachedEmbeddings(HashEmbeddings):
+    # 같은 텍스트는 한 번만 임베딩 (가짜 코퍼스는 텍스트를 재사용)
+    def __init__(self, dim=256):
+        super().__init__(dim)
+        self.cache = {}
+
+    def _embed(self, text):
+        if text not in self.cache:
+            self.cache[text] = super()._embed(text)
+        return self.cache[text]
+
+
+# ============================================================
+# 가짜 캠퍼스
+# ============================================================
+def build_registry(args):
+    colleges = {f"단과대학{c:02d}": [f"학과{c:02d}-{d:02d}" for d in range(args.departments)]
+                for c in range(args.colleges)}
+    return DepartmentRegistry(colleges, range(args.latest_year - args.years + 1, args.latest_year + 1))
+
+
+def build_corpus(registry, args, rng):
+    texts = [d.page_content for d in load_fixture_corpus(registry=registry)]
+    docs = []
+
+    def add(college, department, year, count):
+        for _ in range(count):
+            metadata = {
+                "source": f"{college}_교육과정_{year}.pdf",
+                "year": year,
+                "department": department,
+                "college": college,
+                "seq_num": len(docs) + 1,
+            }
+            metadata["scope"] = registry.scope(metadata)
+            docs.append(Document(page_content=rng.choice(texts), metadata=metadata))
+
+    for year in registry.years:
+        for college, departments in registry.colleges.items():
+            add(college, college + COMMON_SUFFIX, year, args.common_chunks)
+            for department in departments:
+                add(college, department, year, args.chunks)
+    return docs
+
+
+def build_requests(registry, args, rng):
+    questions = [item["question"] for item in load_golden()]
+    departments = registry.departments()
+    return [(rng.choice(registry.years), rng.choice(departments), rng.choice(questions))
+            for _ in range(args.queries)]
+
+
+# ============================================================
+# 실행
+# ============================================================
+def run_mode(bot, mode, requests, k):
+    bot.VECTOR_NAMESPACES = mode
+    store = bot.vectorstore
+    year, department, question = requests[0]
+    bot._get_vector_context(year, department, question, k)     # 워밍업
+
+    store.scanned = 0
+    latencies, results = [], []
+    for year, department, question in requests:
+        start = time.perf_counter()
+        docs = bot._get_vector_context(year, department, question, k)
+        latencies.append(time.perf_counter() - start)
+        results.append({doc_key(d.metadata) for d in docs})
+    return {
+        "latency": summarize(latencies),
+        "scanned_per_query": round(store.scanned / len(requests), 1),
+    }, results
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    registry = build_registry(args)
+    corpus = build_corpus(registry, args, rng)
+    requests = build_requests(registry, args, rng)
+
+    bot = build_offline_chatbot(corpus=corpus, embeddings=CachedEmbeddings(), registry=registry)
+    bot.shared_cache = None
+    if args.vector_only:
+        bot.lexical_index = None
+    try:
+        modes, results = {}, {}
+        for mode in MODES:
+            modes[mode], results[mode] = run_mode(bot, mode, requests, args.k)
+    finally:
+        bot.close()
+
+    # 예전 방식 결과 중 연도별 namespace 결과에도 있는 비율 (같은 청크를 찾는지)
+    overlap = [len(a & b) / len(a) for a, b in zip(results["none"], results["year"]) if a]
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "departments": len(registry.departments()),
+        "years": len(registry.years),
+        "chunks": len(corpus),
+        "namespaces": len(bot.vectorstore.namespaces),
+        "modes": modes,
+        "overlap": round(sum(overlap) / len(overlap), 3) if overlap else 0.0,
+    }
+
+
+def print_table(result):
+    print(f"학과 {result['departments']}개, 연도 {result['years']}개, 청크 {result['chunks']}개 "
+          f"(namespace {result['namespaces']}개)")
+    print(f"{'mode':<10} {'p50(ms)':>9} {'p95(ms)':>9} {'검사 청크/검색':>14}")
+    for mode, r in result["modes"].items():
+        print(f"{mode:<10} {r['latency']['p50_ms']:>9} {r['latency']['p95_ms']:>9} {r['scanned_per_query']:>14}")
+    print(f"검색 결과 일치율 (none 기준): {result['overlap']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학과 수에 따른 Vector 검색 범위 비교 (연도별 namespace vs 복합 필터)")
+    parser.add_argument("--colleges", type=int, default=10, help="단과대학 수")
+    parser.add_argument("--departments", type=int, default=6, help="단과대학별 학과 수")
+    parser.add_argument("--years", type=int, default=6, help="교육과정 연도 수")
+    parser.add_argument("--latest-year", type=int, default=2025)
+    parser.add_argument("--chunks", type=int, default=30, help="학과 / 연도별 청크 수")
+    parser.add_argument("--common-chunks", type=int, default=10, help="단과대학 / 연도별 공통 문서 청크 수")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--vector-only", action="store_true", help="키워드 검색(BM25) 없이 Vector 검색만 측정")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "departments_latest.json"))
+    args = parser.parse_args()
+
+    result = run(args)
+    print_table(result)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"{args.output} 저장됨")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+임베딩 백엔드 비교: PyTorch fp32 (HuggingFaceEmbeddings) vs ONNX int8 (vector_db/onnx_embeddings.py)
+
+- 정확도: 고정 코퍼스(KG/output 표 원문 청크) + 대표 질문을 두 백엔드로 임베딩해서
+          같은 문장 벡터 간 코사인 유사도(최소/평균/1% 분위), 질문별 top-k 검색 결과 일치율 비교
+- 성능: 질문 1개 임베딩 지연시간 p50/p95, 문서 배치 처리량, 모델 로드 후 최대 메모리(RSS)
+  (메모리가 섞이지 않도록 백엔드마다 별도 프로세스에서 측정)
+
+실행 (프로젝트 루트에서, 먼저 python vector_db/onnx_embeddings.py export):
+    python -m benchmarks.bench_embeddings --docs 300 --min-cosine 0.98
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fakes import load_fixture_corpus
+from benchmarks.run_benchmark import KG_QUESTIONS, VECTOR_QUESTIONS, summarize
+
+QUESTIONS = VECTOR_QUESTIONS + KG_QUESTIONS + [
+    "전과하면 졸업요건은 어떻게 바뀌나요?",
+    "복수전공 신청 조건이 뭐야?",
+    "졸업논문 대신 할 수 있는 게 있어?",
+    "계절학기 최대 몇 학점까지 들을 수 있어?",
+]
+
+
+def max_rss_mb():
+    # Linux: KB 단위
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(backend, n_docs, output):
+    # 한 백엔드만 불러와서 벡터 + 측정값 저장 (별도 프로세스에서 실행)
+    os.environ["EMBEDDING_BACKEND"] = backend
+    from vector_db.onnx_embeddings import load_embeddings
+
+    base_rss = max_rss_mb()
+    start = time.perf_counter()
+    embeddings = load_embeddings()
+    load_seconds = time.perf_counter() - start
+
+    texts = [d.page_content for d in load_fixture_corpus()[:n_docs]]
+    embeddings.embed_query(QUESTIONS[0])     # 첫 실행(워밍업) 제외
+
+    latencies = []
+    query_vectors = []
+    for _ in range(3):
+        query_vectors = []
+        for q in QUESTIONS:
+            start = time.perf_counter()
+            query_vectors.append(embeddings.embed_query(q))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    doc_vectors = embeddings.embed_documents(texts)
+    doc_seconds = time.perf_counter() - start
+
+    np.savez(output + ".npz", docs=np.array(doc_vectors, dtype=np.float32),
+             queries=np.array(query_vectors, dtype=np.float32))
+    with open(output + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "load_seconds": round(load_seconds, 2),
+            "query": summarize(latencies),
+            "docs_per_second": round(len(texts) / doc_seconds, 1),
+            "rss_mb": round(max_rss_mb() - base_rss, 1),
+        }, f)
+
+
+def run_worker(backend, n_docs, tmp_dir):
+    output = os.path.join(tmp_dir, backend)
+    subprocess.run([sys.executable, "-m", "benchmarks.bench_embeddings", "--worker", backend,
+                    "--docs", str(n_docs), "--output", output], check=True)
+    with open(output + ".json", "r", encoding="utf-8") as f:
+        stats = json.load(f)
+    vectors = np.load(output + ".npz")
+    return stats, vectors["docs"], vectors["queries"]
+
+
+def cosine_rows(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def topk_overlap(docs_a, queries_a, docs_b, queries_b, k):
+    # 질문별 top-k 문서 집합이 겹치는 비율 평균
+    top_a = np.argsort(-(queries_a @ docs_a.T), axis=1)[:, :k]
+    top_b = np.argsort(-(queries_b @ docs_b.T), axis=1)[:, :k]
+    return float(np.mean([len(set(x) & set(y)) / k for x, y in zip(top_a, top_b)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 정확도/성능 비교")
+    parser.add_argument("--docs", type=int, default=300, help="비교할 코퍼스 청크 수")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="이보다 낮은 문장이 있으면 실패")
+    parser.add_argument("--worker", choices=["hf", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.docs, args.output)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {b: run_worker(b, args.docs, tmp_dir) for b in ("hf", "onnx")}
+
+    print(f"{'백엔드':<8} {'로드(s)':>8} {'질문 p50(ms)':>13} {'질문 p95(ms)':>13} {'문서/s':>8} {'메모리(MB)':>11}")
+    for backend, (stats, _, _) in results.items():
+        q = stats["query"]
+        print(f"{backend:<8} {stats['load_seconds']:>8} {q['p50_ms']:>13} {q['p95_ms']:>13} "
+              f"{stats['docs_per_second']:>8} {stats['rss_mb']:>11}")
+
+    _, hf_docs, hf_queries = results["hf"]
+    _, onnx_docs, onnx_queries = results["onnx"]
+    cos = np.concatenate([cosine_rows(hf_docs, onnx_docs), cosine_rows(hf_queries, onnx_queries)])
+    overlap = topk_overlap(hf_docs, hf_queries, onnx_docs, onnx_queries, args.k)
+
+    print()
+    print(f"코사인 유사도 (fp32 vs int8, {len(cos)}개): 최소 {cos.min():.4f} / 1% {np.percentile(cos, 1):.4f} "
+          f"/ 평균 {cos.mean():.4f}")
+    print(f"질문별 top-{args.k} 검색 결과 일치율: {overlap:.3f}")
+
+    if cos.min() < args.min_cosine:
+        print(f"실패: 최소 코사인 유사도 {cos.min():.4f} < {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+LLM 호출 hedge / 마감 시간(llm_hedging.py) 효과 측정
+
+가짜 LLM(질문 분류, 답변 생성)에 가끔 매우 느린 요청이 섞인 지연시간 분포를 주입하고
+같은 요청 순서를 hedge 없이 / hedge 사용으로 실행해서 chat() 전체 지연시간 p50/p95/p99 비교
+(hedge 지연은 앞쪽 --warmup 요청으로 쌓인 p90 기준, 추가 LLM 호출 비율도 출력)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_hedging
+    python -m benchmarks.bench_hedging --llm-latency 0.3 --tail-prob 0.05 --tail-factor 40 --requests 400
+"""
+
+import argparse
+import time
+
+from benchmarks.fakes import build_offline_chatbot
+from benchmarks.run_benchmark import KG_QUESTIONS, PROFILES, VECTOR_QUESTIONS, summarize
+from llm_hedging import HedgedCaller
+
+
+def counter(metrics, name):
+    return sum(v for (n, _), v in metrics.counters.items() if n == name)
+
+
+def run(args, max_hedges):
+    # 두 실행이 같은 지연시간 순서를 받도록 seed 고정
+    bot = build_offline_chatbot(llm_latency=args.llm_latency, router_latency=args.router_latency,
+                                jitter=args.jitter, seed=args.seed,
+                                tail_prob=args.tail_prob, tail_factor=args.tail_factor)
+    bot.hedger = HedgedCaller(max_hedges=max_hedges, metrics=bot.metrics)
+    bot.REQUEST_BUDGET = args.budget
+    bot.ROUTER_TIMEOUT = args.router_timeout
+
+    questions = VECTOR_QUESTIONS + KG_QUESTIONS
+    requests = [(PROFILES[i % len(PROFILES)], questions[i % len(questions)])
+                for i in range(args.warmup + args.requests)]
+
+    totals = []
+    for i, ((year, dept, major_type), question) in enumerate(requests):
+        start = time.perf_counter()
+        bot.chat(year, dept, question, history=None, major_type=major_type)
+        if i >= args.warmup:
+            totals.append(time.perf_counter() - start)
+
+    calls = len(requests) * 2
+    return {
+        "total": summarize(totals),
+        "hedges": counter(bot.metrics, "chatbot_llm_hedges_total"),
+        "hedge_wins": counter(bot.metrics, "chatbot_llm_hedge_wins_total"),
+        "deadline_exceeded": counter(bot.metrics, "chatbot_llm_deadline_exceeded_total"),
+        "extra_calls": f"{counter(bot.metrics, 'chatbot_llm_hedges_total') / calls:.1%}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM hedge / 마감 시간 효과 측정")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30, help="hedge 지연(p90) 계산용, 결과에서 제외")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="답변 생성 평균 지연(초)")
+    parser.add_argument("--router-latency", type=float, default=0.02, help="질문 분류 평균 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--tail-prob", type=float, default=0.03, help="느린 요청 비율")
+    parser.add_argument("--tail-factor", type=float, default=30, help="느린 요청의 지연 배수")
+    parser.add_argument("--budget", type=float, default=30.0, help="요청당 LLM 예산(초)")
+    parser.add_argument("--router-timeout", type=float, default=5.0, help="질문 분류 마감(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {"hedge 없음": run(args, 0), "hedge": run(args, 1)}
+
+    print(f"{'':<12} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'hedge':>6} {'hedge 승':>8} "
+          f"{'마감 초과':>8} {'추가 호출':>9}")
+    for name, r in results.items():
+        t = r["total"]
+        print(f"{name:<12} {t['p50_ms']:>9} {t['p95_ms']:>9} {t['p99_ms']:>9} {r['hedges']:>6} "
+              f"{r['hedge_wins']:>8} {r['deadline_exceeded']:>8} {r['extra_calls']:>9}")
+
+    before, after = results["hedge 없음"]["total"]["p99_ms"], results["hedge"]["total"]["p99_ms"]
+    print(f"\np99: {before}ms -> {after}ms ({(before - after) / before:.0%} 감소)" if before else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Gemini 호출 우선순위 / 요청량 제어(llm_scheduler.py) 효과 측정
+
+가짜 Gemini: 동시에 --capacity 개까지만 처리 (나머지는 quota 가 풀릴 때까지 대기)
+KG 재구축처럼 batch 호출을 계속 보내는 스레드(--batch-workers)와 채팅(질문 분류 + 답변 생성)을
+동시에 실행해서 scheduler 없이 / 사용했을 때 채팅 지연시간과 batch 처리량 비교
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_llm_scheduler
+    python -m benchmarks.bench_llm_scheduler --capacity 4 --batch-workers 16 --chats 100
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.run_benchmark import summarize
+from llm_scheduler import CLASSES, LLMScheduler, Overloaded, llm_priority
+from metrics import Metrics
+
+
+class QuotaLimitedLLM:
+    # 동시 처리 수가 정해진 가짜 Gemini (넘친 요청은 도착 순서대로 처리)
+    def __init__(self, capacity, latency, seed=0):
+        self.capacity = capacity
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.cond = threading.Condition()
+        self.waiting = deque()
+        self.active = 0
+
+    def __call__(self):
+        ticket = object()
+        with self.cond:
+            delay = self.latency * self.random.uniform(0.7, 1.3)
+            self.waiting.append(ticket)
+            while self.waiting[0] is not ticket or self.active >= self.capacity:
+                self.cond.wait()
+            self.waiting.popleft()
+            self.active += 1
+            self.cond.notify_all()
+        try:
+            time.sleep(delay)
+        finally:
+            with self.cond:
+                self.active -= 1
+                self.cond.notify_all()
+
+
+def run(args, scheduler):
+    llm = QuotaLimitedLLM(args.capacity, args.latency, args.seed)
+    call = (lambda: scheduler.run(llm)) if scheduler else llm
+    stop = threading.Event()
+    batch_done = [0]
+
+    def batch_worker():
+        with llm_priority("batch"):
+            while not stop.is_set():
+                call()
+                batch_done[0] += 1
+
+    def chat(_):
+        start = time.perf_counter()
+        try:
+            call()      # 질문 분류
+            call()      # 답변 생성
+        except Overloaded:
+            return None
+        return time.perf_counter() - start
+
+    batch_threads = [threading.Thread(target=batch_worker, daemon=True) for _ in range(args.batch_workers)]
+    for t in batch_threads:
+        t.start()
+    time.sleep(args.latency * 2)    # batch 가 먼저 quota 를 차지한 상태에서 시작
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(chat, range(args.chats)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for t in batch_threads:
+        t.join()
+
+    totals = [r for r in results if r is not None]
+    return {
+        "chat": summarize(totals),
+        "shed": len(results) - len(totals),
+        "batch_per_sec": round(batch_done[0] / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM scheduler 효과 측정")
+    parser.add_argument("--chats", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 채팅 수")
+    parser.add_argument("--batch-workers", type=int, default=12, help="batch 호출을 계속 보내는 스레드 수")
+    parser.add_argument("--capacity", type=int, default=6, help="가짜 Gemini 동시 처리 수")
+    parser.add_argument("--latency", type=float, default=0.05, help="호출 하나의 평균 지연(초)")
+    parser.add_argument("--batch-concurrency", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # 가짜 Gemini 동시 처리 수에 맞춰 전체 동시 호출 수 설정, 분당 요청 수는 제한 없이
+    classes = {name: dict(cfg, rpm=0) for name, cfg in CLASSES.items()}
+    classes["batch"]["concurrency"] = args.batch_concurrency
+    metrics = Metrics()
+    scheduler = LLMScheduler(classes=classes, max_concurrent=args.capacity, metrics=metrics)
+
+    results = {"scheduler 없음": run(args, None), "scheduler": run(args, scheduler)}
+
+    print(f"{'':<14} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'거절':>5} {'batch/s':>8}")
+    for name, r in results.items():
+        t = r["chat"]
+        print(f"{name:<14} {t['p50_ms']:>9} {t['p95_ms']:>9} {t['p99_ms']:>9} {r['shed']:>5} {r['batch_per_sec']:>8}")
+
+    waits = {dict(labels)["cls"]: hist for (name, labels), hist in metrics.histograms.items()
+             if name == "chatbot_llm_queue_wait_seconds"}
+    for cls, hist in sorted(waits.items()):
+        print(f"대기열 평균 대기 ({cls}): {hist['sum'] / hist['count'] * 1000:.1f}ms ({hist['count']}회)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+검색 품질 / 지연시간 벤치마크 (golden 질문 세트)
+
+get_vector_context 의 청크 크기, k, 필터, 결합 방식을 바꿀 때 관련도를 잃고 빨라진 것인지 확인용
+golden 세트(benchmarks/golden/retrieval.jsonl): 한 줄에 하나씩
+    {"id": ..., "question": ..., "profile": {"year", "department", "major_type"}, "years": [선택],
+     "expected": [{"text": "정답 청크에 들어 있어야 하는 부분 문자열"} 또는 {"source": ..., "seq_num": ...}]}
+(text 는 공백을 무시하고 비교 -> 청크 크기를 바꿔도 같은 세트 사용 가능, seq_num 은 특정 색인 기준)
+
+설정(검색 방식:k)별로 recall@n, MRR, 검색 결과 문서 수 / 토큰 수(압축 후), 지연시간 p50/p95 를 JSON 으로 저장
+- 검색 방식: hybrid(Vector + 키워드 RRF, 현재 챗봇), vector(Vector 만), lexical(키워드만)
+- backend: local(같은 청크로 만든 메모리 색인, 기본) / pinecone(.env 의 실제 인덱스)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_retrieval --output benchmarks/results/retrieval_base.json
+    python -m benchmarks.bench_retrieval --configs hybrid:8 hybrid:4 vector:8 --chunk-size 600 --chunk-overlap 100
+    python -m benchmarks.bench_retrieval --corpus vector_db/lexical_index.json --embeddings model
+    python -m benchmarks.bench_retrieval --backend pinecone
+    python -m benchmarks.bench_retrieval --compare benchmarks/results/retrieval_base.json benchmarks/results/retrieval_latest.json
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from langchain.schema import Document
+
+from benchmarks.fakes import build_offline_chatbot, load_fixture_corpus
+from benchmarks.run_benchmark import RESULTS_DIR, git_commit, summarize
+from context_compactor import compact_documents
+from retrieval_selector import TokenCounter
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "retrieval.jsonl")
+DEFAULT_CONFIGS = ["hybrid:8", "hybrid:4", "vector:8", "lexical:8"]
+CUTOFFS = (1, 3, 5)
+MODES = ("hybrid", "vector", "lexical")
+
+
+# ============================================================
+# golden 세트 / 채점
+# ============================================================
+def load_golden(path=GOLDEN_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def normalize(text):
+    return re.sub(r"\s+", "", text or "")
+
+
+def is_relevant(doc, expected):
+    if "text" in expected:
+        return normalize(expected["text"]) in normalize(doc.page_content)
+    return (doc.metadata.get("source") == expected.get("source")
+            and int(doc.metadata.get("seq_num", 0)) == int(expected["seq_num"]))
+
+
+def score(docs, expected, cutoffs=CUTOFFS):
+    """
+    docs: 검색 결과 (순서대로), expected: 정답 목록
+    -> recall@n (상위 n개 안에서 찾은 정답 비율), recall (전체 결과 기준), rr (첫 정답 순위의 역수)
+    """
+    ranks = []      # 정답별로 처음 나온 순위 (없으면 None)
+    for exp in expected:
+        ranks.append(next((i + 1 for i, doc in enumerate(docs) if is_relevant(doc, exp)), None))
+    found = [r for r in ranks if r is not None]
+
+    result = {f"recall@{n}": sum(r <= n for r in found) / len(expected) for n in cutoffs}
+    result["recall"] = len(found) / len(expected)
+    result["rr"] = 1 / min(found) if found else 0.0
+    return result
+
+
+# ============================================================
+# 실행
+# ============================================================
+def parse_config(text):
+    # "hybrid:8" -> 검색 방식, k
+    mode, _, k = text.partition(":")
+    if mode not in MODES:
+        raise SystemExit(f"검색 방식은 {', '.join(MODES)} 중 하나: {text}")
+    return {"name": text, "mode": mode, "k": int(k or 8)}
+
+
+def load_corpus(args):
+    # 로컬 색인용 청크: 키워드 색인 파일(create_db.py 결과, 청크 전체 사본) 또는 고정 코퍼스
+    if args.corpus:
+        from vector_db.lexical_index import LexicalIndex
+        from vector_db.department_registry import load_registry
+        index, registry = LexicalIndex.load(args.corpus), load_registry()
+        # scope 가 없는 예전 색인 파일은 학과 목록으로 채움
+        return [Document(page_content=d["page_content"],
+                         metadata=dict(d["metadata"], scope=d["metadata"].get("scope") or registry.scope(d["metadata"])))
+                for d in index.docs]
+    return load_fixture_corpus(args.chunk_size, args.chunk_overlap)
+
+
+def build_bot(args):
+    if args.backend == "pinecone":
+        from backend import StreamlitRAGChatbot
+        return StreamlitRAGChatbot()
+
+    embeddings = None
+    if args.embeddings == "model":
+        from vector_db.onnx_embeddings import load_embeddings
+        embeddings = load_embeddings()
+    return build_offline_chatbot(corpus=load_corpus(args), embeddings=embeddings)
+
+
+@contextmanager
+def retrieval_mode(bot, mode):
+    # vector: 키워드 검색 끔, lexical: Vector 검색 결과 없음 (hybrid 는 그대로)
+    lexical_index = bot.lexical_index
+    if mode == "vector":
+        bot.lexical_index = None
+    if mode == "lexical":
+        bot.search_by_vector = lambda *args: []
+    try:
+        yield
+    finally:
+        bot.lexical_index = lexical_index
+        bot.__dict__.pop("search_by_vector", None)
+
+
+def run_config(bot, config, golden, counter):
+    scores, latencies, docs_count, tokens, misses = [], [], [], [], []
+    with retrieval_mode(bot, config["mode"]):
+        first = golden[0]["profile"]
+        bot._get_vector_context(first["year"], first["department"], golden[0]["question"], config["k"])   # 워밍업
+
+        for item in golden:
+            profile = item["profile"]
+            # 공유 캐시를 거치지 않고 매번 실제 검색
+            start = time.perf_counter()
+            docs = bot._get_vector_context(profile["year"], profile["department"], item["question"],
+                                           config["k"], item.get("years"))
+            latencies.append(time.perf_counter() - start)
+
+            s = score(docs, item["expected"])
+            scores.append(s)
+            docs_count.append(len(docs))
+            tokens.append(sum(counter.count(p["text"]) for p in compact_documents(docs)))
+            if s["recall"] < 1:
+                misses.append(item["id"])
+
+    mean = lambda values: round(sum(values) / len(values), 3) if values else 0.0
+    result = {f"recall@{n}": mean([s[f"recall@{n}"] for s in scores]) for n in CUTOFFS}
+    result.update({
+        "recall": mean([s["recall"] for s in scores]),
+        "mrr": mean([s["rr"] for s in scores]),
+        "docs": mean(docs_count),
+        "tokens": mean(tokens),
+        "latency": summarize(latencies),
+        "misses": misses,
+    })
+    return result
+
+
+def run(args):
+    golden = load_golden(args.golden)
+    bot = build_bot(args)
+    counter = TokenCounter.load()
+    try:
+        configs = {}
+        for text in args.configs:
+            config = parse_config(text)
+            configs[config["name"]] = run_config(bot, config, golden, counter)
+    finally:
+        bot.close()
+
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "questions": len(golden),
+        "configs": configs,
+    }
+
+
+# ============================================================
+# 출력 / 비교
+# ============================================================
+COLUMNS = [f"recall@{n}" for n in CUTOFFS] + ["recall", "mrr", "docs", "tokens"]
+
+
+def print_table(result):
+    print(f"{'config':<14} " + " ".join(f"{c:>9}" for c in COLUMNS) + f" {'p50(ms)':>9} {'p95(ms)':>9}")
+    for name, r in result["configs"].items():
+        print(f"{name:<14} " + " ".join(f"{r[c]:>9}" for c in COLUMNS)
+              + f" {r['latency']['p50_ms']:>9} {r['latency']['p95_ms']:>9}")
+
+
+def compare(base_path, new_path):
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"base: {base.get('commit')}  new: {new.get('commit')}  (질문 {new.get('questions')}개)")
+    print(f"{'config/metric':<24} {'base':>10} {'new':>10} {'변화':>10}")
+    for name, n in new["configs"].items():
+        b = base["configs"].get(name)
+        if not b:
+            continue
+        rows = [(c, b[c], n[c]) for c in COLUMNS]
+        rows += [(f"{q}(ms)", b["latency"][f"{q}_ms"], n["latency"][f"{q}_ms"]) for q in ("p50", "p95")]
+        for metric, bv, nv in rows:
+            print(f"{name + '/' + metric:<24} {bv:>10} {nv:>10} {nv - bv:>+10.3f}")
+
+        fixed = sorted(set(b["misses"]) - set(n["misses"]))
+        broken = sorted(set(n["misses"]) - set(b["misses"]))
+        if fixed or broken:
+            print(f"  새로 찾음: {', '.join(fixed) or '-'} / 새로 놓침: {', '.join(broken) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 품질(recall@n, MRR) / 지연시간 벤치마크")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="golden 질문 세트 (JSONL)")
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, help="검색 방식:k (hybrid / vector / lexical)")
+    parser.add_argument("--backend", choices=["local", "pinecone"], default="local")
+    parser.add_argument("--corpus", help="로컬 색인에 사용할 키워드 색인 파일 (없으면 KG/output 표 고정 코퍼스)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="고정 코퍼스 청크 크기")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="고정 코퍼스 청크 겹침")
+    parser.add_argument("--embeddings", choices=["hash", "model"], default="hash",
+                        help="로컬 색인 임베딩 (model: EMBEDDING_BACKEND 설정의 실제 모델)")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "retrieval_latest.json"))
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="두 결과 파일 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = run(args)
+    print_table(result)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"{args.output} 저장됨")
+
+
+if __name__ == "__main__":
+    main()
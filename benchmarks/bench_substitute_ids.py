@@ -0,0 +1,127 @@
+"""
+대체 과목 id 정리(KG/id_resolver.py) 규모별 소요시간 측정 (LLM 없이 가짜 표 결과 사용)
+
+- 이전 방식: 임시 id가 학수번호로 승격될 때마다 모든 관계를 다시 훑음 (관계 수 x 승격 수)
+- 현재 방식: 같은 과목 쌍만 모은 뒤 union-find 로 마지막에 한 번 정리
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_substitute_ids --sizes 1000,4000,16000,64000
+"""
+
+import argparse
+import random
+import time
+
+from KG.id_resolver import is_real_id, resolve_substitutes
+
+
+def make_chunks(n_rows, rows_per_chunk=50, promote_ratio=0.3, seed=0):
+    """
+    가짜 create_substitutes LLM 결과
+    - 각 관계: 기존 과목(학수번호) -> 구 과목(처음엔 과목명을 임시 id로 사용)
+    - 일부 구 과목은 나중 표에서 학수번호와 함께 다시 나옴 (id 승격)
+    """
+    rng = random.Random(seed)
+    n_subjects = max(10, n_rows // 4)
+    subjects = [{"id": f"CSE{i:05d}", "name": f"과목{i}", "credits": 3} for i in range(n_subjects)]
+
+    chunks = []
+    promoted = []
+    for start in range(0, n_rows, rows_per_chunk):
+        nodes, rels, pending = [], [], []
+        for i in range(start, min(start + rows_per_chunk, n_rows)):
+            old_name = f"구과목{i}"
+            nodes.append({"id": old_name, "name": old_name, "credits": 3})
+            rels.append({"source_id": rng.choice(subjects)["id"], "target_id": old_name,
+                         "department": "컴퓨터공학과", "year": 2025, "note": "교과목 변경/대체"})
+            if rng.random() < promote_ratio:
+                pending.append(i)
+
+        # 앞 표에서 나온 구 과목의 학수번호가 이번 표에서 나옴
+        while promoted and rng.random() < 0.9:
+            i = promoted.pop()
+            nodes.append({"id": f"OLD{i:05d}", "name": f"구과목{i}", "credits": 3})
+        promoted += pending
+        chunks.append((nodes, rels))
+    return chunks, subjects
+
+
+def legacy_resolve(chunk_results, subject_nodes):
+    # 이전 create_substitutes.py 의 id 승격 방식 (비교용)
+    valid_ids = set(n['id'] for n in subject_nodes)
+    id_name_map = {n['id']: n['name'] for n in subject_nodes}
+    all_relationships = []
+    all_new_nodes = {}
+
+    for raw_nodes, raw_rels in chunk_results:
+        for node in raw_nodes:
+            new_id, new_name = node.get('id'), node.get('name')
+            if new_id and (new_id not in valid_ids):
+                id_name_map[new_id] = new_name
+                if is_real_id(new_id) and (new_name in all_new_nodes):
+                    old_dummy_id = new_name
+                    del all_new_nodes[old_dummy_id]
+                    all_new_nodes[new_id] = dict(node)
+                    id_name_map.pop(old_dummy_id, None)
+                    for rel in all_relationships:
+                        if rel['source_id'] == old_dummy_id: rel['source_id'] = new_id
+                        if rel['target_id'] == old_dummy_id: rel['target_id'] = new_id
+                elif new_id not in all_new_nodes:
+                    all_new_nodes[new_id] = dict(node)
+        for rel in raw_rels:
+            if rel.get('source_id') and rel.get('target_id') and rel['source_id'] != rel['target_id']:
+                all_relationships.append(dict(rel))
+
+    unique = {(r['source_id'], r['target_id'], r['department'], r.get('year')): r for r in all_relationships}
+    return list(unique.values()), list(all_new_nodes.values())
+
+
+def check_ambiguous_names():
+    # 기존 과목 여러 개가 같은 이름을 쓰면 과목명만 있는 관계를 그중 하나로 바꾸지 않아야 함
+    subjects = [
+        {"id": "CSE406", "name": "캡스톤디자인", "credits": 3},
+        {"id": "AI4001", "name": "캡스톤디자인", "credits": 3},
+        {"id": "SWCON301", "name": "게임프로그래밍", "credits": 3},
+    ]
+    chunks = [([], [
+        {"source_id": "SWCON301", "target_id": "캡스톤디자인", "department": "소프트웨어융합학과", "year": 2024},
+        {"source_id": "CSE406", "target_id": "게임프로그래밍", "department": "컴퓨터공학과", "year": 2024},
+    ])]
+    rels, _ = resolve_substitutes(chunks, subjects)
+    pairs = {(r["source_id"], r["target_id"]) for r in rels}
+    assert ("SWCON301", "캡스톤디자인") in pairs, pairs     # 이름이 겹치는 과목: 그대로 둠
+    assert ("CSE406", "SWCON301") in pairs, pairs          # 이름이 하나뿐인 과목: 기존 id 로 연결
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대체 과목 id 정리 규모별 측정")
+    parser.add_argument("--sizes", default="1000,4000,16000,64000", help="관계(표 행) 수")
+    parser.add_argument("--legacy-max", type=int, default=16000, help="이전 방식은 이 크기까지만 측정")
+    args = parser.parse_args()
+
+    check_ambiguous_names()
+    print("중복 과목명 검사: 통과")
+    print(f"{'관계 수':>10} {'현재(ms)':>10} {'행당(us)':>10} {'이전(ms)':>10} {'결과 동일':>10}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        chunks, subjects = make_chunks(size)
+        new_time, (rels, nodes) = timed(resolve_substitutes, chunks, subjects)
+
+        legacy_ms, same = "-", "-"
+        if size <= args.legacy_max:
+            legacy_time, (old_rels, old_nodes) = timed(legacy_resolve, chunks, subjects)
+            legacy_ms = f"{legacy_time * 1000:.1f}"
+            same = ({(r['source_id'], r['target_id']) for r in rels}
+                    == {(r['source_id'], r['target_id']) for r in old_rels}
+                    and {n['id'] for n in nodes} == {n['id'] for n in old_nodes})
+
+        print(f"{size:>10} {new_time * 1000:>10.1f} {new_time / size * 1e6:>10.2f} {legacy_ms:>10} {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+오프라인 벤치마크용 가짜 구성요소 (API 키 / 네트워크 없이 실행)
+
+- ScriptedChatModel: 지연시간을 설정할 수 있는 답변 생성 LLM (langchain 호환)
+- ScriptedRouter: 질문 분류 LLM 대체
+- InMemoryVectorStore: 고정 코퍼스를 해시 임베딩으로 검색 (Pinecone 필터 문법 / 연도별 namespace 지원)
+- FakeNeo4jDriver: KG/output/*.json 으로 만든 그래프(kg_snapshot.KGSnapshot)로 Neo4j 대체
+
+지연시간은 seed가 고정된 난수로 만들기 때문에 같은 설정이면 같은 결과가 나옴
+"""
+
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain.schema import Document
+
+from kg_snapshot import KGSnapshot
+from vector_db.department_registry import load_registry, namespace_for
+from llm_scheduler import CLASSES, LLMScheduler
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KG_OUTPUT_DIR = os.path.join(ROOT_DIR, "KG", "output")
+
+# 가짜 LLM 은 quota 가 없으므로 분당 요청 수 제한 없이 (동시 호출 수 / 우선순위는 그대로)
+UNLIMITED_CLASSES = {name: dict(cfg, rpm=0) for name, cfg in CLASSES.items()}
+
+
+# ============================================================
+# 지연시간 생성
+# ============================================================
+class Latency:
+    """
+    평균(mean) 주변으로 로그정규분포를 따르는 지연시간(초)
+    jitter=0 이면 항상 mean
+    tail_prob 확률로 tail_factor 배 느린 요청 (가끔 멈추는 API 호출 흉내)
+    """
+
+    def __init__(self, mean=0.0, jitter=0.3, seed=0, tail_prob=0.0, tail_factor=1.0):
+        self.mean = mean
+        self.jitter = jitter
+        self.tail_prob = tail_prob
+        self.tail_factor = tail_factor
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self):
+        if self.mean <= 0:
+            return 0.0
+        with self.lock:
+            z = self.rng.gauss(0, self.jitter) if self.jitter > 0 else 0.0
+            slow = self.tail_prob > 0 and self.rng.random() < self.tail_prob
+        delay = self.mean * math.exp(z - self.jitter ** 2 / 2) if self.jitter > 0 else self.mean
+        return delay * self.tail_factor if slow else delay
+
+    def wait(self):
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+# ============================================================
+# LLM
+# ============================================================
+class ScriptedChatModel(BaseChatModel):
+    """정해진 답변을 반환하는 답변 생성용 Chat 모델"""
+
+    answer: str = "전공필수는 42학점을 이수해야 합니다.\n[[REF: 1, 2]]"
+    latency: Any = None
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def respond(self, messages):
+        if self.latency:
+            self.latency.wait()
+        return self.answer
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        answer = self.respond(messages)
+        # 토큰 수는 글자 수로 대략 계산 (한글 1글자 ≒ 1토큰)
+        prompt_tokens = sum(len(str(m.content)) for m in messages)
+        message = AIMessage(content=answer, response_metadata={"model_name": "scripted"}, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": len(answer),
+            "total_tokens": prompt_tokens + len(answer),
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ScriptedRouter:
+    """질문 분류 LLM 대체: 비교/변경 키워드나 여러 연도가 있으면 KG, 아니면 Vector (연도는 질문에서 추출)"""
+
+    KG_PATTERN = re.compile(r"비교|차이|변경 시|바꾸|20\d\d.*20\d\d")
+
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+
+    def __call__(self, system_prompt, user_query):
+        self.latency.wait()
+        tool = "KG" if self.KG_PATTERN.search(user_query) else "Vector"
+        years = [int(y) for y in re.findall(r"20\d\d", user_query)]
+        return json.dumps({"final_query": user_query, "tool": tool, "years": years}, ensure_ascii=False)
+
+
+# ============================================================
+# Vector DB
+# ============================================================
+class HashEmbeddings:
+    """한글 bigram / 영문 토큰을 해시해서 만든 고정 차원 임베딩 (결정적)"""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        compact = re.sub(r"\s+", "", text)
+        for i in range(len(compact) - 1):
+            vec[zlib.crc32(compact[i:i + 2].encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+
+def matches_filter(metadata, flt):
+    # Pinecone 메타데이터 필터 문법 일부($and, $or, $eq, $in) 구현
+    # 값이 목록(scope 등)이면 원소 중 하나라도 맞으면 통과 (Pinecone 과 동일)
+    if not flt:
+        return True
+    for key, cond in flt.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = metadata.get(key)
+            values = value if isinstance(value, list) else [value]
+            if "$eq" in cond and cond["$eq"] not in values:
+                return False
+            if "$in" in cond and not any(v in cond["$in"] for v in values):
+                return False
+        elif metadata.get(key) != cond:
+            return False
+    return True
+
+
+class InMemoryRetriever:
+    def __init__(self, store, search_kwargs):
+        self.store = store
+        self.search_kwargs = search_kwargs or {}
+
+    def invoke(self, query):
+        return self.store.similarity_search(query, **self.search_kwargs)
+
+
+class InMemoryVectorStore:
+    """
+    PineconeVectorStore 대체 (as_retriever / similarity_search / index.query)
+    namespace_mode: 청크를 나눌 namespace (department_registry.namespace_for, year / none)
+    index.query 에 namespace 를 주면 그 namespace 의 청크만, 없으면 전체에서 검색
+    """
+
+    def __init__(self, documents, embeddings=None, latency=None, namespace_mode="year"):
+        self.embeddings = embeddings or HashEmbeddings()
+        self.latency = latency or Latency()
+        self.documents = list(documents)
+        self.matrix = np.array(self.embeddings.embed_documents([d.page_content for d in self.documents]),
+                               dtype=np.float32)
+        self.namespaces = {}
+        for i, d in enumerate(self.documents):
+            namespace = namespace_for(d.metadata, namespace_mode) if d.metadata.get("year") is not None else ""
+            self.namespaces.setdefault(namespace, []).append(i)
+        self.scanned = 0    # 필터를 검사한 청크 수 (검색 범위 비교용)
+
+    def as_retriever(self, search_kwargs=None):
+        return InMemoryRetriever(self, search_kwargs)
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        return self.similarity_search_by_vector_with_score(self.embeddings.embed_query(query), k=k, filter=filter)
+
+    def _top(self, embedding, k, filter, namespace=None):
+        self.latency.wait()     # 네트워크 왕복 시간 대체
+        query_vec = np.array(embedding, dtype=np.float32)
+
+        scope = self.namespaces.get(namespace, []) if namespace is not None else range(len(self.documents))
+        self.scanned += len(scope)
+        rows = [i for i in scope if matches_filter(self.documents[i].metadata, filter)]
+        if not rows:
+            return []
+        scores = self.matrix[rows] @ query_vec
+        return [(rows[i], float(scores[i])) for i in np.argsort(-scores)[:k]]
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        return [(self.documents[row], score) for row, score in self._top(embedding, k, filter)]
+
+    @property
+    def index(self):
+        # Pinecone Index.query 형식도 지원 (점수 + 벡터)
+        return self
+
+    def query(self, vector, top_k=10, filter=None, include_values=False, include_metadata=True, namespace=None):
+        matches = []
+        for row, score in self._top(vector, top_k, filter, namespace):
+            doc = self.documents[row]
+            matches.append({
+                "id": str(row),
+                "score": score,
+                "values": self.matrix[row].tolist() if include_values else [],
+                "metadata": dict(doc.metadata, text=doc.page_content) if include_metadata else {},
+            })
+        return {"matches": matches}
+
+    def similarity_search(self, query, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+
+def split_text(text, chunk_size=1000, chunk_overlap=200):
+    # RecursiveCharacterTextSplitter 와 같은 크기/겹침의 단순 분할
+    chunks = []
+    step = chunk_size - chunk_overlap
+    for start in range(0, max(len(text) - chunk_overlap, 1), step):
+        chunks.append(text[start:start + chunk_size])
+    return chunks
+
+
+def load_fixture_corpus(chunk_size=1000, chunk_overlap=200, registry=None):
+    """
+    KG/output 의 표 추출 결과(교육과정 PDF 원문)를 청크로 나눈 고정 코퍼스
+    metadata: source, year, department, scope, seq_num (create_db.py 와 동일한 형식)
+    """
+    registry = registry or load_registry()
+    docs = []
+    for name in ("requirement_tables.json", "subject_tables.json", "substitutes_tables.json"):
+        with open(os.path.join(KG_OUTPUT_DIR, name), "r", encoding="utf-8") as f:
+            tables = json.load(f)
+
+        for table in tables:
+            meta = table["metadata"]
+            source = f"소프트웨어융합대학_교육과정_{meta.get('year')}.pdf"
+            for chunk in split_text(table["table_data_as_string"], chunk_size, chunk_overlap):
+                docs.append(Document(
+                    page_content=chunk,
+                    metadata={
+                        "source": source,
+                        "year": meta.get("year"),
+                        "department": meta.get("department"),
+                        "college": "소프트웨어융합대학",
+                        "seq_num": len(docs) + 1,
+                    },
+                ))
+                docs[-1].metadata["scope"] = registry.scope(docs[-1].metadata)
+    return docs
+
+
+# ============================================================
+# Knowledge Graph
+# ============================================================
+class FakeResult(list):
+    def single(self):
+        return self[0] if self else None
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        params = {**(parameters or {}), **kwargs}
+        self.driver.latency.wait()
+        return FakeResult(self.driver.dispatch(query, params))
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        return FakeTransaction(self.driver).run(query, parameters, **kwargs)
+
+    def execute_read(self, work, *args, **kwargs):
+        return work(FakeTransaction(self.driver), *args, **kwargs)
+
+
+class FakeNeo4jDriver:
+    """kg_access.QUERIES 의 Cypher 쿼리를 KGSnapshot 으로 응답"""
+
+    def __init__(self, graph=None, latency=None):
+        from kg_access import QUERIES
+
+        self.graph = graph or KGSnapshot()
+        self.latency = latency or Latency()
+        self.names = {query: name for name, query in QUERIES.items()}
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+    def close(self):
+        pass
+
+    def dispatch(self, query, params):
+        name = self.names.get(query)
+        if name is None:
+            raise ValueError(f"지원하지 않는 쿼리: {query[:80]}")
+        return self.graph.rows(name, params)
+
+
+# ============================================================
+# 오프라인 챗봇
+# ============================================================
+def build_offline_chatbot(llm_latency=0.0, router_latency=0.0, vector_latency=0.0, graph_latency=0.0,
+                          jitter=0.3, seed=0, tail_prob=0.0, tail_factor=1.0, corpus=None, embeddings=None,
+                          llm=None, router=None, registry=None):
+    """
+    가짜 구성요소를 주입한 StreamlitRAGChatbot
+    tail_prob / tail_factor: LLM(답변 생성, 질문 분류)에 섞을 느린 요청 비율 / 지연 배수
+    corpus / embeddings: 검색 대상 청크 / 임베딩 모델 (없으면 고정 코퍼스 + HashEmbeddings)
+    llm / router: 답변 생성 모델 / 질문 분류 함수 (없으면 ScriptedChatModel / ScriptedRouter)
+    registry: 학과 / 연도 목록 (없으면 department_registry.load_registry())
+    """
+    from backend import StreamlitRAGChatbot
+    from vector_db.lexical_index import LexicalIndex
+
+    corpus = corpus if corpus is not None else load_fixture_corpus(registry=registry)
+    lexical_index = LexicalIndex()
+    lexical_index.add_documents(corpus)
+
+    bot = StreamlitRAGChatbot(
+        llm=llm or ScriptedChatModel(latency=Latency(llm_latency, jitter, seed, tail_prob, tail_factor)),
+        router=router or ScriptedRouter(Latency(router_latency, jitter, seed + 1, tail_prob, tail_factor)),
+        neo4j_driver=FakeNeo4jDriver(latency=Latency(graph_latency, jitter, seed + 2)),
+        vectorstore=InMemoryVectorStore(corpus, embeddings, latency=Latency(vector_latency, jitter, seed + 3)),
+        lexical_index=lexical_index,
+        llm_scheduler=LLMScheduler(classes=UNLIMITED_CLASSES),
+        registry=registry,
+    )
+    bot.llm_scheduler.metrics = bot.metrics
+    bot.answer_store = None     # 미리 생성된 답변 대신 전체 파이프라인을 측정
+    return bot
@@ -0,0 +1,146 @@
+"""
+HTTP API 서버(server.py) 부하 테스트
+
+동시 사용자 수를 늘려가며 처리량(req/s)과 p95 지연시간을 측정하고,
+p95 목표를 만족하는 최대 처리량을 보고
+
+실행 (프로젝트 루트에서):
+    # 가짜 LLM/DB로 서버를 함께 띄워서 측정
+    python -m benchmarks.load_test --offline --target-p95-ms 3000
+
+    # 이미 실행 중인 서버 측정
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --concurrency 1,4,16,64
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+import aiohttp
+
+from benchmarks.run_benchmark import PROFILES, VECTOR_QUESTIONS, KG_QUESTIONS, percentile
+
+
+def build_payloads(graduation_ratio):
+    # 챗봇 질문과 졸업 자가진단을 섞은 요청 목록
+    payloads = []
+    for (year, dept, major_type), question in itertools.product(PROFILES, VECTOR_QUESTIONS + KG_QUESTIONS):
+        payloads.append(("/chat", {"admission_year": year, "department": dept,
+                                   "query": question, "major_type": major_type}))
+
+    n_graduation = int(len(payloads) * graduation_ratio)
+    for i in range(n_graduation):
+        year, dept, major_type = PROFILES[i % len(PROFILES)]
+        payloads.append(("/graduation", {"year": year, "department": dept, "major_type": major_type,
+                                         "taken": ["자료구조", "운영체제", "컴퓨터구조", "객체지향프로그래밍"]}))
+    return payloads
+
+
+async def run_level(session, url, payloads, concurrency, duration):
+    # concurrency 명의 사용자가 duration 초 동안 쉬지 않고 요청
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path, body = payloads[next(counter) % len(payloads)]
+            start = time.perf_counter()
+            try:
+                async with session.post(url + path, json=body) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def start_offline_server(port, workers, queue):
+    from aiohttp import web
+    from benchmarks.fakes import build_offline_chatbot
+    from server import create_app
+
+    bot = build_offline_chatbot(llm_latency=0.8, router_latency=0.3, vector_latency=0.05, graph_latency=0.02)
+    runner = web.AppRunner(create_app(bot, workers=workers, queue_size=queue))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def main_async(args):
+    runner = None
+    url = args.url
+    if args.offline:
+        runner = await start_offline_server(args.port, args.workers, args.queue)
+        url = f"http://127.0.0.1:{args.port}"
+
+    payloads = build_payloads(args.graduation_ratio)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results = []
+
+    connector = aiohttp.TCPConnector(limit=max(levels))
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        print(f"{'동시 사용자':>10} {'요청':>8} {'오류':>6} {'req/s':>8} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10}")
+        for level in levels:
+            r = await run_level(session, url, payloads, level, args.duration)
+            results.append(r)
+            print(f"{r['concurrency']:>10} {r['requests']:>8} {r['errors']:>6} {r['rps']:>8} "
+                  f"{r['p50_ms']:>10} {r['p95_ms']:>10} {r['p99_ms']:>10}")
+
+    if runner:
+        await runner.cleanup()
+
+    ok = [r for r in results if r["p95_ms"] <= args.target_p95_ms and r["requests"]]
+    best = max(ok, key=lambda r: r["rps"]) if ok else None
+    if best:
+        print(f"\np95 <= {args.target_p95_ms}ms 에서 최대 처리량: {best['rps']} req/s "
+              f"(동시 사용자 {best['concurrency']}명, p95 {best['p95_ms']}ms)")
+    else:
+        print(f"\np95 <= {args.target_p95_ms}ms 를 만족하는 구간이 없습니다.")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"target_p95_ms": args.target_p95_ms, "best": best, "levels": results,
+                       "config": vars(args)}, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="챗봇 HTTP API 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--offline", action="store_true", help="가짜 LLM/DB 서버를 같이 실행")
+    parser.add_argument("--port", type=int, default=8765, help="--offline 서버 포트")
+    parser.add_argument("--workers", type=int, default=32, help="--offline 서버 스레드 수")
+    parser.add_argument("--queue", type=int, default=256, help="--offline 서버 대기열 크기")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32")
+    parser.add_argument("--duration", type=float, default=10.0, help="단계별 측정 시간(초)")
+    parser.add_argument("--target-p95-ms", type=float, default=3000.0)
+    parser.add_argument("--graduation-ratio", type=float, default=0.2, help="졸업 자가진단 요청 비율")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
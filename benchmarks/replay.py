@@ -0,0 +1,254 @@
+"""
+실제 요청 기록(trace_recorder.py, CHATBOT_CAPTURE_DIR) 재생
+
+기록된 요청을 현재 코드로 같은 도착 간격(또는 --speed 배 빠르게) 다시 실행하고 지연시간 분포 비교
+- 외부 응답
+  recorded: 기록된 질문 분류 / 답변 LLM 응답을 기록 당시 걸린 시간만큼 기다렸다가 그대로 반환 (결정적)
+  fake: 가짜 LLM (--llm-latency, --router-latency)
+  Vector DB / KG 는 가짜 구성요소(benchmarks/fakes.py), --backend live 이면 .env 의 Pinecone / Neo4j
+- 도착 간격: 기록 시각 차이 / --speed (0 이면 간격 없이, 동시에 --workers 개까지)
+  지연시간은 도착 예정 시각부터 측정 (worker 가 부족해서 기다린 시간 포함)
+- 결과: 요청 종류 / 경로(route)별 p50/p95/p99 + 단계별, 기록 당시(운영) 지연시간과 함께 JSON 저장
+  미리 생성된 답변 / 공유 캐시는 끄고 전체 파이프라인 실행
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.replay captures/ --output benchmarks/results/replay_base.json
+    python -m benchmarks.replay captures/capture-20250301-*.jsonl --speed 10 --responses fake
+    python -m benchmarks.replay --compare benchmarks/results/replay_base.json benchmarks/results/replay_latest.json
+"""
+
+import argparse
+import contextvars
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import Latency, ScriptedChatModel, ScriptedRouter, build_offline_chatbot
+from benchmarks.run_benchmark import RESULTS_DIR, git_commit, summarize
+
+_current_record = contextvars.ContextVar("replay_record", default=None)
+
+
+# ============================================================
+# 기록 읽기
+# ============================================================
+def load_records(paths, limit=None):
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path]
+
+    records = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            records += [json.loads(line) for line in f if line.strip()]
+    records = sorted((r for r in records if r.get("ts") is not None), key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+
+def stage_seconds(record, name):
+    return sum(s["duration_ms"] for s in record.get("stages", []) if s["name"] == name) / 1000
+
+
+# ============================================================
+# 기록된 LLM 응답
+# ============================================================
+class RecordedRouter:
+    """재생 중인 요청의 질문 분류 응답 (기록이 없으면 ScriptedRouter)"""
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.fallback = ScriptedRouter()
+
+    def __call__(self, system_prompt, user_query):
+        record = _current_record.get()
+        response = record and record.get("responses", {}).get("router")
+        if response is None:
+            return self.fallback(system_prompt, user_query)
+        time.sleep(stage_seconds(record, "route") * self.scale)
+        return response
+
+
+class RecordedChatModel(ScriptedChatModel):
+    """재생 중인 요청의 답변 (기록이 없으면 기본 답변)"""
+
+    scale: float = 1.0
+
+    def respond(self, messages):
+        record = _current_record.get()
+        answer = record and record.get("responses", {}).get("answer")
+        if answer is None:
+            return super().respond(messages)
+        time.sleep(stage_seconds(record, "generate") * self.scale)
+        return answer
+
+
+def build_bot(args):
+    if args.responses == "recorded":
+        llm, router = RecordedChatModel(scale=args.llm_scale), RecordedRouter(args.llm_scale)
+    else:
+        llm = ScriptedChatModel(latency=Latency(args.llm_latency, seed=args.seed))
+        router = ScriptedRouter(Latency(args.router_latency, seed=args.seed + 1))
+
+    if args.backend == "live":
+        from backend import StreamlitRAGChatbot
+        bot = StreamlitRAGChatbot(llm=llm, router=router)
+    else:
+        bot = build_offline_chatbot(llm=llm, router=router, seed=args.seed)
+    bot.answer_store = None
+    bot.shared_cache = None
+    return bot
+
+
+# ============================================================
+# 재생
+# ============================================================
+def execute(bot, record):
+    inputs = record["inputs"]
+    if record["kind"] == "graduation":
+        bot.check_graduation_status(inputs["year"], inputs["department"], inputs["major_type"], inputs["taken"])
+        return
+    args = (inputs["admission_year"], inputs["department"], inputs["query"], inputs.get("history") or None,
+            inputs.get("major_type", "단일전공"))
+    if inputs.get("stream"):
+        for _ in bot.chat_stream(*args):
+            pass
+    else:
+        bot.chat(*args)
+
+
+def replay(bot, records, speed, workers):
+    def one(record, arrival):
+        token = _current_record.set(record)
+        try:
+            try:
+                execute(bot, record)
+                status = "ok"
+            except Exception as e:
+                status = type(e).__name__
+            return record, time.perf_counter() - arrival, status, bot.metrics.last_trace()
+        finally:
+            _current_record.reset(token)
+
+    start = time.perf_counter()
+    first_ts = records[0]["ts"]
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in records:
+            arrival = start + (record["ts"] - first_ts) / speed if speed > 0 else time.perf_counter()
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(one, record, arrival))
+    return [f.result() for f in futures], time.perf_counter() - start
+
+
+def group_names(kind, route):
+    return [kind, f"{kind}/{route}"] if route else [kind]
+
+
+def run(args):
+    records = load_records(args.paths, args.limit)
+    if not records:
+        raise SystemExit("재생할 기록이 없음")
+    bot = build_bot(args)
+    try:
+        results, wall = replay(bot, records, args.speed, args.workers)
+    finally:
+        bot.close()
+
+    replayed, recorded, stages = defaultdict(list), defaultdict(list), defaultdict(list)
+    errors = defaultdict(int)
+    for record, seconds, status, trace in results:
+        route = (trace or {}).get("attrs", {}).get("route")
+        for name in group_names(record["kind"], route):
+            replayed[name].append(seconds)
+        for name in group_names(record["kind"], record.get("route")):
+            recorded[name].append(record["total_ms"] / 1000)
+        for span in (trace or {}).get("spans", []):
+            stages[f"{record['kind']}/{span['name']}"].append(span["duration_ms"] / 1000)
+        if status != "ok":
+            errors[status] += 1
+
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "requests": len(records),
+        "span_seconds": round(records[-1]["ts"] - records[0]["ts"], 3),
+        "wall_seconds": round(wall, 3),
+        "errors": dict(errors),
+        "replayed": {name: summarize(v) for name, v in sorted(replayed.items())},
+        "recorded": {name: summarize(v) for name, v in sorted(recorded.items())},
+        "stages": {name: summarize(v) for name, v in sorted(stages.items())},
+    }
+
+
+# ============================================================
+# 출력 / 비교
+# ============================================================
+def print_table(result):
+    print(f"{result['requests']}건 (기록 {result['span_seconds']}초 -> 재생 {result['wall_seconds']}초), "
+          f"오류 {sum(result['errors'].values())}건 {result['errors'] or ''}")
+    print(f"{'kind/route':<24} {'건수':>6} {'기록 p50':>9} {'기록 p95':>9} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+    for name, r in result["replayed"].items():
+        rec = result["recorded"].get(name, {})
+        print(f"{name:<24} {r['count']:>6} {rec.get('p50_ms', '-'):>9} {rec.get('p95_ms', '-'):>9} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def compare(base_path, new_path):
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"base: {base.get('commit')}  new: {new.get('commit')}  ({new.get('requests')}건, "
+          f"speed {new['config'].get('speed')}, responses {new['config'].get('responses')})")
+    print(f"{'kind/route/stage':<36} {'p50 base':>10} {'p50 new':>10} {'p95 base':>10} {'p95 new':>10} "
+          f"{'p99 base':>10} {'p99 new':>10} {'변화(p95)':>10}")
+    rows = [(name, base["replayed"].get(name), v) for name, v in new["replayed"].items()]
+    rows += [(name, base["stages"].get(name), v) for name, v in new["stages"].items()]
+    for name, b, n in rows:
+        if not b:
+            continue
+        change = ((n["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100) if b["p95_ms"] else 0.0
+        print(f"{name:<36} {b['p50_ms']:>10} {n['p50_ms']:>10} {b['p95_ms']:>10} {n['p95_ms']:>10} "
+              f"{b['p99_ms']:>10} {n['p99_ms']:>10} {change:>+9.1f}%")
+    print(f"{'errors':<36} {sum(base['errors'].values()):>10} {sum(new['errors'].values()):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="요청 기록 재생 (지연시간 분포 비교)")
+    parser.add_argument("paths", nargs="*", help="기록 파일 또는 디렉터리 (CHATBOT_CAPTURE_DIR)")
+    parser.add_argument("--speed", type=float, default=1.0, help="도착 간격 배속 (0 이면 간격 없이)")
+    parser.add_argument("--workers", type=int, default=32, help="동시에 처리할 최대 요청 수")
+    parser.add_argument("--limit", type=int, help="앞에서부터 이 개수만 재생")
+    parser.add_argument("--responses", choices=["recorded", "fake"], default="recorded", help="LLM 응답")
+    parser.add_argument("--llm-scale", type=float, default=1.0, help="기록된 LLM 응답 시간 배수 (recorded)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="답변 생성 평균 지연(초, fake)")
+    parser.add_argument("--router-latency", type=float, default=0.0, help="질문 분류 평균 지연(초, fake)")
+    parser.add_argument("--backend", choices=["offline", "live"], default="offline", help="Vector DB / KG")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "replay_latest.json"))
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="두 재생 결과 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if not args.paths:
+        parser.error("기록 파일 또는 디렉터리가 필요합니다.")
+
+    result = run(args)
+    print_table(result)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"{args.output} 저장됨")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+오프라인 End-to-End 지연시간 벤치마크
+
+가짜 LLM / Vector DB / KG (benchmarks/fakes.py) 를 주입한 챗봇으로
+대표 워크로드를 실행하고 단계별 p50/p95/p99, 처리량, 최대 메모리를 JSON으로 저장
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.run_benchmark --output benchmarks/results/base.json
+    python -m benchmarks.run_benchmark --llm-latency 0.8 --router-latency 0.3 --vector-latency 0.05
+    python -m benchmarks.run_benchmark --compare benchmarks/results/base.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.fakes import build_offline_chatbot
+from kg_snapshot import KGSnapshot
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+VECTOR_QUESTIONS = [
+    "졸업하려면 전공필수 몇 학점 들어야 돼?",
+    "CSE103 과목은 몇 학점이야?",
+    "산학필수 학점은 어떻게 채워?",
+    "자료구조 대체 과목이 뭐야?",
+    "SWCON103 디자인적사고는 전공기초야?",
+    "현장실습은 몇 학점으로 인정돼?",
+]
+
+KG_QUESTIONS = [
+    "2020년도 졸업요건과 2023년도 졸업요건의 차이점이 무엇인가요?",
+    "24 교육과정으로 변경 시 어떤 점이 유리한가요?",
+    "2021년과 2025년 전공필수 과목 비교해줘",
+]
+
+PROFILES = [
+    (2020, "컴퓨터공학과", "단일전공"),
+    (2022, "인공지능학과", "다전공"),
+    (2024, "소프트웨어융합학과", "단일전공"),
+]
+
+
+# ============================================================
+# 단계별 시간 측정
+# ============================================================
+class StageTimer:
+    # 챗봇 metrics 의 trace(span 목록)를 받아 단계별로 모음
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def record(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def on_trace(self, trace):
+        for span in trace["spans"]:
+            attrs = span.get("attrs", {})
+            label = attrs.get("filter") or attrs.get("query")
+            stage = f"{span['name']}[{label}]" if label else span["name"]
+            self.record(stage, span["duration_ms"] / 1000)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    low, high = int(pos), min(int(pos) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+# ============================================================
+# 워크로드
+# ============================================================
+def vector_requests(repeat):
+    return [(p, q) for _ in range(repeat) for p in PROFILES for q in VECTOR_QUESTIONS]
+
+
+def kg_requests(repeat):
+    return [(p, q) for _ in range(repeat) for p in PROFILES for q in KG_QUESTIONS]
+
+
+def graduation_requests(graph, repeat, seed=0):
+    # 졸업요건(Requirement) 노드마다, 포함 과목 중 일부를 들었다고 가정
+    rng = random.Random(seed)
+    requests = []
+    for req in sorted(graph.requirements.values(), key=lambda r: r["id"]):
+        names = sorted(graph.subjects[rel["target_id"]]["name"] for rel in graph.includes.get(req["id"], []))
+        for _ in range(repeat):
+            taken = rng.sample(names, k=len(names) // 2) if names else []
+            requests.append(((req["year"], req["department"], req["major_type"]), taken))
+    return requests
+
+
+def run_workload(name, fn, requests, timer, memory_sample=20):
+    timer.samples.clear()
+    totals = []
+
+    wall_start = time.perf_counter()
+    for request in requests:
+        start = time.perf_counter()
+        fn(*request)
+        totals.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    stages = {stage: summarize(values) for stage, values in sorted(timer.samples.items())}
+
+    # tracemalloc은 실행 속도를 크게 늦추므로 지연시간 측정과 분리해서 일부 요청으로만 측정
+    tracemalloc.start()
+    for request in requests[:memory_sample]:
+        fn(*request)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "requests": len(requests),
+        "throughput_rps": round(len(requests) / wall, 3) if wall else 0.0,
+        "peak_memory_mb": round(peak / 1024 / 1024, 3),
+        "total": summarize(totals),
+        "stages": stages,
+    }
+    print(f"[{name}] {len(requests)}건, p50 {result['total']['p50_ms']}ms, "
+          f"p95 {result['total']['p95_ms']}ms, {result['throughput_rps']} req/s")
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    bot = build_offline_chatbot(
+        llm_latency=args.llm_latency, router_latency=args.router_latency,
+        vector_latency=args.vector_latency, graph_latency=args.graph_latency,
+        jitter=args.jitter, seed=args.seed,
+    )
+    timer = StageTimer()
+    bot.metrics.add_listener(timer.on_trace)
+    graph = bot.neo4j_driver.graph if hasattr(bot.neo4j_driver, "graph") else KGSnapshot()
+
+    def chat(profile, question):
+        year, dept, major_type = profile
+        bot.chat(year, dept, question, history=None, major_type=major_type)
+
+    def graduation(profile, taken):
+        start = time.perf_counter()
+        bot.check_graduation_status(*profile, taken)
+        timer.record(f"check_graduation_status[{profile[0]}_{profile[1]}_{profile[2]}]",
+                     time.perf_counter() - start)
+
+    # 워밍업 (첫 호출 비용 제외)
+    chat(PROFILES[0], VECTOR_QUESTIONS[0])
+
+    workloads = {
+        "vector_route": run_workload("vector_route", chat, vector_requests(args.repeat), timer),
+        "kg_route": run_workload("kg_route", chat, kg_requests(args.repeat), timer),
+        "graduation_check": run_workload("graduation_check", graduation,
+                                         graduation_requests(graph, args.repeat, args.seed), timer),
+    }
+    bot.close()
+
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "workloads": workloads,
+    }
+
+
+# ============================================================
+# 결과 비교
+# ============================================================
+def compare(base_path, new_path):
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"base: {base.get('commit')}  new: {new.get('commit')}")
+    print(f"{'workload/stage':<60} {'p50 base':>10} {'p50 new':>10} {'p95 base':>10} {'p95 new':>10} {'변화(p95)':>10}")
+
+    for wname, wnew in new["workloads"].items():
+        wbase = base["workloads"].get(wname)
+        if not wbase:
+            continue
+        rows = [("total", wbase["total"], wnew["total"])]
+        rows += [(s, wbase["stages"][s], v) for s, v in wnew["stages"].items() if s in wbase["stages"]]
+
+        for stage, b, n in rows:
+            change = ((n["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100) if b["p95_ms"] else 0.0
+            print(f"{wname + '/' + stage:<60} {b['p50_ms']:>10} {n['p50_ms']:>10} "
+                  f"{b['p95_ms']:>10} {n['p95_ms']:>10} {change:>+9.1f}%")
+        print(f"{wname + '/throughput_rps':<60} {wbase['throughput_rps']:>10} {wnew['throughput_rps']:>10}")
+        print(f"{wname + '/peak_memory_mb':<60} {wbase['peak_memory_mb']:>10} {wnew['peak_memory_mb']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 챗봇 지연시간 벤치마크")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--repeat", type=int, default=5, help="워크로드 반복 횟수")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="답변 생성 평균 지연(초)")
+    parser.add_argument("--router-latency", type=float, default=0.0, help="질문 분류 평균 지연(초)")
+    parser.add_argument("--vector-latency", type=float, default=0.0, help="Vector 검색 평균 지연(초)")
+    parser.add_argument("--graph-latency", type=float, default=0.0, help="Neo4j 쿼리 평균 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="지연시간 분산(로그정규 sigma)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="두 결과 파일 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = run(args)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"{args.output} 저장됨")
+
+
+if __name__ == "__main__":
+    main()
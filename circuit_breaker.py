@@ -0,0 +1,136 @@
+"""
+외부 서비스(Neo4j, Pinecone, Gemini)별 circuit breaker
+
+AuraDB 나 Pinecone 이 느려지면 모든 chat() 요청이 드라이버 제한시간을 끝까지 기다리고,
+기다리는 스레드가 쌓여서 정상인 다른 기능까지 느려짐
+-> 서비스별로 최근 호출 결과를 보고 실패가 많으면 일정 시간 바로 실패(CircuitOpen) -> 호출한 쪽이 로컬 대체 데이터 사용
+
+- closed: 정상, 최근 window 개 호출 중 실패(오류 + slow_seconds 보다 느린 호출) 비율이 failure_rate 이상이면 open
+- open: open_seconds 동안 호출하지 않고 바로 CircuitOpen
+- half_open: open_seconds 가 지나면 한 번만 시험 호출, 성공하면 closed / 실패하면 다시 open
+  (closed 일 때 시작해서 half_open 중에 끝난 호출은 시험 호출이 아니므로 상태를 바꾸지 않음)
+- 동시 호출 수 제한(max_concurrent): 느린 서비스를 기다리는 스레드가 한도를 넘으면 나머지는 바로 CircuitOpen
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=20, min_calls=5, failure_rate=0.5, slow_seconds=None,
+                 open_seconds=30.0, max_concurrent=None, metrics=None, ignore=()):
+        # ignore: 서비스 실패로 보지 않는 예외 (호출 전에 우리 쪽에서 거절한 경우 등, 결과를 기록하지 않음)
+        self.name = name
+        self.ignore = tuple(ignore)
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.metrics = metrics
+
+        self.lock = threading.Lock()
+        self.results = deque(maxlen=window)     # 최근 호출 성공 여부
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False                    # half_open 시험 호출 진행 중
+        self.slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    @property
+    def is_open(self):
+        # 지금 호출하면 바로 실패하는지 (half_open 은 시험 호출이 가능하므로 제외)
+        with self.lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+    def call(self, fn):
+        with self.guard():
+            return fn()
+
+    @contextmanager
+    def guard(self):
+        """
+        with breaker.guard(): ... (스트리밍처럼 함수 하나로 감쌀 수 없는 호출용)
+        블록 안에서 Exception 이 나면 실패, 느리게 끝나면(slow_seconds) 실패로 기록
+        """
+        probe = self._acquire()
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = self.slow_seconds is None or time.perf_counter() - start <= self.slow_seconds
+        except BaseException as e:
+            # GeneratorExit 등 (사용자가 스트림을 닫은 경우) 은 서비스 실패가 아님
+            ok = None if isinstance(e, self.ignore) else not isinstance(e, Exception)
+            raise
+        finally:
+            if self.slots:
+                self.slots.release()
+            self._record(ok, probe)
+
+    def _acquire(self):
+        # -> 이 호출이 half_open 시험 호출인지
+        probe = False
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self._reject("open")
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.probing:
+                    self._reject("half_open")
+                self.probing = probe = True
+        if self.slots and not self.slots.acquire(blocking=False):
+            if probe:
+                with self.lock:
+                    self.probing = False
+            self._reject("busy")
+        return probe
+
+    def _reject(self, reason):
+        if self.metrics:
+            self.metrics.inc("chatbot_circuit_rejected_total", dependency=self.name, reason=reason)
+        raise CircuitOpen(f"{self.name} circuit {reason}")
+
+    def _record(self, ok, probe):
+        # ok: None 이면 결과 없음 (ignore 예외, 시험 호출이었다면 다음 호출이 다시 시험)
+        with self.lock:
+            if ok is None:
+                if probe:
+                    self.probing = False
+                return
+            if probe:
+                self.probing = False
+                if self.state == HALF_OPEN:
+                    self.results.clear()
+                    self._transition(CLOSED if ok else OPEN)
+                return
+            if self.state != CLOSED:
+                # closed 일 때 시작한 호출이 open / half_open 중에 끝남 -> 상태 판단에 쓰지 않음
+                return
+            self.results.append(ok)
+            failures = self.results.count(False)
+            if (self.state == CLOSED and len(self.results) >= self.min_calls
+                    and failures / len(self.results) >= self.failure_rate):
+                self._transition(OPEN)
+
+    def _transition(self, state):
+        # self.lock 을 잡은 상태에서 호출
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state == CLOSED:
+            self.results.clear()
+        self.state = state
+        if self.metrics:
+            self.metrics.inc("chatbot_circuit_transitions_total", dependency=self.name, state=state)
+        logger.info("circuit %s: %s", self.name, state)
@@ -0,0 +1,136 @@
+"""
+프롬프트에 넣기 전 검색 결과(청크) 압축
+
+1. 같은 문서의 연속된 청크(seq_num)를 겹치는 부분(chunk_overlap) 없이 하나로 이어붙임
+2. 서로 다른 연도 문서에 똑같이 들어있는 규정은 shingle 해시로 찾아 하나만 남김 (연도 표시는 유지)
+   (같은 학과 구간의 다른 연도끼리만, 같은 연도의 비슷한 표 행이나 다른 학과 문서는 그대로)
+3. 각 passage가 어떤 원본 청크들로 만들어졌는지 보관 -> [[REF: n]] 번호를 원본 출처로 되돌릴 때 사용
+"""
+
+import re
+import zlib
+
+MAX_OVERLAP = 400       # 청크 분할 시 chunk_overlap=200 보다 넉넉하게
+PROBE_LEN = 20          # 겹침 위치를 찾을 때 사용할 다음 청크의 앞부분 길이
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.85
+
+
+def _seq(doc):
+    try:
+        return int(doc.metadata.get("seq_num"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _same_section(a, b):
+    # 같은 파일이라도 학과/연도 구간이 다르면 이어붙이지 않음
+    keys = ("source", "year", "department")
+    return all(a.metadata.get(k) == b.metadata.get(k) for k in keys)
+
+
+def _same_rule_other_year(a, b):
+    # 연도가 겹치지 않고 같은 학과 구간(단과대학 공통 포함)의 passage 끼리만 합침
+    departments = lambda p: {d.metadata.get("department") for d in p["docs"]}
+    return not set(a["years"]) & set(b["years"]) and departments(a) == departments(b)
+
+
+def stitch(prev_text, next_text, max_overlap=MAX_OVERLAP):
+    """
+    prev 끝부분과 next 앞부분이 겹치면 겹친 부분을 한 번만 남기고 합침
+    (가장 긴 겹침을 우선)
+    """
+    tail = prev_text[-max_overlap:]
+    probe = next_text[:PROBE_LEN]
+
+    if probe:
+        pos = tail.find(probe)
+        while pos != -1:
+            overlap = tail[pos:]
+            if next_text.startswith(overlap):
+                return prev_text + next_text[len(overlap):]
+            pos = tail.find(probe, pos + 1)
+
+    return prev_text + "\n" + next_text
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    # 공백을 제거한 문자 n-gram을 crc32로 해시한 집합
+    text = re.sub(r"\s+", "", text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def containment(a, b):
+    # 작은 쪽이 큰 쪽에 얼마나 포함되는지 (0~1)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def compact_documents(docs, threshold=DUPLICATE_THRESHOLD):
+    """
+    docs: 검색된 Document 리스트 (검색 순서 유지)
+    return: [{"text": str, "years": [..], "docs": [원본 Document, ...]}, ...]
+    """
+    # 1. 연속 청크 이어붙이기
+    passages = []
+    by_position = {}    # (source, seq_num) -> passage
+
+    ordered = sorted(
+        [d for d in docs if _seq(d) is not None],
+        key=lambda d: (str(d.metadata.get("source")), _seq(d))
+    )
+    for doc in ordered:
+        prev = by_position.get((doc.metadata.get("source"), _seq(doc) - 1))
+        if prev and _same_section(prev["docs"][-1], doc):
+            prev["text"] = stitch(prev["text"], doc.page_content)
+            prev["docs"].append(doc)
+            by_position[(doc.metadata.get("source"), _seq(doc))] = prev
+        else:
+            passage = {"text": doc.page_content, "years": [doc.metadata.get("year")], "docs": [doc]}
+            by_position[(doc.metadata.get("source"), _seq(doc))] = passage
+            passages.append(passage)
+
+    # seq_num이 없는 문서(KG 결과 등)는 그대로 추가
+    passages += [{"text": d.page_content, "years": [d.metadata.get("year")], "docs": [d]}
+                 for d in docs if _seq(d) is None]
+
+    # 원래 검색 순서(가장 먼저 검색된 청크 기준)로 다시 정렬
+    rank = {id(d): i for i, d in enumerate(docs)}
+    passages.sort(key=lambda p: min(rank[id(d)] for d in p["docs"]))
+
+    # 2. 중복 규정 제거 (연도 라벨은 남은 passage에 합침)
+    kept = []
+    for passage in passages:
+        passage["shingles"] = shingles(passage["text"])
+        duplicate_of = None
+
+        for other in kept:
+            if (_same_rule_other_year(passage, other)
+                    and containment(passage["shingles"], other["shingles"]) >= threshold):
+                duplicate_of = other
+                break
+
+        if duplicate_of is None:
+            kept.append(passage)
+            continue
+
+        # 더 긴 쪽의 본문을 남김
+        if len(passage["text"]) > len(duplicate_of["text"]):
+            duplicate_of["text"] = passage["text"]
+            duplicate_of["shingles"] = passage["shingles"]
+        for year in passage["years"]:
+            if year not in duplicate_of["years"]:
+                duplicate_of["years"].append(year)
+        duplicate_of["docs"].extend(passage["docs"])
+
+    for passage in kept:
+        del passage["shingles"]
+    return kept
+
+
+def year_label(years):
+    # [2021, 2025] -> "2021, 2025"
+    return ", ".join(str(y) for y in years)
@@ -0,0 +1,157 @@
+"""
+과목명 정규화 / 자동완성 (졸업 자가진단용)
+
+학생이 입력한 "자료 구조", "자료구조(SWCON)", "CSE103", "자료구좌" 같은 값을 Subject 노드로 연결
+- 정규화: create_subject.py 와 같은 규칙 (※/* 주석, 괄호 내용, 공백 제거)
+- 정확히 일치: 과목명 / 별칭(aliases) / 학수번호(id) -> 이수한 과목으로 인정하는 것은 이 경우뿐
+  (학과마다 학수번호가 다른 같은 이름의 과목(졸업논문 등)은 모두 돌려줌)
+- 자동완성: 정규화한 이름, 학수번호의 prefix trie (노드마다 상위 후보를 미리 저장)
+- 오타: 글자 bigram 으로 후보를 모은 뒤 편집거리로 순위
+  -> "혹시 이 과목인가요?" 후보로만 사용 (딥러닝2 -> 딥러닝, CSE999 -> CSE499 처럼 다른 과목일 수 있음)
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+MAX_SUGGESTIONS = 10
+
+
+def normalize_course(text):
+    # create_subject.py 의 과목명 처리 규칙 + 공백/대소문자 무시
+    text = unicodedata.normalize("NFKC", str(text or ""))
+    text = text.split("※")[0].split("*")[0]
+    text = re.sub(r"\([^)]*\)|\[[^\]]*\]", "", text)     # "자료구조(SWCON)" -> "자료구조"
+    return re.sub(r"\s+", "", text).lower()
+
+
+def bigrams(key):
+    # 한 글자짜리도 후보가 나오도록 앞뒤 표시 문자를 붙임
+    padded = f"^{key}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def edit_distance(a, b, limit):
+    # limit 을 넘으면 더 계산하지 않고 limit + 1 반환
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []       # 이 prefix 로 시작하는 과목 (순위순, 최대 MAX_SUGGESTIONS개)
+
+
+class CourseResolver:
+    def __init__(self, subjects):
+        """
+        subjects: [{"id", "name", "aliases"}, ...] (Neo4j Subject 노드)
+        """
+        self.subjects = {}
+        self.exact = {}         # 정규화한 이름/별칭/학수번호 -> 과목 id 목록
+        self.keys = []          # (정규화한 key, 과목 id)
+        self.by_bigram = {}     # bigram -> keys 의 인덱스 목록
+        self.trie = _TrieNode()
+
+        for s in subjects:
+            if not s.get("id") or not s.get("name"):
+                continue
+            self.subjects[s["id"]] = {"id": s["id"], "name": s["name"], "aliases": list(s.get("aliases") or [])}
+
+        # 과목명이 짧은 순으로 넣어서 자동완성 후보도 짧은 이름이 먼저 나오게 함
+        for sid in sorted(self.subjects, key=lambda i: (len(self.subjects[i]["name"]), self.subjects[i]["name"], i)):
+            s = self.subjects[sid]
+            for text in [s["name"], sid] + s["aliases"]:
+                key = normalize_course(text)
+                if not key or sid in self.exact.get(key, ()):
+                    continue
+                self.exact.setdefault(key, []).append(sid)
+                self.keys.append((key, sid))
+                for gram in bigrams(key):
+                    self.by_bigram.setdefault(gram, []).append(len(self.keys) - 1)
+                self._insert(key, sid)
+
+    def _insert(self, key, sid):
+        node = self.trie
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if sid not in node.ids and len(node.ids) < MAX_SUGGESTIONS:
+                node.ids.append(sid)
+
+    def _prefix(self, key):
+        node = self.trie
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.ids
+
+    def _fuzzy(self, key, limit):
+        # bigram 이 많이 겹치는 후보만 편집거리 계산
+        counts = Counter()
+        for gram in bigrams(key):
+            counts.update(self.by_bigram.get(gram, ()))
+
+        max_dist = 1 if len(key) <= 4 else 2
+        ranked = {}
+        for idx, _ in counts.most_common(30):
+            cand, sid = self.keys[idx]
+            dist = edit_distance(key, cand, max_dist)
+            if dist <= max_dist and dist < ranked.get(sid, max_dist + 1):
+                ranked[sid] = dist
+        return sorted(ranked, key=lambda sid: (ranked[sid], len(self.subjects[sid]["name"])))[:limit]
+
+    # ------------------------------------------------------------
+    # 외부 사용
+    # ------------------------------------------------------------
+    def suggest(self, text, limit=8):
+        # 자동완성: prefix 일치 -> 부족하면 오타 후보로 채움
+        key = normalize_course(text)
+        if not key:
+            return []
+        ids = list(self._prefix(key)[:limit])
+        if len(ids) < limit:
+            ids += [sid for sid in self._fuzzy(key, limit) if sid not in ids][:limit - len(ids)]
+        return [self.subjects[sid] for sid in ids]
+
+    def resolve(self, text):
+        """
+        입력 하나 -> 일치하는 과목 목록 (정확히 일치할 때만, 못 찾으면 [])
+        정규화(공백, 괄호, 대소문자) 후 과목명 / 별칭 / 학수번호가 같아야 함
+        """
+        key = normalize_course(text)
+        return [self.subjects[sid] for sid in self.exact.get(key, ())] if key else []
+
+    def resolve_many(self, texts):
+        # 성적표 전체를 한 번에: {입력값: 과목 목록 (못 찾으면 [])}
+        return {text: self.resolve(text) for text in texts}
+
+    def did_you_mean(self, text, limit=3):
+        """
+        인정하지 않은 입력의 후보 과목 (UI 안내용, 이수 과목에는 넣지 않음)
+        1. prefix 로 시작하는 과목이 하나뿐  2. 편집거리가 가까운 과목
+        """
+        key = normalize_course(text)
+        if not key or key in self.exact:
+            return []
+
+        ids = []
+        if len(key) >= 2:
+            prefix = self._prefix(key)
+            if len(prefix) == 1:
+                ids.append(prefix[0])
+        ids += [sid for sid in self._fuzzy(key, limit) if sid not in ids]
+
+        return [self.subjects[sid] for sid in ids[:limit]]
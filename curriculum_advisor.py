@@ -0,0 +1,160 @@
+"""
+교육과정 변경 상담 (입학년도 교육과정 vs 다른 연도 교육과정)
+
+"2024 교육과정으로 바꾸는 게 나을까요?" 같은 질문에 답하기 위해
+학과의 모든 졸업요건(연도 x 전공유형)에 대해 남은 학점 / 미이수 필수 과목을 한 번에 계산
+
+- 학과의 전체 과목에 번호를 붙이고, 수강 과목은 bool 벡터(bitset) 하나로 표현
+- 졸업요건 x 과목 행렬(영역별 학점, 필수 과목 여부)을 미리 만들어두고 NumPy 행렬 연산 한 번으로 계산
+- 대체 과목은 연도별 "과목 -> 대체 과목" 행렬로 반영 (substitution_index.py 와 같은 규칙)
+"""
+
+import numpy as np
+
+# Requirement 노드 속성 -> 영역 (check_graduation_status 와 동일)
+CREDIT_FIELDS = {
+    "credits_major_required": "전공필수",
+    "credits_major_elective": "전공선택",
+    "credits_major_basic": "전공기초",
+    "credits_industry_required": "산학필수",
+}
+CATEGORIES = list(CREDIT_FIELDS.values())
+REQUIRED_CLASSES = ("전공필수", "전공기초")
+
+
+class CurriculumAdvisor:
+    def __init__(self, department, rows, substitution=None):
+        """
+        rows: 학과의 모든 졸업요건에 포함된 과목
+              [{"req_props", "classification", "sub_classification", "subject_id", "subject_name", "subject_credits"}, ...]
+        substitution: SubstitutionIndex (없으면 대체 과목 미반영)
+        """
+        self.department = department
+
+        # 1. 번호 붙이기 (졸업요건, 과목)
+        self.options = []           # [(연도, 전공유형, req_props)]
+        option_index = {}
+        self.course_ids = []
+        self.course_names = []
+        self.course_index = {}
+
+        for r in rows:
+            req = r["req_props"]
+            key = (req.get("year"), req.get("major_type"))
+            if key not in option_index:
+                option_index[key] = len(self.options)
+                self.options.append((key[0], key[1], req))
+            if r["subject_id"] not in self.course_index:
+                self.course_index[r["subject_id"]] = len(self.course_ids)
+                self.course_ids.append(r["subject_id"])
+                self.course_names.append(r["subject_name"])
+
+        # 대체 과목(졸업요건에는 없는 구/신 과목 포함)도 번호를 붙여서 수강 과목으로 표현 가능하게 함
+        self.years = sorted({year for year, _, _ in self.options})
+        self.alternatives = alternatives = {}       # (연도 번호, 과목 번호) -> 대체 과목 id 묶음
+        if substitution:
+            for y, year in enumerate(self.years):
+                for c, sid in enumerate(list(self.course_ids)):
+                    alts = substitution.equivalents(department, year, sid) - {sid}
+                    if alts:
+                        alternatives[(y, c)] = alts
+                    for alt in alts:
+                        if alt not in self.course_index:
+                            self.course_index[alt] = len(self.course_ids)
+                            self.course_ids.append(alt)
+                            self.course_names.append(alt)
+
+        n_opt, n_course = len(self.options), len(self.course_ids)
+
+        # 2. 졸업요건 x 과목 행렬
+        # credits[k, o, c]: 졸업요건 o 에서 과목 c 를 들으면 영역 k 에 인정되는 학점
+        self.credits = np.zeros((len(CATEGORIES), n_opt, n_course), dtype=np.float32)
+        self.required = np.zeros((n_opt, n_course), dtype=bool)    # 전공필수/전공기초 과목
+        self.classification = np.full((n_opt, n_course), -1, dtype=np.int8)     # 과목의 영역 번호 (없으면 -1)
+        self.targets = np.zeros((n_opt, len(CATEGORIES)), dtype=np.float32)
+
+        counted = set()
+        for r in rows:
+            req = r["req_props"]
+            o = option_index[(req.get("year"), req.get("major_type"))]
+            c = self.course_index[r["subject_id"]]
+            if (o, c) in counted:     # 같은 과목이 여러 영역에 있으면 처음 영역만 (check_graduation_status 와 동일)
+                continue
+            counted.add((o, c))
+
+            credit = r["subject_credits"] or 0
+            cls = r["classification"]
+            if cls in CATEGORIES:
+                self.credits[CATEGORIES.index(cls), o, c] = credit
+                self.classification[o, c] = CATEGORIES.index(cls)
+            if r["sub_classification"] == "산학필수":
+                self.credits[CATEGORIES.index("산학필수"), o, c] = credit
+            if cls in REQUIRED_CLASSES:
+                self.required[o, c] = True
+
+        for o, (_, _, req) in enumerate(self.options):
+            for k, field in enumerate(CREDIT_FIELDS):
+                self.targets[o, k] = req.get(field, 0) or 0
+
+        # 3. 연도별 대체 과목 행렬: substitutes[y, c, d] = 과목 c 대신 과목 d 를 들어도 인정
+        self.option_year = np.array([self.years.index(year) for year, _, _ in self.options], dtype=np.intp)
+        self.substitutes = np.zeros((len(self.years), n_course, n_course), dtype=bool)
+        self.substitutes[:, np.arange(n_course), np.arange(n_course)] = True
+        for (y, c), alts in alternatives.items():
+            for alt in alts:
+                self.substitutes[y, c, self.course_index[alt]] = True
+
+    def encode(self, taken_ids):
+        # 수강 과목 id -> bitset (졸업요건, 대체 과목 어디에도 없는 과목은 무시)
+        taken = np.zeros(len(self.course_ids), dtype=bool)
+        for sid in taken_ids:
+            c = self.course_index.get(sid)
+            if c is not None:
+                taken[c] = True
+        return taken
+
+    def option_index(self, year, major_type):
+        for o, (y, t, _) in enumerate(self.options):
+            if (y, t) == (int(year), major_type):
+                return o
+        return None
+
+    def satisfied(self, taken_ids):
+        # 연도별로 "이수 인정된 과목" (직접 수강 or 대체 과목 수강) -> 졸업요건별로 펼침 (졸업요건, 과목)
+        taken = self.encode(taken_ids)
+        satisfied_by_year = (self.substitutes & taken).any(axis=2)
+        return satisfied_by_year[self.option_year]
+
+    def earned(self, satisfied):
+        return np.einsum("koc,oc->ok", self.credits, satisfied.astype(np.float32))
+
+    def evaluate(self, taken_ids):
+        """
+        모든 졸업요건에 대해 남은 학점 / 미이수 필수 과목 계산 (남은 학점 합이 적은 순)
+        """
+        if not self.options:
+            return []
+        satisfied = self.satisfied(taken_ids)
+        earned = self.earned(satisfied)
+        remaining = np.maximum(self.targets - earned, 0)
+        missing = self.required & ~satisfied
+
+        total = remaining.sum(axis=1)
+        n_missing = missing.sum(axis=1)
+        order = np.lexsort((n_missing, total))
+
+        results = []
+        for o in order:
+            year, major_type, _ = self.options[o]
+            results.append({
+                "year": year,
+                "major_type": major_type,
+                "total_remaining": int(total[o]),
+                "status": {
+                    cls: {"required": int(self.targets[o, k]), "earned": int(earned[o, k]),
+                          "remaining": int(remaining[o, k])}
+                    for k, cls in enumerate(CATEGORIES)
+                },
+                "missing": [self.course_names[c] for c in np.flatnonzero(missing[o])],
+            })
+        return results
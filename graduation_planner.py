@@ -0,0 +1,141 @@
+"""
+졸업까지 남은 과목 추천 (최소 학점)
+
+"다음 학기에 뭘 들어야 가장 빨리 졸업하나요?"
+-> 아직 이수하지 않은 과목 중, 영역별 남은 학점(전공필수/전공기초/전공선택/산학필수)을 모두 채우는
+   학점 합이 가장 작은 과목 조합을 찾음
+
+1. 미이수 전공필수/전공기초 과목은 무조건 포함 (대체 과목 중 아무거나 들어도 됨)
+2. 남은 학점은 영역별 후보 과목으로 채움
+   - 산학필수 과목은 자기 영역(예: 전공선택)과 산학필수에 동시에 인정
+   - 서로 영향을 주는 영역끼리만 묶어서 계산 (전공기초 / 전공필수 / 전공선택+산학필수)
+3. 정확한 해: "영역별 남은 학점" 상태에 대한 DP (0 미만은 0으로 자름)
+   - 학점/인정 영역이 같은 과목은 한 종류로 묶어서 몇 개 들을지만 결정 -> 선택 과목이 많아도 빠름
+   - 이미 찾은 해보다 학점이 많아지는 상태는 버림
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from curriculum_advisor import CATEGORIES
+
+
+def min_credit_cover(groups, deficits):
+    """
+    groups: [(학점, 영역별 인정 학점 tuple, 과목 수)]
+    deficits: 영역별 남은 학점 tuple
+    -> ({그룹 번호: 들을 과목 수}, 채우지 못한 남은 학점 tuple)
+    """
+    start = tuple(deficits)
+    best = {start: (0, 0, None)}      # 상태 -> (학점 합, 과목 수, 역추적)
+    best_done = None                  # 모든 영역을 채운 해의 학점 합
+
+    for g, (credits, contrib, count) in enumerate(groups):
+        for state, (cost, n, back) in list(best.items()):
+            if not any(state):
+                continue
+            cur = state
+            for k in range(1, count + 1):
+                nxt = tuple(max(0, s - c) for s, c in zip(cur, contrib))
+                if nxt == cur:
+                    break
+                cand = (cost + credits * k, n + k, (g, k, back))
+                if best_done is not None and cand[0] > best_done:
+                    break
+                if nxt not in best or cand[:2] < best[nxt][:2]:
+                    best[nxt] = cand
+                    if not any(nxt):
+                        best_done = cand[0] if best_done is None else min(best_done, cand[0])
+                cur = nxt
+
+    # 다 채울 수 없으면 남은 학점이 가장 적은 상태
+    final = min(best, key=lambda s: (sum(s), best[s][0], best[s][1]))
+    chosen = {}
+    back = best[final][2]
+    while back:
+        g, k, back = back
+        chosen[g] = k
+    return chosen, final
+
+
+def plan_courses(advisor, taken_ids, year, major_type, alternative_names=None):
+    """
+    advisor: CurriculumAdvisor (학과)
+    -> {"courses": [{"id", "name", "credits", "classification", "alternatives", "required"}],
+        "total_credits", "unmet": {영역: 채우지 못한 학점}}
+       (해당 졸업요건이 없으면 None)
+    """
+    o = advisor.option_index(year, major_type)
+    if o is None:
+        return None
+    alternative_names = alternative_names or {}
+
+    satisfied = advisor.satisfied(taken_ids)[o]
+    credits = advisor.credits[:, o, :]          # (영역, 과목)
+    remaining = np.maximum(advisor.targets[o] - credits @ satisfied.astype(np.float32), 0)
+    untaken = ~satisfied & (advisor.classification[o] >= 0)
+
+    # 1. 미이수 필수 과목
+    mandatory = np.flatnonzero(advisor.required[o] & untaken)
+    remaining = np.maximum(remaining - credits[:, mandatory].sum(axis=1), 0)
+
+    # 2. 남은 학점을 채울 후보 (필수 과목 제외, 인정 학점이 있는 과목)
+    pool = [c for c in np.flatnonzero(untaken & ~advisor.required[o]) if credits[:, c].any()]
+
+    # 영역 묶기: 한 과목이 두 영역에 인정되면 같은 묶음
+    parent = list(range(len(CATEGORIES)))
+
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    for c in pool:
+        ks = [k for k in np.flatnonzero(credits[:, c]) if remaining[k] > 0]
+        for k in ks[1:]:
+            parent[find(k)] = find(ks[0])
+
+    components = defaultdict(list)
+    for k in np.flatnonzero(remaining > 0):
+        components[find(k)].append(k)
+
+    chosen_courses = list(mandatory)
+    unmet = {}
+    for dims in components.values():
+        # 학점/인정 영역이 같은 과목끼리 그룹
+        grouped = defaultdict(list)
+        for c in pool:
+            contrib = tuple(int(credits[k, c]) for k in dims)
+            if any(contrib):
+                grouped[(int(credits[:, c].max()), contrib)].append(c)
+        groups = [(cr, contrib, len(cs)) for (cr, contrib), cs in grouped.items()]
+        members = [sorted(cs, key=lambda c: advisor.course_names[c]) for cs in grouped.values()]
+
+        chosen, left = min_credit_cover(groups, tuple(int(remaining[k]) for k in dims))
+        for g, k in chosen.items():
+            chosen_courses += members[g][:k]
+        for k, v in zip(dims, left):
+            if v:
+                unmet[CATEGORIES[k]] = v
+
+    y = advisor.option_year[o]
+    courses = []
+    for c in chosen_courses:
+        alts = advisor.alternatives.get((y, c), ())
+        courses.append({
+            "id": advisor.course_ids[c],
+            "name": advisor.course_names[c],
+            "credits": int(credits[:, c].max()),
+            "classification": CATEGORIES[advisor.classification[o, c]],
+            "required": bool(advisor.required[o, c]),
+            "alternatives": sorted(alternative_names.get(a, a) for a in alts),
+        })
+    courses.sort(key=lambda x: (not x["required"], CATEGORIES.index(x["classification"]), x["name"]))
+
+    return {
+        "courses": courses,
+        "total_credits": sum(x["credits"] for x in courses),
+        "unmet": unmet,
+    }
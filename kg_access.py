@@ -0,0 +1,177 @@
+"""
+Neo4j(KG) 조회 계층
+
+- 연결 풀 설정(크기, 연결 획득 제한시간, 유휴 연결 확인)을 한 곳에서 관리
+- 모든 조회는 읽기 전용 managed transaction(execute_read)으로 실행
+  -> 읽기 서버로 라우팅되고, 일시적인 오류(연결 끊김, 리더 변경 등)는 드라이버가 자동으로 재시도
+- 쿼리는 이름이 붙은 고정 문자열(QUERIES)로만 실행 -> Neo4j 쿼리 계획 캐시 재사용
+- 결과는 레코드 단위로 바로 변환(transform)해서 중간 리스트를 만들지 않음
+- 쿼리별 소요시간은 metrics 의 "neo4j" span 으로 기록
+- circuit breaker 를 거쳐 조회, Neo4j 장애(breaker open / 연결 오류) 시 KG/output/*.json 로컬 사본(kg_snapshot.py)으로 응답
+"""
+
+import os
+import threading
+
+from neo4j import GraphDatabase, READ_ACCESS
+from neo4j.exceptions import Neo4jError, DriverError, TransientError
+
+from circuit_breaker import CircuitOpen
+
+# ============================================================
+# 쿼리 목록
+# ============================================================
+QUERIES = {
+    # 비교 질문: 학과/전공유형의 모든 연도 졸업요건 + 포함 과목 + 대체 과목
+    "kg_data": """
+        MATCH (req:Requirement {department: $dept, major_type: $type})
+        MATCH (req)-[r:INCLUDES]->(sub:Subject)
+        OPTIONAL MATCH (sub)-[s:SUBSTITUTES]->(alt:Subject)
+        RETURN
+            req.year AS year,
+            properties(req) AS req_props,
+            properties(r) AS rel_props,
+            properties(sub) AS sub_props,
+            COLLECT({rel: properties(s), subject: properties(alt)}) AS substitutes
+        ORDER BY req.year ASC
+    """,
+
+    # 일반 질문: 사용자 정보에 해당하는 졸업요건 노드
+    "user_subgraph": """
+        MATCH (req:Requirement {year: $year, department: $dept, major_type: $type})
+        RETURN properties(req) AS info
+    """,
+
+    # 졸업 자가진단: 졸업요건에 포함된 전공 과목 + 대체 과목
+    "graduation": """
+        MATCH (req:Requirement {year: $year, department: $dept, major_type: $type})
+        MATCH (req)-[r:INCLUDES]->(subject:Subject)
+        WHERE r.classification IN ['전공필수', '전공기초', '전공선택']
+        OPTIONAL MATCH (subject)-[s:SUBSTITUTES]->(alternative:Subject)
+        RETURN
+            properties(req) AS req_props,
+            r.classification AS classification,
+            r.sub_classification AS sub_classification,
+            subject.id AS subject_id,
+            subject.name AS subject_name,
+            subject.aliases AS subject_aliases,
+            subject.credits AS subject_credits,
+            alternative.name AS alternative_name,
+            alternative.aliases AS alternative_aliases,
+            s.note AS note
+    """,
+
+    # 교육과정 비교: 학과의 모든 연도/전공유형 졸업요건에 포함된 전공 과목
+    "department_requirements": """
+        MATCH (req:Requirement {department: $dept})-[r:INCLUDES]->(subject:Subject)
+        WHERE r.classification IN ['전공필수', '전공기초', '전공선택']
+        RETURN
+            properties(req) AS req_props,
+            r.classification AS classification,
+            r.sub_classification AS sub_classification,
+            subject.id AS subject_id,
+            subject.name AS subject_name,
+            subject.credits AS subject_credits
+        ORDER BY req.year, req.major_type
+    """,
+
+    # 대체 과목 묶음 색인용 전체 대체 관계
+    "substitutes": """
+        MATCH (s:Subject)-[r:SUBSTITUTES]->(t:Subject)
+        RETURN s.id AS source_id, t.id AS target_id, r.department AS department, r.year AS year
+    """,
+
+    # 과목명 정규화/자동완성용 전체 과목 목록
+    "subjects": """
+        MATCH (s:Subject)
+        RETURN s.id AS id, s.name AS name, s.aliases AS aliases
+    """,
+}
+
+
+def pool_config():
+    # 환경변수로 조정 가능한 연결 풀 설정
+    return {
+        "max_connection_pool_size": int(os.getenv("NEO4J_POOL_SIZE", "50")),
+        "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUIRE_TIMEOUT", "10")),
+        "connection_timeout": float(os.getenv("NEO4J_CONNECT_TIMEOUT", "5")),
+        "liveness_check_timeout": float(os.getenv("NEO4J_LIVENESS_CHECK", "30")),
+        "max_connection_lifetime": float(os.getenv("NEO4J_MAX_LIFETIME", "3000")),
+        "max_transaction_retry_time": float(os.getenv("NEO4J_MAX_RETRY_TIME", "5")),
+    }
+
+
+class KGAccess:
+    def __init__(self, uri=None, auth=None, driver=None, metrics=None, database=None, breaker=None, snapshot_dir=None):
+        self.driver = driver or GraphDatabase.driver(uri, auth=auth, **pool_config())
+        self.metrics = metrics
+        self.database = database or os.getenv("NEO4J_DATABASE") or None
+        self.breaker = breaker
+        self.snapshot_dir = snapshot_dir    # Neo4j 장애 시 사용할 KG/output 경로 (None 이면 대체 없음)
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    def close(self):
+        if self.driver:
+            self.driver.close()
+
+    def _session(self):
+        return self.driver.session(database=self.database, default_access_mode=READ_ACCESS)
+
+    def snapshot(self):
+        # 로컬 사본은 처음 필요할 때 한 번만 읽음
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                from kg_snapshot import KGSnapshot
+                self._snapshot = KGSnapshot(self.snapshot_dir)
+        return self._snapshot
+
+    def read(self, name, transform=dict, **params):
+        """
+        QUERIES[name] 을 읽기 트랜잭션으로 실행하고 레코드마다 transform 을 적용한 리스트 반환
+        (재시도 시에도 결과가 중복되지 않도록 트랜잭션 함수 안에서 새로 만듦)
+        """
+        query = QUERIES[name]
+
+        def work(tx):
+            return [transform(record) for record in tx.run(query, params)]
+
+        return self._guarded(name, work, lambda snapshot: snapshot.read(name, transform, **params))
+
+    def read_single(self, name, **params):
+        # 결과가 한 개 이하인 쿼리 (없으면 None)
+        query = QUERIES[name]
+
+        def work(tx):
+            record = tx.run(query, params).single()
+            return dict(record) if record else None
+
+        return self._guarded(name, work, lambda snapshot: snapshot.read_single(name, **params))
+
+    def _guarded(self, name, work, fallback):
+        # breaker 가 열려 있거나 연결 오류면 로컬 사본으로 (쿼리 오류 등은 그대로 raise)
+        if self.breaker is None:
+            return self._execute(name, work)
+        try:
+            return self.breaker.call(lambda: self._execute(name, work))
+        except (CircuitOpen, DriverError, TransientError, OSError):
+            if not self.snapshot_dir or not os.path.isdir(self.snapshot_dir):
+                raise
+            if self.metrics:
+                self.metrics.degraded("neo4j")
+            return fallback(self.snapshot())
+
+    def _execute(self, name, work):
+        if not self.metrics:
+            with self._session() as session:
+                return session.execute_read(work)
+
+        with self.metrics.span("neo4j", query=name) as span:
+            try:
+                with self._session() as session:
+                    result = session.execute_read(work)
+            except (Neo4jError, DriverError) as e:
+                self.metrics.inc("chatbot_neo4j_errors_total", query=name, error=type(e).__name__)
+                raise
+            span["rows"] = len(result) if isinstance(result, list) else int(result is not None)
+        return result
@@ -0,0 +1,160 @@
+"""
+KG 로컬 사본 (KG/output/*.json 을 메모리에 올린 그래프)
+
+Neo4j(AuraDB) 장애로 circuit breaker 가 열렸을 때 KGAccess 의 대체 조회 대상
+(오프라인 벤치마크의 가짜 Neo4j 드라이버도 같은 그래프를 사용)
+- kg_access.QUERIES 와 같은 이름 / 같은 결과 형식으로 조회 (read, read_single)
+- KG/build.py 로 만든 업로드 파일 기준이므로 Neo4j 에 올린 데이터와 같음
+"""
+
+import json
+import os
+
+KG_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "KG", "output")
+
+
+def load_json(name, key, output_dir=KG_OUTPUT_DIR):
+    with open(os.path.join(output_dir, name), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get(key, []) if isinstance(data, dict) else data
+
+
+class KGSnapshot:
+    """KG/output/*.json 을 메모리에 올린 그래프 (upload_neo4j.py + update_neo4j.py 결과와 동일)"""
+
+    def __init__(self, output_dir=KG_OUTPUT_DIR):
+        output_dir = output_dir or KG_OUTPUT_DIR
+        self.subjects = {}
+        for node in (load_json("subject_nodes.json", "nodes", output_dir)
+                     + load_json("new_subject_nodes.json", "nodes", output_dir)):
+            self.subjects.setdefault(node["id"], node)
+
+        self.requirements = {n["id"]: n for n in load_json("requirement_nodes.json", "nodes", output_dir)}
+
+        # (req_id) -> [INCLUDES 관계]
+        self.includes = {}
+        for rel in load_json("includes_relationships.json", "relationships", output_dir):
+            if rel["source_id"] in self.requirements and rel["target_id"] in self.subjects:
+                self.includes.setdefault(rel["source_id"], []).append(rel)
+
+        # (subject_id) -> [SUBSTITUTES 관계] (update_neo4j.py 처럼 (s, t) 쌍당 하나만)
+        self.substitutes = {}
+        seen = set()
+        for rel in load_json("substitutes_relationships.json", "relationships", output_dir):
+            pair = (rel["source_id"], rel["target_id"])
+            if pair in seen or rel["target_id"] not in self.subjects or rel["source_id"] not in self.subjects:
+                continue
+            seen.add(pair)
+            self.substitutes.setdefault(rel["source_id"], []).append(rel)
+
+    @staticmethod
+    def rel_props(rel, drop=("source_id", "target_id", "type", "target_name_raw")):
+        return {k: v for k, v in rel.items() if k not in drop}
+
+    def find_requirements(self, year=None, dept=None, major_type=None):
+        return sorted(
+            [r for r in self.requirements.values()
+             if (year is None or r.get("year") == year)
+             and (dept is None or r.get("department") == dept)
+             and (major_type is None or r.get("major_type") == major_type)],
+            key=lambda r: r.get("year") or 0
+        )
+
+    # get_user_subgraph
+    def requirement_info(self, year, dept, type):
+        return [{"info": dict(r)} for r in self.find_requirements(year, dept, type)]
+
+    # get_kg_data
+    def kg_rows(self, dept, type):
+        rows = []
+        for req in self.find_requirements(None, dept, type):
+            for rel in self.includes.get(req["id"], []):
+                sub = self.subjects[rel["target_id"]]
+                subs = [{"rel": self.rel_props(s, ("source_id", "target_id", "type", "source_name", "target_name")),
+                         "subject": self.subjects[s["target_id"]]}
+                        for s in self.substitutes.get(sub["id"], [])]
+                rows.append({
+                    "year": req.get("year"),
+                    "req_props": dict(req),
+                    "rel_props": self.rel_props(rel),
+                    "sub_props": dict(sub),
+                    "substitutes": subs or [{"rel": None, "subject": None}],
+                })
+        return rows
+
+    # 과목명 정규화
+    def subject_rows(self):
+        return [{"id": s["id"], "name": s.get("name"), "aliases": s.get("aliases")} for s in self.subjects.values()]
+
+    # 교육과정 비교
+    def department_rows(self, dept):
+        rows = []
+        for req in sorted(self.find_requirements(None, dept, None), key=lambda r: (r.get("year"), r.get("major_type"))):
+            for rel in self.includes.get(req["id"], []):
+                if rel.get("classification") not in ("전공필수", "전공기초", "전공선택"):
+                    continue
+                sub = self.subjects[rel["target_id"]]
+                rows.append({
+                    "req_props": dict(req),
+                    "classification": rel.get("classification"),
+                    "sub_classification": rel.get("sub_classification"),
+                    "subject_id": sub["id"],
+                    "subject_name": sub.get("name"),
+                    "subject_credits": sub.get("credits"),
+                })
+        return rows
+
+    # 대체 과목 묶음 색인
+    def substitute_rows(self):
+        return [{"source_id": s["source_id"], "target_id": s["target_id"],
+                 "department": s.get("department"), "year": s.get("year")}
+                for rels in self.substitutes.values() for s in rels]
+
+    # check_graduation_status
+    def graduation_rows(self, year, dept, type):
+        rows = []
+        for req in self.find_requirements(year, dept, type):
+            for rel in self.includes.get(req["id"], []):
+                if rel.get("classification") not in ("전공필수", "전공기초", "전공선택"):
+                    continue
+                sub = self.subjects[rel["target_id"]]
+                base = {
+                    "req_props": dict(req),
+                    "classification": rel.get("classification"),
+                    "sub_classification": rel.get("sub_classification"),
+                    "subject_id": sub["id"],
+                    "subject_name": sub.get("name"),
+                    "subject_aliases": sub.get("aliases"),
+                    "subject_credits": sub.get("credits"),
+                }
+                alts = self.substitutes.get(sub["id"], [])
+                if not alts:
+                    rows.append({**base, "alternative_name": None, "alternative_aliases": None, "note": None})
+                for s in alts:
+                    alt = self.subjects[s["target_id"]]
+                    rows.append({**base, "alternative_name": alt.get("name"),
+                                 "alternative_aliases": alt.get("aliases"), "note": s.get("note")})
+        return rows
+
+    # ------------------------------------------------------------
+    # KGAccess 와 같은 방식으로 조회 (QUERIES 이름 기준)
+    # ------------------------------------------------------------
+    def rows(self, name, params):
+        handlers = {
+            "kg_data": lambda p: self.kg_rows(p["dept"], p["type"]),
+            "user_subgraph": lambda p: self.requirement_info(p["year"], p["dept"], p["type"]),
+            "graduation": lambda p: self.graduation_rows(p["year"], p["dept"], p["type"]),
+            "subjects": lambda p: self.subject_rows(),
+            "department_requirements": lambda p: self.department_rows(p["dept"]),
+            "substitutes": lambda p: self.substitute_rows(),
+        }
+        if name not in handlers:
+            raise ValueError(f"지원하지 않는 쿼리: {name}")
+        return handlers[name](params)
+
+    def read(self, name, transform=dict, **params):
+        return [transform(row) for row in self.rows(name, params)]
+
+    def read_single(self, name, **params):
+        rows = self.rows(name, params)
+        return dict(rows[0]) if rows else None
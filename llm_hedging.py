@@ -0,0 +1,176 @@
+"""
+LLM 호출 지연시간 제어 (마감 시간 + hedged request)
+
+Gemini 호출(질문 분류 generate_content, 답변 생성 document_chain.invoke)은 가끔 수십 초씩 멈춤
+-> p99 가 이런 소수의 느린 호출로 결정됨
+
+- 마감 시간(deadline): 요청 전체 예산(LLM_REQUEST_BUDGET)에서 호출마다 남은 시간만큼만 기다림
+  (넘으면 DeadlineExceeded, 질문 분류는 기본 "Vector" 로 진행)
+- hedged request: 첫 요청이 최근 지연시간의 p90(LLM_HEDGE_QUANTILE) 안에 끝나지 않으면
+  같은 요청을 한 번 더 보내고 먼저 끝난 결과를 사용
+  (기록이 MIN_SAMPLES 개 미만이면 호출별 기본 지연 사용, 느린 요청은 취소하지 않고 백그라운드에서 끝남)
+- 먼저 보낸 요청이 바로 실패하면 hedge 요청을 곧바로 보냄 (한 번 재시도)
+- 끝나지 않은 느린 요청이 호출 스레드 pool 을 차지하므로
+  pool 의 HEDGE_POOL_SHARE 이상이 사용 중이면 hedge 하지 않고, 전부 사용 중이면 새 호출은 바로 PoolSaturated
+  (느린 요청 자체는 HTTP 제한시간(LLM_REQUEST_BUDGET)이 지나면 끝남)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from metrics import run_in_context
+
+REQUEST_BUDGET = float(os.getenv("LLM_REQUEST_BUDGET", "30"))     # 요청 하나의 LLM 호출 전체 시간(초)
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", "5"))          # 질문 분류는 이 시간까지만
+HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.9"))
+MAX_HEDGES = int(os.getenv("LLM_MAX_HEDGES", "1"))                # 0 이면 hedge 안 함
+MIN_SAMPLES = 20
+MIN_HEDGE_DELAY = 0.05
+INITIAL_HEDGE_DELAY = {"router": 2.0, "answer": 10.0}            # 기록이 쌓이기 전 호출별 기본 hedge 지연(초)
+HEDGE_POOL_SHARE = 0.75                                           # pool 사용 비율이 이 미만일 때만 hedge
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class PoolSaturated(DeadlineExceeded):
+    # 호출 스레드가 모두 사용 중 -> 대기열에서 기다려도 마감 시간 안에 시작하기 어려우므로 바로 실패
+    pass
+
+
+def deadline_after(seconds):
+    return time.monotonic() + seconds
+
+
+def remaining(deadline):
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+class LatencyWindow:
+    # 호출별 최근 지연시간 (성공한 요청만, 먼저 끝나지 못한 요청도 포함해서 실제 분포를 반영)
+    def __init__(self, size=200):
+        self.size = size
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=self.size)).append(seconds)
+
+    def quantile(self, name, q):
+        with self.lock:
+            values = list(self.samples.get(name, ()))
+        if len(values) < MIN_SAMPLES:
+            return None
+        return float(np.quantile(values, q))
+
+
+class HedgedCaller:
+    def __init__(self, quantile=HEDGE_QUANTILE, max_hedges=MAX_HEDGES, metrics=None, max_workers=16, give_up=()):
+        """
+        give_up: 이 예외로 실패한 시도는 다시 보내지 않음 (LLM 호출 대기열 초과 Overloaded 등)
+        """
+        self.quantile = quantile
+        self.max_hedges = max_hedges
+        self.metrics = metrics
+        self.give_up = tuple(give_up)
+        self.latencies = LatencyWindow()
+        # 느린 요청은 끝까지 실행되므로 호출 스레드와 별도 pool
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self.max_workers = max_workers
+        self.hedge_limit = max(int(max_workers * HEDGE_POOL_SHARE), 1)
+        self.lock = threading.Lock()
+        self.in_flight = 0      # pool 에 넣은 뒤 아직 끝나지 않은 시도 (대기 중 포함)
+
+    def hedge_delay(self, name):
+        observed = self.latencies.quantile(name, self.quantile)
+        if observed is None:
+            return INITIAL_HEDGE_DELAY.get(name, 5.0)
+        return max(observed, MIN_HEDGE_DELAY)
+
+    def call(self, name, fn, deadline=None):
+        """
+        fn(): 요청 하나 (hedge 시 한 번 더 호출되므로 매번 새 요청을 만들어야 함)
+        -> 먼저 성공한 결과, deadline 까지 없으면 DeadlineExceeded
+        """
+        def attempt():
+            start = time.perf_counter()
+            result = fn()
+            self.latencies.record(name, time.perf_counter() - start)
+            return result
+
+        first = self._submit(attempt, self.max_workers)
+        if first is None:
+            self._inc("chatbot_llm_pool_saturated_total", name)
+            raise PoolSaturated(f"{name} 호출 스레드가 모두 사용 중")
+        pending = {first}
+        hedges = 0
+        next_hedge = time.monotonic() + self.hedge_delay(name)
+        error = None
+
+        while True:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self._inc("chatbot_llm_deadline_exceeded_total", name)
+                raise DeadlineExceeded(f"{name} 호출이 마감 시간을 넘김")
+
+            wake_at = [t for t in (deadline, next_hedge if hedges < self.max_hedges else None) if t is not None]
+            timeout = max(min(wake_at) - now, 0) if wake_at else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        self._inc("chatbot_llm_hedge_wins_total", name)
+                    return future.result()
+                error = future.exception()
+                if isinstance(error, self.give_up):
+                    # 다시 보내도 같은 이유로 실패 -> 남은 시도만 기다림
+                    hedges = self.max_hedges
+            if isinstance(error, self.give_up) and not pending:
+                raise error
+
+            if hedges < self.max_hedges and (not pending or time.monotonic() >= next_hedge):
+                # 느리거나 실패한 첫 요청 대신 한 번 더 (pool 이 거의 찼으면 이 호출은 더 보내지 않음)
+                hedges += 1
+                future = self._submit(attempt, self.hedge_limit)
+                if future is None:
+                    hedges = self.max_hedges
+                    self._inc("chatbot_llm_hedges_skipped_total", name)
+                else:
+                    pending.add(future)
+                    self._inc("chatbot_llm_hedges_total", name)
+            if not pending:
+                raise error
+
+    def _submit(self, fn, limit):
+        # 사용 중인 시도가 limit 미만일 때만 pool 에 넣음 -> Future 또는 None
+        def run():
+            try:
+                return fn()
+            finally:
+                self._set_in_flight(-1)
+
+        with self.lock:
+            if self.in_flight >= limit:
+                return None
+            self.in_flight += 1
+        self._set_in_flight(0)
+        return self.executor.submit(run_in_context(run))
+
+    def _set_in_flight(self, delta):
+        with self.lock:
+            self.in_flight += delta
+            count = self.in_flight
+        if self.metrics:
+            self.metrics.set_gauge("chatbot_llm_hedger_in_flight", count)
+
+    def _inc(self, metric, name):
+        if self.metrics:
+            self.metrics.inc(metric, call=name)
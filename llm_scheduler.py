@@ -0,0 +1,212 @@
+"""
+Gemini 호출 우선순위 / 요청량 제어 (admission control)
+
+채팅, 답변 미리 생성(answer_store.py), KG 재구축(KG/create_*.py)이 같은 Gemini quota 를 나눠 씀
+-> 낮에 KG 를 재구축하면 quota 가 바닥나서 학생 채팅이 시간 초과
+-> 프로세스 안의 모든 Gemini 호출을 LLMScheduler 를 거쳐서 보냄
+
+- 우선순위 클래스: interactive(채팅) > batch(답변 미리 생성, KG 재구축)
+  전체 동시 호출 수(LLM_MAX_CONCURRENT)가 꽉 차면 빈자리는 interactive 대기 요청부터
+- 클래스별 동시 호출 수 제한 + token bucket (분당 요청 수 LLM_<클래스>_RPM, 0 이면 제한 없음)
+- 클래스별 대기열 길이 제한: 대기열이 꽉 찼거나 최대 대기 시간(또는 요청 마감 시간)을 넘기면 바로 Overloaded
+- 지표: chatbot_llm_queue_depth / chatbot_llm_in_flight (gauge), chatbot_llm_queue_wait_seconds (histogram),
+  chatbot_llm_shed_total (거절 수)
+- 호출 클래스는 with llm_priority("batch"): 로 지정 (기본 interactive, 스레드 pool 로 넘길 때는 run_in_context)
+
+quota 는 프로세스마다 따로 계산됨 -> KG 재구축 프로세스는 batch 분당 요청 수(LLM_BATCH_RPM)를 낮게 두어
+같은 API 키를 쓰는 Streamlit 프로세스의 몫을 남겨둠
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import current_trace
+
+MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "24"))      # 프로세스 전체 동시 Gemini 호출 수
+
+# 이름: 우선순위(작을수록 먼저), 동시 호출 수, 분당 요청 수, 한 번에 보낼 수 있는 요청 수(burst),
+#       대기열 길이, 최대 대기 시간(초, None 이면 자리가 날 때까지)
+CLASSES = {
+    "interactive": {
+        "priority": 0,
+        "concurrency": int(os.getenv("LLM_INTERACTIVE_CONCURRENCY", "16")),
+        "rpm": float(os.getenv("LLM_INTERACTIVE_RPM", "1000")),
+        "burst": 20,
+        "max_queue": 64,
+        "max_wait": 10.0,
+    },
+    "batch": {
+        "priority": 1,
+        "concurrency": int(os.getenv("LLM_BATCH_CONCURRENCY", "2")),
+        "rpm": float(os.getenv("LLM_BATCH_RPM", "60")),
+        "burst": 2,
+        "max_queue": 1000,
+        "max_wait": None,
+    },
+}
+
+_current_class = contextvars.ContextVar("llm_class", default="interactive")
+
+
+class Overloaded(Exception):
+    # 대기열이 꽉 찼거나 대기 시간 초과 (Gemini 로 보내지 않고 바로 실패)
+    pass
+
+
+@contextmanager
+def llm_priority(name):
+    # 블록 안의 Gemini 호출을 name 클래스로 보냄
+    token = _current_class.set(name)
+    try:
+        yield
+    finally:
+        _current_class.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rpm, burst):
+        self.rate = rpm / 60.0          # 초당 토큰 (0 이면 제한 없음)
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        # 토큰 하나가 생길 때까지 남은 시간(초)
+        if not self.rate:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate:
+            self.tokens -= 1
+
+
+class PriorityClass:
+    def __init__(self, name, priority, concurrency, rpm, burst, max_queue, max_wait):
+        self.name = name
+        self.priority = priority
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rpm, burst)
+        self.queue = []         # 대기 중인 요청 (도착 순서)
+        self.active = 0
+
+
+class LLMScheduler:
+    def __init__(self, classes=None, max_concurrent=MAX_CONCURRENT, metrics=None):
+        self.classes = {name: PriorityClass(name, **cfg) for name, cfg in (classes or CLASSES).items()}
+        self.max_concurrent = max_concurrent
+        self.metrics = metrics
+        self.cond = threading.Condition()
+        self.active = 0
+
+    def run(self, fn, deadline=None, cls=None):
+        with self.slot(deadline, cls):
+            return fn()
+
+    @contextmanager
+    def slot(self, deadline=None, cls=None):
+        """
+        with scheduler.slot(deadline): ... (스트리밍처럼 함수 하나로 감쌀 수 없는 호출용)
+        deadline: 요청 마감 시간 (time.monotonic 기준), 그때까지 자리가 나지 않으면 Overloaded
+        """
+        c = self.classes[cls or _current_class.get()]
+        self._acquire(c, deadline)
+        try:
+            yield
+        finally:
+            with self.cond:
+                c.active -= 1
+                self.active -= 1
+                self._gauges(c)
+                self.cond.notify_all()
+
+    def _acquire(self, c, deadline):
+        start = time.monotonic()
+        limits = [t for t in (deadline, None if c.max_wait is None else start + c.max_wait) if t is not None]
+        give_up = min(limits) if limits else None
+
+        ticket = object()
+        with self.cond:
+            if len(c.queue) >= c.max_queue:
+                self._shed(c, "queue_full")
+            c.queue.append(ticket)
+            self._gauges(c)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._blocked_for(c, ticket, now)
+                    if wait == 0:
+                        break
+                    if give_up is not None and now >= give_up:
+                        self._shed(c, "timeout")
+                    timeouts = [t for t in (wait, None if give_up is None else give_up - now) if t is not None]
+                    self.cond.wait(min(timeouts) if timeouts else None)
+                c.bucket.take()
+                c.active += 1
+                self.active += 1
+            finally:
+                c.queue.remove(ticket)
+                self._gauges(c)
+                self.cond.notify_all()     # 다음 요청이 대기열 맨 앞이 됨
+
+        waited = time.monotonic() - start
+        if self.metrics:
+            self.metrics.observe("chatbot_llm_queue_wait_seconds", waited, cls=c.name)
+        trace = current_trace()
+        if trace:
+            trace.add("llm_queue_ms", round(waited * 1000, 3))
+
+    def _blocked_for(self, c, ticket, now):
+        """
+        self.cond 를 잡은 상태에서 호출
+        -> 0 이면 바로 시작, 양수면 그 시간 뒤 다시 확인(토큰 대기), None 이면 다른 호출이 끝날 때까지
+        """
+        if c.queue[0] is not ticket or c.active >= c.concurrency:
+            return None
+        token_wait = c.bucket.wait_time(now)
+        if token_wait > 0:
+            return token_wait
+        # 더 높은 우선순위 클래스에서 바로 시작할 수 있는 요청 몫은 남겨둠
+        reserved = sum(
+            min(len(other.queue), other.concurrency - other.active)
+            for other in self.classes.values()
+            if other.priority < c.priority and other.queue and other.active < other.concurrency
+            and other.bucket.wait_time(now) == 0
+        )
+        if self.active + reserved >= self.max_concurrent:
+            return None
+        return 0
+
+    def _shed(self, c, reason):
+        if self.metrics:
+            self.metrics.inc("chatbot_llm_shed_total", cls=c.name, reason=reason)
+        raise Overloaded(f"LLM {c.name} 대기열 {reason}")
+
+    def _gauges(self, c):
+        if self.metrics:
+            self.metrics.set_gauge("chatbot_llm_queue_depth", len(c.queue), cls=c.name)
+            self.metrics.set_gauge("chatbot_llm_in_flight", c.active, cls=c.name)
+
+
+# =========================================================
+# 프로세스 전체에서 하나만 사용
+# =========================================================
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(metrics=None):
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(metrics=metrics)
+        elif _scheduler.metrics is None:
+            _scheduler.metrics = metrics
+    return _scheduler
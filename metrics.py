@@ -0,0 +1,276 @@
+"""
+챗봇 파이프라인 단계별 추적(trace) 및 지표(metrics)
+
+- span: 질문 분류, 임베딩, 검색(필터별), Neo4j 쿼리, 프롬프트 구성, 답변 생성, 출처 파싱 등 단계별 소요시간
+- counter / gauge / histogram: Prometheus 텍스트 형식으로 내보내기 (METRICS_PORT 설정 시 /metrics 제공)
+- trace 로그: CHATBOT_TRACE_LOG 설정 시 요청마다 JSON 한 줄씩 기록
+- 마지막 요청의 trace는 스레드별로 보관 (Streamlit 디버그 패널에서 사용)
+- capture: 요청 기록(trace_recorder.py) 사용 시 입력 / LLM 응답 등을 trace 에 함께 모아서 listener 로 전달
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    # 요청 하나의 단계별 기록
+    def __init__(self, kind, **attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.attrs = dict(attrs)
+        self.spans = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.total_ms = None
+        self.capture = None     # 요청 기록용 값 (기록을 켠 경우에만 dict)
+
+    def add_span(self, name, start, duration, attrs):
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._start) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **({"attrs": attrs} if attrs else {}),
+        })
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, value):
+        # 토큰 수, 문서 수 등 누적 값
+        self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "total_ms": self.total_ms,
+            "attrs": self.attrs,
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def run_in_context(fn):
+    # ThreadPoolExecutor 로 넘길 때 현재 trace 를 이어받도록 감쌈
+    # (같은 Context 는 동시에 두 스레드에서 실행할 수 없으므로 호출마다 복사)
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+def _escape_label(value):
+    # Prometheus text format: 라벨 값의 \, ", 줄바꿈은 escape
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, trace_log_path=None):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = {}      # (name, labels) -> value
+        self.gauges = {}        # (name, labels) -> 현재 값 (대기열 길이 등)
+        self.histograms = {}    # (name, labels) -> {"buckets": [...], "sum": float, "count": int}
+        self.listeners = []
+        self.trace_log_path = trace_log_path or os.getenv("CHATBOT_TRACE_LOG")
+        self.capture_enabled = False
+        self._local = threading.local()
+
+    # ------------------------------------------------------------
+    # counter / gauge / histogram
+    # ------------------------------------------------------------
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def cache_hit(self, cache, hit=True):
+        self.inc("chatbot_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+        trace = current_trace()
+        if trace:
+            trace.add(f"cache_{'hit' if hit else 'miss'}:{cache}", 1)
+
+    def tokens(self, call, prompt_tokens=None, completion_tokens=None):
+        # LLM 호출별 토큰 수 (call: router / answer)
+        trace = current_trace()
+        for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+            if count is None:
+                continue
+            self.inc("chatbot_llm_tokens_total", count, call=call, kind=kind)
+            if trace:
+                trace.add(f"{call}_{kind}_tokens", count)
+
+    def degraded(self, dependency):
+        # 외부 서비스 장애로 로컬 대체 데이터를 사용함 (dependency: neo4j / pinecone / gemini)
+        self.inc("chatbot_degraded_total", dependency=dependency)
+        trace = current_trace()
+        if trace:
+            trace.set(degraded=sorted(set(trace.attrs.get("degraded", [])) | {dependency}))
+
+    def capture(self, **values):
+        # 요청 기록용 값 (질문 원문, LLM 응답 등), 기록을 켜지 않았으면 아무것도 안 함
+        trace = current_trace()
+        if trace and trace.capture is not None:
+            trace.capture.update(values)
+
+    def docs(self, source, count):
+        # 검색된 문서 수 (source: vector / lexical / kg / context)
+        self.observe("chatbot_retrieved_docs", count, source=source)
+        trace = current_trace()
+        if trace:
+            trace.add(f"docs_{source}", count)
+
+    # ------------------------------------------------------------
+    # trace / span
+    # ------------------------------------------------------------
+    @contextmanager
+    def trace(self, kind, **attrs):
+        trace = Trace(kind, **attrs)
+        if self.capture_enabled:
+            trace.capture = {"ts": trace.started_at}
+        token = _current_trace.set(trace)
+        status = "ok"
+        try:
+            yield trace
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            _current_trace.reset(token)
+            elapsed = time.perf_counter() - trace._start
+            trace.total_ms = round(elapsed * 1000, 3)
+            trace.set(status=status)
+            self.observe("chatbot_request_seconds", elapsed, kind=kind)
+            self.inc("chatbot_requests_total", kind=kind, status=status, route=trace.attrs.get("route", ""))
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        trace = current_trace()
+        start = time.perf_counter()
+        try:
+            yield attrs     # with 블록 안에서 속성 추가 가능
+        finally:
+            duration = time.perf_counter() - start
+            self.observe("chatbot_stage_seconds", duration, stage=name)
+            if trace:
+                trace.add_span(name, start, duration, attrs)
+
+    def _finish(self, trace):
+        data = trace.to_dict()
+        self._local.last_trace = data
+
+        if self.trace_log_path:
+            line = json.dumps(data, ensure_ascii=False)
+            with self.lock, open(self.trace_log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+        # capture 는 trace 로그에는 남기지 않고 listener(trace_recorder)에만 전달
+        if trace.capture is not None:
+            data = dict(data, capture=trace.capture)
+        for listener in self.listeners:
+            listener(data)
+
+    def last_trace(self):
+        # 현재 스레드에서 마지막으로 끝난 요청의 trace
+        return getattr(self._local, "last_trace", None)
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    # ------------------------------------------------------------
+    # Prometheus 내보내기
+    # ------------------------------------------------------------
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+
+        for (name, labels), value in gauges:
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+
+        for (name, labels), hist in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in zip(self.buckets, hist["buckets"]):
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {hist['count']}")
+            lines.append(f"{name}_sum{self._labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{self._labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_exporter(self, port):
+        # /metrics 엔드포인트를 백그라운드 스레드로 제공
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
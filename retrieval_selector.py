@@ -0,0 +1,127 @@
+"""
+검색 결과 선택 (질문 난이도에 맞춰 프롬프트 크기 조절)
+
+항상 연도별 k=8개씩 프롬프트에 넣으면 쉬운 질문도 청크 16개가 Gemini 로 감
+-> Pinecone 검색 결과의 유사도 점수 / 벡터를 같이 받아서
+
+1. 상대 점수 컷: 가장 높은 점수의 일정 비율 미만인 결과는 버림 (최소 개수는 유지)
+2. MMR: 이미 고른 결과와 너무 비슷한 결과는 뒤로 (벡터 행렬 연산 한 번으로 유사도 계산, 거의 같은 청크는 제외)
+3. 토큰 예산: 압축된 passage 를 순서대로 예산 안에서만 넣음 (로컬 토크나이저로 계산)
+   -> 번호는 예산을 적용한 뒤에 붙이므로 [[REF: n]] 번호 규칙은 그대로
+"""
+
+import math
+import os
+import re
+
+import numpy as np
+
+RELATIVE_CUTOFF = 0.8       # 최고 점수 대비 이 비율 미만은 버림 (Vector)
+LEXICAL_CUTOFF = 0.5        # BM25 점수는 분포가 넓어서 더 느슨하게
+MIN_RESULTS = 2
+MMR_LAMBDA = 0.7            # 1 이면 점수 순서 그대로, 0 이면 다양성만
+DUPLICATE_SIMILARITY = 0.97
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+TOKENIZER_PATHS = [
+    os.getenv("TOKENIZER_PATH", ""),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_db", "onnx", "bge-m3-ko-int8", "tokenizer.json"),
+]
+
+
+def relative_cutoff(scores, ratio=RELATIVE_CUTOFF, min_keep=MIN_RESULTS):
+    # 남길 결과의 bool mask (점수 내림차순이 아니어도 됨)
+    scores = np.asarray(scores, dtype=np.float32)
+    if not len(scores):
+        return np.zeros(0, dtype=bool)
+    keep = scores >= scores.max() * ratio
+    if keep.sum() < min_keep:
+        keep[np.argsort(-scores)[:min_keep]] = True
+    return keep
+
+
+def mmr_order(query_vec, vectors, scores=None, lambda_mult=MMR_LAMBDA, duplicate=DUPLICATE_SIMILARITY):
+    """
+    MMR 순서 (결과 번호 목록), 이미 고른 결과와 유사도가 duplicate 이상이면 제외
+    scores: 질문-결과 유사도 (없으면 벡터로 계산)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not len(vectors):
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    if scores is None:
+        q = np.asarray(query_vec, dtype=np.float32)
+        scores = unit @ (q / (np.linalg.norm(q) or 1))
+    relevance = np.asarray(scores, dtype=np.float32)
+    pairwise = unit @ unit.T
+
+    order = []
+    redundancy = np.full(len(unit), -np.inf, dtype=np.float32)   # 고른 결과와의 최대 유사도
+    remaining = np.ones(len(unit), dtype=bool)
+    while remaining.any():
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * np.maximum(redundancy, 0)
+        mmr[~remaining] = -np.inf
+        pick = int(np.argmax(mmr))
+        remaining[pick] = False
+        if redundancy[pick] >= duplicate:
+            continue
+        order.append(pick)
+        redundancy = np.maximum(redundancy, pairwise[pick])
+    return order
+
+
+# =========================================================
+# 토큰 수 / 예산
+# =========================================================
+class TokenCounter:
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer      # tokenizers.Tokenizer (없으면 근사)
+
+    @classmethod
+    def load(cls):
+        # 로컬 tokenizer.json (ONNX 임베딩 내보내기 결과 또는 TOKENIZER_PATH), 없으면 근사
+        for path in TOKENIZER_PATHS:
+            if path and os.path.exists(path):
+                try:
+                    from tokenizers import Tokenizer
+                    return cls(Tokenizer.from_file(path))
+                except ImportError:
+                    break
+        return cls()
+
+    def count(self, text):
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        # 근사: 한글 1글자 ≒ 1토큰, 그 외 단어는 4글자 ≒ 1토큰
+        hangul = len(re.findall(r"[가-힣]", text))
+        others = sum(math.ceil(len(w) / 4) for w in re.findall(r"[^\s가-힣]+", text))
+        return hangul + others
+
+
+def fit_budget(passages, counter, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    passages 를 순서대로 예산 안에서 선택 (첫 passage 는 예산을 넘어도 포함)
+    -> (선택된 passages, 토큰 수)
+    """
+    selected, used = [], 0
+    for passage in passages:
+        tokens = counter.count(passage["text"])
+        if selected and used + tokens > budget:
+            continue
+        selected.append(passage)
+        used += tokens
+    return selected, used
+
+
+def select_matches(query_vec, matches, ratio=RELATIVE_CUTOFF):
+    """
+    matches: Vector 검색 결과 [(Document, 유사도, 벡터)]
+    -> 상대 점수 컷 + MMR 순서의 Document 목록
+    """
+    if not matches:
+        return []
+    scores = np.array([score for _, score, _ in matches], dtype=np.float32)
+    keep = np.flatnonzero(relative_cutoff(scores, ratio))
+    order = mmr_order(query_vec, [matches[i][2] for i in keep], scores[keep])
+    return [matches[keep[i]][0] for i in order]
@@ -0,0 +1,277 @@
+"""
+Streamlit 없이 사용하는 HTTP API 서버 (aiohttp, 로컬 실행)
+
+- 하나의 StreamlitRAGChatbot 인스턴스(모델, DB 클라이언트, 캐시)를 모든 요청이 공유
+- 동기(blocking) 함수는 크기가 제한된 스레드 풀에서 실행, 대기열이 가득 차면 바로 503 반환
+- 요청별 제한 시간 초과 시 504 반환
+
+엔드포인트:
+    POST /chat              {"admission_year", "department", "query", "history", "major_type", "stream"}
+                            stream=true 이면 SSE(text/event-stream)로 답변을 조각 단위 전송
+    POST /graduation        {"year", "department", "major_type", "taken": [...]}  (did_you_mean: 인식하지 못한 과목의 후보)
+    POST /graduation/compare {"department", "taken": [...]}  학과의 모든 연도/전공유형 교육과정 비교
+    POST /graduation/plan   {"year", "department", "major_type", "taken": [...]}  최소 학점 추천 과목
+    GET  /departments
+    GET  /healthz
+    GET  /metrics           Prometheus 형식 지표
+
+실행:
+    python server.py --port 8080 --workers 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+DEFAULT_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "60"))
+
+
+class BusyError(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    스레드 풀 + 동시 요청 수 제한
+    - 실행 중(max_workers) + 대기(max_queue)를 넘는 요청은 BusyError
+    - 제한 시간이 지나도 스레드는 끝날 때까지 자리를 차지하므로, 슬롯은 실제 작업이 끝났을 때 반납
+    """
+
+    def __init__(self, max_workers=8, max_queue=32):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chatbot")
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise BusyError()
+        future = self.pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    async def run(self, fn, *args, timeout=DEFAULT_TIMEOUT):
+        future = asyncio.wrap_future(self.submit(fn, *args))
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status, dumps=lambda x: json.dumps(x, ensure_ascii=False))
+
+
+def error_response(message, status):
+    return json_response({"error": message}, status=status)
+
+
+# ============================================================
+# 핸들러
+# ============================================================
+async def read_json(request, required, ints=(), lists=()):
+    # 요청 본문 검사 (잘못된 값은 500 대신 400), ints 항목은 정수로 변환
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text="JSON 형식이 아닙니다.")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="JSON 객체가 아닙니다.")
+    missing = [k for k in required if k not in body]
+    if missing:
+        raise web.HTTPBadRequest(text=f"필수 항목 누락: {', '.join(missing)}")
+    for key in ints:
+        try:
+            body[key] = int(body[key])
+        except (TypeError, ValueError):
+            raise web.HTTPBadRequest(text=f"정수가 아닙니다: {key}")
+    for key in lists:
+        if not isinstance(body[key], list):
+            raise web.HTTPBadRequest(text=f"목록이 아닙니다: {key}")
+    return body
+
+
+async def handle_chat(request):
+    app = request.app
+    body = await read_json(request, ["admission_year", "department", "query"], ints=["admission_year"])
+    args = (
+        body["admission_year"], body["department"], body["query"],
+        body.get("history"), body.get("major_type", "단일전공"),
+    )
+
+    if body.get("stream"):
+        return await stream_chat(request, args)
+
+    try:
+        response, sources = await app["executor"].run(app["bot"].chat, *args, timeout=app["timeout"])
+    except BusyError:
+        return error_response("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+    except asyncio.TimeoutError:
+        return error_response("답변 생성 시간이 초과되었습니다.", 504)
+
+    return json_response({"answer": response, "sources": sources if isinstance(sources, list) else []})
+
+
+async def stream_chat(request, args):
+    # chat_stream 제너레이터 전체를 한 스레드에서 실행하고, 이벤트를 asyncio Queue 로 전달
+    app = request.app
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for event in app["bot"].chat_stream(*args):
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", {"error": str(e)}))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    try:
+        app["executor"].submit(produce)
+    except BusyError:
+        return error_response("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+
+    deadline = loop.time() + app["timeout"]
+    while True:
+        try:
+            event = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            event = ("error", {"error": "답변 생성 시간이 초과되었습니다."})
+        if event is None:
+            break
+
+        name, data = event
+        payload = json.dumps(data if isinstance(data, dict) else {"text": data}, ensure_ascii=False)
+        await response.write(f"event: {name}\ndata: {payload}\n\n".encode("utf-8"))
+        if name == "error":
+            break
+
+    await response.write_eof()
+    return response
+
+
+async def handle_graduation(request):
+    app = request.app
+    body = await read_json(request, ["year", "department", "major_type", "taken"], ints=["year"], lists=["taken"])
+    bot = app["bot"]
+
+    def diagnose():
+        # 졸업요건 분석 + 인식하지 못한 과목의 후보 과목(편집거리 계산, 이수 과목으로 인정하지 않음)
+        result = bot.check_graduation_status(body["year"], body["department"], body["major_type"], body["taken"])
+        return result, bot.course_suggestions(body["taken"])
+
+    try:
+        (req_info, missing, status), suggestions = await app["executor"].run(diagnose, timeout=app["timeout"])
+    except BusyError:
+        return error_response("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+    except asyncio.TimeoutError:
+        return error_response("졸업요건 분석 시간이 초과되었습니다.", 504)
+
+    return json_response({"requirement": req_info, "missing": missing, "status": status,
+                          "did_you_mean": {text: [c["name"] for c in cands] for text, cands in suggestions.items()}})
+
+
+async def handle_compare(request):
+    app = request.app
+    body = await read_json(request, ["department", "taken"], lists=["taken"])
+
+    try:
+        options = await app["executor"].run(
+            app["bot"].compare_curricula, body["department"], body["taken"], timeout=app["timeout"],
+        )
+    except BusyError:
+        return error_response("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+    except asyncio.TimeoutError:
+        return error_response("교육과정 비교 시간이 초과되었습니다.", 504)
+
+    return json_response({"options": options})
+
+
+async def handle_plan(request):
+    app = request.app
+    body = await read_json(request, ["year", "department", "major_type", "taken"], ints=["year"], lists=["taken"])
+
+    try:
+        plan = await app["executor"].run(
+            app["bot"].plan_graduation,
+            body["year"], body["department"], body["major_type"], body["taken"],
+            timeout=app["timeout"],
+        )
+    except BusyError:
+        return error_response("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", 503)
+    except asyncio.TimeoutError:
+        return error_response("추천 과목 계산 시간이 초과되었습니다.", 504)
+
+    if plan is None:
+        return error_response("해당 졸업요건을 찾을 수 없습니다.", 404)
+    return json_response(plan)
+
+
+async def handle_departments(request):
+    return json_response({"departments": request.app["bot"].get_departments()})
+
+
+async def handle_health(request):
+    return json_response({"status": "ok"})
+
+
+async def handle_metrics(request):
+    return web.Response(text=request.app["bot"].metrics.render_prometheus(), content_type="text/plain")
+
+
+# ============================================================
+# 앱 생성
+# ============================================================
+def create_app(bot=None, workers=8, queue_size=32, timeout=DEFAULT_TIMEOUT):
+    if bot is None:
+        from backend import StreamlitRAGChatbot
+        bot = StreamlitRAGChatbot()
+
+    app = web.Application()
+    app["bot"] = bot
+    app["executor"] = BoundedExecutor(workers, queue_size)
+    app["timeout"] = timeout
+
+    app.router.add_post("/chat", handle_chat)
+    app.router.add_post("/graduation", handle_graduation)
+    app.router.add_post("/graduation/compare", handle_compare)
+    app.router.add_post("/graduation/plan", handle_plan)
+    app.router.add_get("/departments", handle_departments)
+    app.router.add_get("/healthz", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+
+    async def on_cleanup(app):
+        app["executor"].shutdown()
+        app["bot"].close()
+
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학사정보 챗봇 HTTP API 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="동시에 처리할 요청 수(스레드 수)")
+    parser.add_argument("--queue", type=int, default=32, help="대기열 크기 (초과 시 503)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="요청별 제한 시간(초)")
+    parser.add_argument("--offline", action="store_true", help="가짜 LLM/DB로 실행 (부하 테스트용)")
+    args = parser.parse_args()
+
+    bot = None
+    if args.offline:
+        from benchmarks.fakes import build_offline_chatbot
+        bot = build_offline_chatbot(llm_latency=0.8, router_latency=0.3, vector_latency=0.05, graph_latency=0.02)
+
+    web.run_app(create_app(bot, args.workers, args.queue, args.timeout), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+여러 Streamlit 프로세스가 함께 쓰는 공유 캐시 (검색 결과 / KG 조회 결과 / 답변)
+
+@st.cache_resource 는 프로세스 안에서만 공유됨
+-> 로드밸런서 뒤에 Streamlit 을 여러 개 띄우면 프로세스마다 같은 검색/LLM 호출을 따로 반복
+-> 프로세스 밖 저장소에 결과를 저장하고 모든 프로세스가 함께 사용
+
+저장소 (SHARED_CACHE_URL, 없으면 사용 안 함):
+- memory://                     프로세스 안 메모리 (테스트/오프라인 벤치마크용)
+- sqlite:///경로/cache.db       같은 서버의 프로세스끼리 (WAL 모드 파일 하나)
+- redis://host:6379/0           여러 서버끼리 (Redis 프로토콜 서버, redis 패키지 필요)
+
+- 값은 JSON(Document 목록은 [본문, 메타데이터] 쌍) + 일정 크기 이상이면 zlib 압축
+- 항목마다 TTL(SHARED_CACHE_TTL, 기본 1시간), 전체 크기 제한(SHARED_CACHE_MAX_MB, 기본 256MB)
+  (Redis 는 서버의 maxmemory / maxmemory-policy allkeys-lru 설정으로 제한)
+- 키에 버전(데이터 파일 해시 + 저장소의 세대 번호)을 포함
+  -> Vector DB / KG 를 다시 만든 뒤 `python shared_cache.py bump` 하면 모든 프로세스의 기존 항목이 한 번에 무효
+     (프로세스는 VERSION_CHECK_SECONDS 마다 세대 번호를 다시 읽음)
+- 저장소 오류는 캐시 없음(miss)으로 처리 (캐시 때문에 답변이 실패하지 않게)
+
+실행 (프로젝트 루트에서):
+    python shared_cache.py bump     # 세대 번호 증가 (모든 캐시 무효)
+    python shared_cache.py stats
+    python shared_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from langchain_core.documents import Document
+
+DEFAULT_TTL = int(os.getenv("SHARED_CACHE_TTL", "3600"))
+DEFAULT_MAX_BYTES = int(float(os.getenv("SHARED_CACHE_MAX_MB", "256")) * 2**20)
+VERSION_CHECK_SECONDS = 5
+COMPRESS_MIN_BYTES = 512
+KEY_PREFIX = "campus-chatbot"
+
+
+# ============================================================
+# 직렬화
+# ============================================================
+def encode(value):
+    # Document 목록 / 튜플(답변, 출처)은 형식을 표시해서 되살릴 수 있게
+    if isinstance(value, list) and value and all(isinstance(v, Document) for v in value):
+        payload = {"d": [[d.page_content, d.metadata] for d in value]}
+    elif isinstance(value, tuple):
+        payload = {"t": list(value)}
+    else:
+        payload = {"v": value}
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw, 6)
+    return b"j" + raw
+
+
+def decode(data):
+    raw = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    payload = json.loads(raw)
+    if "d" in payload:
+        return [Document(page_content=text, metadata=meta) for text, meta in payload["d"]]
+    if "t" in payload:
+        return tuple(payload["t"])
+    return payload["v"]
+
+
+# ============================================================
+# 저장소 (get / set / delete 는 bytes, 세대 번호는 정수)
+# ============================================================
+class MemoryBackend:
+    """프로세스 안 메모리 (LRU + 크기 제한), 테스트/오프라인용"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.lock = threading.Lock()
+        self.items = OrderedDict()      # key -> (만료 시각, 값)
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.generation = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                self._remove(key)
+                return None
+            self.items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            if key in self.items:
+                self._remove(key)
+            self.items[key] = (time.time() + ttl, value)
+            self.size += len(value)
+            while self.size > self.max_bytes and len(self.items) > 1:
+                self._remove(next(iter(self.items)))
+
+    def _remove(self, key):
+        _, value = self.items.pop(key)
+        self.size -= len(value)
+
+    def get_generation(self):
+        return self.generation
+
+    def bump_generation(self):
+        with self.lock:
+            self.generation += 1
+            self.items.clear()
+            self.size = 0
+            return self.generation
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.size = 0
+
+    def stats(self):
+        return {"entries": len(self.items), "bytes": self.size, "generation": self.generation}
+
+
+class SQLiteBackend:
+    """
+    같은 서버의 프로세스끼리 공유하는 SQLite 파일 (WAL: 읽기는 쓰기와 동시에 가능)
+    크기 제한을 넘으면 오래 사용하지 않은 항목부터 삭제 (EVICT_EVERY 번 쓸 때마다 확인)
+    """
+
+    EVICT_EVERY = 50
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()      # 스레드마다 연결 하나
+        self._writes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,
+                expires REAL NOT NULL, accessed REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return bytes(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                     (key, sqlite3.Binary(value), len(value), now + ttl, now))
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        # 만료 항목 삭제 후, 크기 제한의 90%가 될 때까지 오래 사용하지 않은 항목부터 삭제
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        removed = 0
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall()
+        keys = []
+        for key, size in rows:
+            if removed >= excess:
+                break
+            keys.append((key,))
+            removed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+
+    def get_generation(self):
+        return self._conn().execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()[0]
+
+    def bump_generation(self):
+        conn = self._conn()
+        conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+        conn.execute("DELETE FROM entries")     # 이전 세대 항목은 더 이상 쓰이지 않음
+        return self.get_generation()
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries")
+
+    def stats(self):
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size, "generation": self.get_generation()}
+
+
+class RedisBackend:
+    """Redis 프로토콜 서버 (크기 제한은 서버의 maxmemory-policy 로)"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self.generation_key = f"{KEY_PREFIX}:generation"
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=int(ttl))
+
+    def get_generation(self):
+        return int(self.client.get(self.generation_key) or 0)
+
+    def bump_generation(self):
+        # 이전 세대 키는 TTL 이 지나면 서버가 삭제
+        return self.client.incr(self.generation_key)
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{KEY_PREFIX}:*"):
+            if key.decode() != self.generation_key:
+                self.client.delete(key)
+
+    def stats(self):
+        info = self.client.info("memory")
+        return {"bytes": info.get("used_memory"), "generation": self.get_generation()}
+
+
+def open_backend(url):
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"알 수 없는 SHARED_CACHE_URL: {url} (memory:// / sqlite:///경로 / redis://...)")
+
+
+# ============================================================
+# 캐시
+# ============================================================
+class SharedCache:
+    def __init__(self, backend, data_version="", ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.data_version = data_version
+        self.ttl = ttl
+        self._generation = None
+        self._checked_at = 0.0
+        self._warned = False
+
+    def version(self):
+        # 저장소의 세대 번호는 VERSION_CHECK_SECONDS 마다 다시 읽음 (bump 후 곧 모든 프로세스에 반영)
+        now = time.time()
+        if self._generation is None or now - self._checked_at >= VERSION_CHECK_SECONDS:
+            self._generation = self.backend.get_generation()
+            self._checked_at = now
+        return f"{self.data_version}.{self._generation}"
+
+    def key(self, kind, parts):
+        digest = hashlib.sha1(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{self.version()}:{kind}:{digest}"
+
+    def get(self, kind, parts):
+        try:
+            data = self.backend.get(self.key(kind, parts))
+            return None if data is None else decode(data)
+        except Exception as e:
+            self._warn(e)
+            return None
+
+    def set(self, kind, parts, value, ttl=None):
+        try:
+            self.backend.set(self.key(kind, parts), encode(value), ttl or self.ttl)
+        except Exception as e:
+            self._warn(e)
+
+    def get_or_compute(self, kind, parts, fn, ttl=None):
+        # -> (값, 캐시 사용 여부), None 은 저장하지 않음
+        value = self.get(kind, parts)
+        if value is not None:
+            return value, True
+        value = fn()
+        if value is not None:
+            self.set(kind, parts, value, ttl)
+        return value, False
+
+    def bump(self):
+        self._generation = self.backend.bump_generation()
+        return self._generation
+
+    def _warn(self, error):
+        if not self._warned:
+            print(f"⚠️ 공유 캐시 오류 (캐시 없이 계속): {error}")
+            self._warned = True
+
+
+def load_shared_cache(url=None):
+    # SHARED_CACHE_URL 이 없으면 None (캐시 사용 안 함)
+    url = url if url is not None else os.getenv("SHARED_CACHE_URL", "")
+    if not url:
+        return None
+    from answer_store import data_version
+    return SharedCache(open_backend(url), data_version=data_version())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 캐시 관리")
+    parser.add_argument("command", choices=["bump", "stats", "clear"])
+    parser.add_argument("--url", default=os.getenv("SHARED_CACHE_URL", ""))
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("SHARED_CACHE_URL 또는 --url 이 필요합니다.")
+
+    backend = open_backend(args.url)
+    if args.command == "bump":
+        print(f"세대 번호 {backend.bump_generation()} (기존 캐시 무효)")
+    elif args.command == "clear":
+        backend.clear()
+        print("캐시 삭제됨")
+    else:
+        print(json.dumps(backend.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
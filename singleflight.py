@@ -0,0 +1,238 @@
+"""
+동일한 질문의 동시 요청 합치기 (single-flight)
+
+공지가 나가면 같은 학년/학과 학생들이 거의 같은 질문을 몇 초 안에 몰아서 보냄
+-> 이미 처리 중인 같은 질문이 있으면 새로 LLM을 호출하지 않고 그 결과를 기다렸다가 함께 사용
+
+1. 같은 프로세스의 스레드끼리: threading.Event 로 대기
+2. 같은 서버의 다른 프로세스끼리(Streamlit 여러 개 실행 시): 키별 lock 파일(fcntl.flock) + 결과 파일
+   (fcntl 이 없는 OS에서는 1번만 동작)
+
+- 기다리는 쪽은 timeout(요청 예산)까지만 기다리고, 넘으면 직접 계산 (멈춘 대표 요청에 묶이지 않음)
+- 대표 요청이 실패하면 실패 표시를 남기고, 기다리던 요청은 lock 을 다시 잡지 않고 각자 동시에 계산
+- lock 파일은 대표 요청이 끝나면 삭제 (비정상 종료로 남은 파일은 _maybe_prune 에서 정리)
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+
+DEFAULT_LOCK_DIR = os.path.join(tempfile.gettempdir(), "campus-chatbot-singleflight")
+POLL_INTERVAL = 0.05        # 다른 프로세스의 lock 확인 간격(초)
+
+
+def normalize_query(text):
+    # 대소문자, 공백, 끝의 물음표/마침표 차이는 같은 질문으로 취급
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.~ ")
+
+
+def history_fingerprint(history, turns=2):
+    # chat()이 실제로 참고하는 최근 대화(history[-2:])만 사용
+    recent = (history or [])[-turns:]
+    joined = "\n".join(f"{m.get('role')}:{normalize_query(m.get('content', ''))}" for m in recent)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def chat_key(query, admission_year, department, major_type, history):
+    raw = json.dumps(
+        [normalize_query(query), int(admission_year), department, major_type, history_fingerprint(history)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    do(key, fn, timeout) -> (결과, 공유 여부)
+    같은 key 로 실행 중인 호출이 있으면 그 결과를 기다려서 반환 (timeout 초가 지나면 직접 계산)
+    """
+
+    def __init__(self, lock_dir=DEFAULT_LOCK_DIR, prune_every=200, max_age=600):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.lock_dir = lock_dir if fcntl else None
+        self.prune_every = prune_every
+        self.max_age = max_age
+        self._count = 0
+
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        # 1. 다른 스레드가 이미 처리 중 -> 대기 (timeout 이 지나면 직접 계산)
+        if not leader:
+            if not call.done.wait(timeout):
+                return fn(), False
+            if call.error:
+                raise call.error
+            return call.result, True
+
+        # 2. 이 프로세스의 대표 스레드 -> 다른 프로세스와 합치기
+        try:
+            call.result, shared = self._do_across_processes(key, fn, deadline)
+            return call.result, shared
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    # ------------------------------------------------------------
+    # 프로세스 간 (lock 파일)
+    # ------------------------------------------------------------
+    def _do_across_processes(self, key, fn, deadline=None):
+        if not self.lock_dir:
+            return fn(), False
+
+        started = time.time()
+        lock_path = os.path.join(self.lock_dir, f"{key}.lock")
+        result_path = os.path.join(self.lock_dir, f"{key}.json")
+
+        fd, leader = self._lock(lock_path, deadline)
+        if fd is None:
+            # 대표 프로세스가 마감 시간까지 끝나지 않음 -> 기다리지 않고 직접 계산 (공유하지 않음)
+            self._maybe_prune()
+            return fn(), False
+
+        if not leader:
+            # 다른 프로세스의 계산이 끝남 -> lock 은 바로 풀고 결과 파일 확인
+            # (실패했거나 공유할 수 없는 결과면 기다리던 프로세스들이 각자 동시에 계산)
+            self._unlock(fd)
+            shared = self._read_result(result_path, started)
+            self._maybe_prune()
+            if shared is not None:
+                return shared, True
+            return fn(), False
+
+        # 대표 프로세스: 직접 계산하고 결과(실패하면 실패 표시)를 파일로 남긴 뒤 lock 파일 삭제
+        try:
+            result = fn()
+            self._write_result(result_path, result)
+            return result, False
+        except Exception as e:
+            self._write_result(result_path, None, error=type(e).__name__)
+            raise
+        finally:
+            self._remove(lock_path)
+            self._unlock(fd)
+            self._maybe_prune()
+
+    def _lock(self, path, deadline):
+        """
+        -> (fd, 대표 여부), 마감 시간까지 lock 을 못 잡으면 (None, False)
+        대표: 바로 lock 을 잡음 / 대표 아님: 다른 프로세스가 끝날 때까지 LOCK_NB 로 확인하며 기다림
+        """
+        waited = False
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    waited = True
+                    if deadline is not None and time.monotonic() >= deadline:
+                        os.close(fd)
+                        return None, False
+                    time.sleep(POLL_INTERVAL)
+            if waited:
+                return fd, False
+            # lock 을 잡기 전에 다른 대표 프로세스가 파일을 지웠으면 새 파일로 다시
+            try:
+                if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                    return fd, True
+            except FileNotFoundError:
+                pass
+            self._unlock(fd)
+
+    @staticmethod
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_result(path, since):
+        # 대기를 시작한 이후에 끝난 계산 결과만 사용 (실패 표시는 None)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("finished_at", 0) < since or data.get("error"):
+            return None
+        return tuple(data["result"]) if isinstance(data["result"], list) else data["result"]
+
+    @staticmethod
+    def _write_result(path, result, error=None):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        record = {"finished_at": time.time(), "result": result}
+        if error:
+            record["error"] = error
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (TypeError, OSError):
+            # JSON 으로 저장할 수 없는 결과는 프로세스 간 공유하지 않음
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _maybe_prune(self):
+        # 오래된 결과 파일 / 비정상 종료로 남은 lock 파일 정리 (아무도 잡고 있지 않은 lock 파일만)
+        self._count += 1
+        if self._count % self.prune_every:
+            return
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(self.lock_dir):
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if name.endswith(".json"):
+                    os.remove(path)
+                elif name.endswith(".lock"):
+                    fd = os.open(path, os.O_RDWR)
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        os.close(fd)
+                        continue
+                    self._remove(path)
+                    self._unlock(fd)
+            except OSError:
+                pass
@@ -0,0 +1,60 @@
+"""
+대체 과목 관계의 전이 폐포(closure) 색인 (졸업 자가진단용)
+
+졸업 자가진단 쿼리는 SUBSTITUTES 관계를 한 단계만 따라감
+-> A→B→C 처럼 두 번 바뀐 과목은 C를 들어도 A 이수로 인정되지 않음
+-> 그래프를 불러올 때 학과/입학년도별로 "대신 들을 수 있는 과목 묶음"을 한 번 계산해두고,
+   진단 시에는 집합 조회만 수행
+
+- 관계의 department 가 학과와 같고(없으면 모든 학과), 관계의 year 이후로 입학한 학생이 아닌 경우에만 적용
+  (year 년도 교육과정에서 발표된 변경은 그 이전 입학생에게 적용)
+- 방향은 쿼리와 같음: (과목)-[:SUBSTITUTES]->(대체 과목) 을 따라 도달 가능한 과목 전체
+  (역방향까지 묶으면 "설계프로젝트A~D" 처럼 여러 과목이 한 과목을 대체하는 경우 서로 다른 과목이 전부 같아짐)
+- 순환(A→B→A)이 있어도 방문한 과목은 다시 보지 않음
+"""
+
+YEARS = range(2020, 2026)
+
+
+class SubstitutionIndex:
+    def __init__(self, edges, years=YEARS):
+        """
+        edges: [{"source_id", "target_id", "department", "year"}, ...] (SUBSTITUTES 관계)
+        """
+        self.groups = {}        # (학과, 입학년도) -> {과목 id: 대신 들을 수 있는 과목 id 묶음(frozenset)}
+        edges = [e for e in edges if e.get("source_id") and e.get("target_id")]
+
+        departments = {e.get("department") for e in edges if e.get("department")}
+        for dept in departments:
+            for year in years:
+                applicable = [e for e in edges
+                              if e.get("department") in (dept, None)
+                              and (e.get("year") is None or year <= e["year"])]
+                self.groups[(dept, year)] = self._closure(applicable)
+
+        # 학과 정보가 없는 관계만 적용 (색인에 없는 학과용)
+        self.common = self._closure([e for e in edges if e.get("department") is None])
+
+    @staticmethod
+    def _closure(edges):
+        graph = {}
+        for e in edges:
+            graph.setdefault(e["source_id"], set()).add(e["target_id"])
+
+        groups = {}
+        for start in graph:
+            # 도달 가능한 과목 전체 탐색 (visited 로 순환 방지)
+            visited = {start}
+            stack = [start]
+            while stack:
+                for nxt in graph.get(stack.pop(), ()):
+                    if nxt not in visited:
+                        visited.add(nxt)
+                        stack.append(nxt)
+            groups[start] = frozenset(visited)
+        return groups
+
+    def equivalents(self, department, year, subject_id):
+        # 자기 자신을 포함한 대체 가능 과목 id 묶음 (O(1) 조회)
+        groups = self.groups.get((department, int(year)), self.common)
+        return groups.get(subject_id) or frozenset([subject_id])
@@ -0,0 +1,31 @@
+from langchain.schema import Document
+
+from context_compactor import compact_documents
+
+RULE = "전공필수 과목은 모두 이수해야 하며 졸업논문 또는 졸업프로젝트 중 하나를 반드시 이수해야 한다. "
+
+
+def doc(text, year, department="컴퓨터공학과", seq=1):
+    return Document(page_content=text, metadata={
+        "source": f"{department}_{year}.pdf", "year": year, "department": department, "seq_num": seq,
+    })
+
+
+def test_merges_same_rule_across_years():
+    passages = compact_documents([doc(RULE, 2021), doc(RULE + "(개정)", 2025)])
+    assert len(passages) == 1
+    assert passages[0]["years"] == [2021, 2025]
+    assert len(passages[0]["docs"]) == 2
+
+
+def test_keeps_same_year_near_duplicates():
+    # 같은 연도 표의 비슷한 두 행 (과목만 다름)
+    row_a = "| 전공필수 | CSE301 | 운영체제 | 3학점 | 3학년 1학기 | 선수과목: 자료구조, 컴퓨터구조 |"
+    row_b = "| 전공필수 | CSE302 | 운영체제 | 3학점 | 3학년 1학기 | 선수과목: 자료구조, 컴퓨터구조 |"
+    passages = compact_documents([doc(row_a, 2023, seq=1), doc(row_b, 2023, seq=5)])
+    assert [p["text"] for p in passages] == [row_a, row_b]
+
+
+def test_keeps_other_department_text():
+    passages = compact_documents([doc(RULE, 2021), doc(RULE, 2025, department="인공지능학과")])
+    assert len(passages) == 2
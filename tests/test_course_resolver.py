@@ -0,0 +1,31 @@
+from course_resolver import CourseResolver
+
+SUBJECTS = [
+    {"id": "CSE403", "name": "졸업논문", "aliases": []},
+    {"id": "AI4003", "name": "졸업논문", "aliases": []},
+    {"id": "CSE103", "name": "자료구조", "aliases": ["자료 구조(SWCON)"]},
+    {"id": "CSE499", "name": "딥러닝", "aliases": []},
+]
+
+
+def ids(subjects):
+    return sorted(s["id"] for s in subjects)
+
+
+def test_resolve_returns_every_department_course_with_the_name():
+    resolver = CourseResolver(SUBJECTS)
+    assert ids(resolver.resolve("졸업 논문")) == ["AI4003", "CSE403"]
+    assert ids(resolver.resolve("AI4003")) == ["AI4003"]
+
+
+def test_resolve_exact_only():
+    resolver = CourseResolver(SUBJECTS)
+    assert ids(resolver.resolve("자료구조(SWCON)")) == ["CSE103"]
+    assert resolver.resolve("딥러닝2") == []
+    assert ids(resolver.did_you_mean("딥러닝2")) == ["CSE499"]
+
+
+def test_resolve_many_marks_unknown_input():
+    resolved = CourseResolver(SUBJECTS).resolve_many(["졸업논문", "없는과목"])
+    assert ids(resolved["졸업논문"]) == ["AI4003", "CSE403"]
+    assert resolved["없는과목"] == []
@@ -0,0 +1,39 @@
+import pytest
+
+# 오프라인 챗봇 (KG/output 스냅샷) 으로 실행, backend 의존 패키지가 없으면 건너뜀
+for module in ("google.generativeai", "langchain_google_genai", "langchain_pinecone", "neo4j"):
+    pytest.importorskip(module)
+
+from benchmarks.fakes import build_offline_chatbot
+
+DEPARTMENT = "인공지능학과"
+# 학과마다 학수번호가 다른 같은 이름의 과목 (졸업논문: AI4003 / CSE403 / SWCON402 ...)
+TAKEN = ["졸업논문", "캡스톤디자인1", "졸업프로젝트", "자료구조"]
+
+
+@pytest.fixture(scope="module")
+def bot():
+    bot = build_offline_chatbot()
+    yield bot
+    bot.close()
+
+
+@pytest.mark.parametrize("major_type", ["단일전공", "다전공"])
+def test_compare_curricula_matches_graduation_check(bot, major_type):
+    _, missing, status = bot.check_graduation_status(2022, DEPARTMENT, major_type, TAKEN)
+    option = next(r for r in bot.compare_curricula(DEPARTMENT, TAKEN)
+                  if (r["year"], r["major_type"]) == (2022, major_type))
+
+    assert status["전공필수"]["earned"] > 0
+    assert option["status"] == status
+    missing_names = {x["name"] for entries in missing.values() for x in entries}
+    assert set(option["missing"]) == missing_names
+
+
+def test_plan_skips_courses_taken_under_another_department_id(bot):
+    plan = bot.plan_graduation(2022, DEPARTMENT, "단일전공", TAKEN)
+    empty = bot.plan_graduation(2022, DEPARTMENT, "단일전공", [])
+
+    planned = {c["name"] for c in plan["courses"]}
+    assert planned.isdisjoint(TAKEN)
+    assert plan["total_credits"] < empty["total_credits"]
@@ -0,0 +1,8 @@
+from metrics import Metrics
+
+
+def test_prometheus_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.inc("chatbot_llm_errors_total", call="router", error='bad "quote" \\ path\nline')
+    line = next(l for l in metrics.render_prometheus().splitlines() if l.startswith("chatbot_llm_errors_total"))
+    assert line == 'chatbot_llm_errors_total{call="router",error="bad \\"quote\\" \\\\ path\\nline"} 1'
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from server import create_app
+
+
+class FakeBot:
+    def __init__(self):
+        self.threads = set()
+
+    def check_graduation_status(self, year, dept, major_type, taken):
+        return {"year": year}, {}, {}
+
+    def course_suggestions(self, taken):
+        # 편집거리 계산은 이벤트 루프가 아닌 스레드 풀에서
+        self.threads.add(threading.current_thread().name)
+        return {text: [{"name": "자료구조"}] for text in taken if text == "자료구좌"}
+
+    def close(self):
+        pass
+
+
+def request(bot, path, **kwargs):
+    async def run():
+        async with TestClient(TestServer(create_app(bot))) as client:
+            response = await client.post(path, **kwargs)
+            return response.status, await response.text()
+    return asyncio.run(run())
+
+
+def test_rejects_bad_bodies_with_400():
+    bot = FakeBot()
+    assert request(bot, "/graduation", json=["not", "an", "object"])[0] == 400
+    assert request(bot, "/graduation", json={"year": "이천", "department": "d", "major_type": "t", "taken": []})[0] == 400
+    assert request(bot, "/graduation", json={"year": 2023, "department": "d", "major_type": "t", "taken": "x"})[0] == 400
+    assert request(bot, "/chat", json={"admission_year": None, "department": "d", "query": "q"})[0] == 400
+
+
+def test_graduation_suggestions_run_in_executor():
+    bot = FakeBot()
+    status, text = request(bot, "/graduation",
+                           json={"year": "2023", "department": "d", "major_type": "t", "taken": ["자료구좌"]})
+    assert status == 200
+    assert '"did_you_mean": {"자료구좌": ["자료구조"]}' in text
+    assert all(name.startswith("chatbot") for name in bot.threads)
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight, fcntl
+
+# 프로세스 간 합치기는 lock 파일(fcntl) 로 동작, 인스턴스마다 따로 fd 를 열어서 다른 프로세스처럼 사용
+pytestmark = pytest.mark.skipif(fcntl is None, reason="fcntl 없음")
+
+
+def start_leader(lock_dir, fn):
+    # 다른 프로세스의 대표 요청 (시작할 때까지 기다림)
+    started = threading.Event()
+    outcome = {}
+
+    def run():
+        def wrapped():
+            started.set()
+            return fn()
+        try:
+            outcome["value"] = SingleFlight(lock_dir).do("k", wrapped)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait()
+    return thread, outcome
+
+
+def test_follower_shares_leader_result(tmp_path):
+    thread, _ = start_leader(str(tmp_path), lambda: time.sleep(0.2) or ["answer", "[]"])
+    assert SingleFlight(str(tmp_path)).do("k", lambda: ["other", "[]"], timeout=5) == (("answer", "[]"), True)
+    thread.join()
+    assert not os.path.exists(tmp_path / "k.lock")
+
+
+def test_follower_stops_waiting_at_timeout(tmp_path):
+    release = threading.Event()
+    thread, _ = start_leader(str(tmp_path), lambda: release.wait(5) and "late")
+    start = time.monotonic()
+    try:
+        assert SingleFlight(str(tmp_path)).do("k", lambda: "own", timeout=0.2) == ("own", False)
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_followers_compute_concurrently_after_leader_failure(tmp_path):
+    def fail():
+        time.sleep(0.2)
+        raise RuntimeError("leader failed")
+
+    thread, outcome = start_leader(str(tmp_path), fail)
+    results = []
+
+    def follower():
+        results.append(SingleFlight(str(tmp_path)).do("k", lambda: time.sleep(0.3) or "own", timeout=5))
+
+    followers = [threading.Thread(target=follower) for _ in range(3)]
+    start = time.monotonic()
+    for t in followers:
+        t.start()
+    for t in followers + [thread]:
+        t.join()
+
+    assert isinstance(outcome["error"], RuntimeError)
+    assert results == [("own", False)] * 3
+    # 줄 서서 하나씩 계산하면 0.2 + 0.3 x 3 초
+    assert time.monotonic() - start < 0.8
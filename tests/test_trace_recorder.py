@@ -0,0 +1,36 @@
+import pytest
+
+from trace_recorder import anonymize, build_record
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("연락처 010-1234-5678로", "연락처 <phone>로"),
+    ("01012345678입니다", "<phone>입니다"),
+    ("학번2019123456입니다", "학번<student_id>입니다"),
+    ("주민번호 990101-1234567이요", "주민번호 <rrn>이요"),
+    ("메일은 hong.gd@khu.ac.kr으로 보내주세요", "메일은 <email>으로 보내주세요"),
+])
+def test_masks_values_with_attached_particles(text, expected):
+    assert anonymize(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "2019학번 졸업 학점은?",
+    "CSE103 대신 들을 수 있는 과목",
+    "전공 130학점 이상",
+    "0101234567890123",     # 더 긴 숫자열의 일부는 마스킹하지 않음
+])
+def test_keeps_non_pii(text):
+    assert anonymize(text) == text
+
+
+def test_build_record_masks_query_and_responses():
+    data = {
+        "id": "t1", "kind": "chat", "total_ms": 1.0, "spans": [],
+        "attrs": {"department": "컴퓨터공학과", "final_query": "010-1234-5678로 연락 가능한가요"},
+        "capture": {"ts": 0, "query": "학번 2019123456이에요", "history": [], "answer": "990101-1234567은요"},
+    }
+    record = build_record(data)
+    assert record["inputs"]["query"] == "학번 <student_id>이에요"
+    assert record["final_query"] == "<phone>로 연락 가능한가요"
+    assert record["responses"]["answer"] == "<rrn>은요"
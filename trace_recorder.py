@@ -0,0 +1,136 @@
+"""
+실제 요청 기록 (성능 테스트 재생용, CHATBOT_CAPTURE_DIR 설정 시에만)
+
+가짜 질문 목록 벤치마크에는 실제 사용 패턴(이어지는 질문, 연도 비교 질문, 길게 붙여넣은 대화)이 빠져 있음
+-> chat() / check_graduation_status() 요청마다 한 줄씩 JSONL 로 기록, benchmarks/replay.py 로 재생
+
+- 입력(학생 정보, 질문, 이전 대화, 들은 과목), 질문 분류 결과(경로, 연도), 검색된 문서 id(source, seq_num),
+  토큰 수, 단계별 소요시간, 질문 분류 / 답변 LLM 응답 (재생 시 그대로 사용)
+- 익명화: 이메일, 전화번호, 학번(10자리), 주민등록번호 형태는 마스킹 후 기록
+- 파일: capture-<시작시각>-<pid>.jsonl, CHATBOT_CAPTURE_MAX_MB 를 넘으면 새 파일, 프로세스별로 최근 CHATBOT_CAPTURE_KEEP 개만 유지
+- CHATBOT_CAPTURE_SAMPLE: 기록할 요청 비율 (기본 1.0)
+"""
+
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+
+RECORDED_KINDS = ("chat", "graduation")
+PROFILE_KEYS = ("admission_year", "year", "department", "major_type", "stream")
+
+# 한글도 단어 문자라서 \b 를 쓰면 "010-1234-5678로" 처럼 조사가 붙은 값을 놓침 -> 앞뒤 숫자만 확인
+MASKS = [
+    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+"), "<email>"),
+    (re.compile(r"(?<!\d)\d{6}-?[1-4]\d{6}(?!\d)"), "<rrn>"),
+    (re.compile(r"(?<!\d)01[016789]-?\d{3,4}-?\d{4}(?!\d)"), "<phone>"),
+    (re.compile(r"(?<!\d)(?:19|20)\d{8}(?!\d)"), "<student_id>"),
+]
+
+
+def anonymize(text):
+    if not isinstance(text, str):
+        return text
+    for pattern, mask in MASKS:
+        text = pattern.sub(mask, text)
+    return text
+
+
+def build_record(data):
+    """
+    trace(Metrics._finish 가 listener 로 넘기는 dict, capture 포함) -> 기록 한 줄
+    """
+    attrs = data["attrs"]
+    capture = data.get("capture", {})
+
+    inputs = {key: attrs[key] for key in PROFILE_KEYS if key in attrs}
+    if "query" in capture:
+        inputs["query"] = anonymize(capture["query"])
+        inputs["history"] = [{"role": m.get("role"), "content": anonymize(m.get("content", ""))}
+                             for m in capture.get("history") or []]
+    if "taken" in capture:
+        inputs["taken"] = list(capture["taken"])
+
+    return {
+        "v": 1,
+        "id": data["id"],
+        "ts": capture.get("ts"),
+        "kind": data["kind"],
+        "status": attrs.get("status"),
+        "total_ms": data["total_ms"],
+        "inputs": inputs,
+        "route": attrs.get("route"),
+        "years": capture.get("years"),
+        "final_query": anonymize(attrs.get("final_query")),
+        "docs": capture.get("docs", []),
+        "tokens": {k: v for k, v in attrs.items() if k.endswith("_tokens")},
+        "cache": {k: v for k, v in attrs.items() if k.startswith("cache_")},
+        "degraded": attrs.get("degraded", []),
+        "stages": [{"name": s["name"], "duration_ms": s["duration_ms"]} for s in data["spans"]],
+        "responses": {k: anonymize(capture[k]) for k in ("router", "answer") if k in capture},
+    }
+
+
+class TraceRecorder:
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, keep=20, sample=1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.sample = sample
+        self.lock = threading.Lock()
+        self.path = None
+        self.size = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def on_trace(self, data):
+        # Metrics listener: 기록 대상 요청만, 샘플링 비율만큼
+        if data["kind"] not in RECORDED_KINDS or "capture" not in data:
+            return
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return
+        line = json.dumps(build_record(data), ensure_ascii=False) + "\n"
+        self.write(line)
+
+    def write(self, line):
+        encoded = line.encode("utf-8")
+        with self.lock:
+            if self.path is None or self.size + len(encoded) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(encoded)
+            self.size += len(encoded)
+
+    def _rotate(self):
+        # self.lock 을 잡은 상태에서 호출
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        pid = os.getpid()
+        self.path = os.path.join(self.directory, f"capture-{stamp}-{pid}.jsonl")
+        suffix = 1
+        while os.path.exists(self.path):
+            suffix += 1
+            self.path = os.path.join(self.directory, f"capture-{stamp}-{pid}-{suffix}.jsonl")
+        self.size = 0
+
+        # 이 프로세스가 만든 파일 중 오래된 것 삭제 (다른 프로세스가 쓰는 파일은 그대로)
+        own = sorted(glob.glob(os.path.join(self.directory, f"capture-*-{pid}*.jsonl")), key=os.path.getmtime)
+        for old in own[:max(len(own) - self.keep + 1, 0)]:
+            os.remove(old)
+
+
+def load_recorder(metrics, directory=None):
+    # CHATBOT_CAPTURE_DIR 이 없으면 기록하지 않음 (None)
+    directory = directory or os.getenv("CHATBOT_CAPTURE_DIR")
+    if not directory:
+        return None
+    recorder = TraceRecorder(
+        directory,
+        max_bytes=int(float(os.getenv("CHATBOT_CAPTURE_MAX_MB", "50")) * 1024 * 1024),
+        keep=int(os.getenv("CHATBOT_CAPTURE_KEEP", "20")),
+        sample=float(os.getenv("CHATBOT_CAPTURE_SAMPLE", "1.0")),
+    )
+    metrics.capture_enabled = True
+    metrics.add_listener(recorder.on_trace)
+    return recorder
@@ -0,0 +1,188 @@
+"""
+표/제목 구조를 따라 자르는 청크 분할 (create_db.py 용)
+
+RecursiveCharacterTextSplitter(1000자, 겹침 200자)는 교육과정 표를 행 중간에서 자르고
+본문의 20%를 겹침으로 중복 저장함
+-> 마크다운(to_markdown 결과)을 블록(제목 / 표 / 문단) 단위로 읽어서
+
+- 제목(#)이 바뀌면 새 청크 (제목만 있는 청크는 만들지 않고 다음 내용과 합침)
+- 표는 자르지 않음, 한 청크보다 크면 행 묶음으로 나누고 묶음마다 머리행(+구분선) 반복
+  (다음 페이지로 이어지는 머리행 없는 표는 앞 표와 합친 뒤 나눔)
+- 긴 문단은 줄 -> 글자 수 순으로 나눔 (겹침 없음)
+- 메타데이터: heading(상위 제목 > 하위 제목), page(청크가 시작하는 PDF 페이지)
+"""
+
+import math
+import re
+
+from langchain_core.documents import Document
+
+CHUNK_SIZE = 1000
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+TABLE_SEP_RE = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+
+def parse_blocks(text):
+    """
+    마크다운 -> [(종류, 내용)] (종류: heading / table / text)
+    heading 내용은 (레벨, 제목)
+    """
+    blocks = []
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+
+        match = HEADING_RE.match(stripped)
+        if match:
+            title = match.group(2).strip("*").strip()
+            if title:
+                blocks.append(("heading", (len(match.group(1)), title)))
+            i += 1
+            continue
+
+        if stripped.startswith("|"):
+            rows = []
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(lines[i].strip())
+                i += 1
+            blocks.append(("table", rows))
+            continue
+
+        para = []
+        while i < len(lines) and lines[i].strip() and not lines[i].strip().startswith("|") \
+                and not HEADING_RE.match(lines[i].strip()):
+            para.append(lines[i].rstrip())
+            i += 1
+        blocks.append(("text", "\n".join(para)))
+    return blocks
+
+
+def table_header(rows):
+    # 머리행: 첫 줄 + 구분선 (구분선이 없으면 머리행 없음 = 앞 페이지에서 이어지는 표)
+    if len(rows) > 1 and TABLE_SEP_RE.match(rows[1]):
+        return rows[:2]
+    return []
+
+
+def split_table(rows, max_chars):
+    """
+    행 묶음으로 나누고 묶음마다 머리행 반복
+    -> [(표 문자열, 묶음 첫 행 번호)]
+    """
+    header = table_header(rows)
+    body = rows[len(header):]
+    if not body:
+        return [("\n".join(rows), 0)]
+
+    parts, current, start = [], [], len(header)
+    size = sum(len(r) + 1 for r in header)
+    for i, row in enumerate(body, len(header)):
+        if current and size + len(row) + 1 > max_chars:
+            parts.append(("\n".join(header + current), start))
+            current, size, start = [], sum(len(r) + 1 for r in header), i
+        current.append(row)
+        size += len(row) + 1
+    parts.append(("\n".join(header + current), start))
+    return parts
+
+
+def split_text(text, max_chars):
+    # 긴 문단: 줄 단위로 채우고, 한 줄이 너무 길면 글자 수로 자름
+    parts, current = [], ""
+    for line in text.split("\n"):
+        if len(line) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            # 같은 길이로 나눠서 끝에 아주 짧은 조각이 남지 않게
+            size = math.ceil(len(line) / math.ceil(len(line) / max_chars))
+            pieces = [line[i:i + size] for i in range(0, len(line), size)]
+            parts += pieces[:-1]
+            line = pieces[-1]
+        if current and len(current) + len(line) + 1 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_markdown_pages(pages, metadata=None, max_chars=CHUNK_SIZE):
+    """
+    pages: [(페이지 번호, 마크다운)] (to_markdown(..., page_chunks=True) 결과)
+    -> Document 목록 (metadata 에 heading, page 추가)
+    제목 경로는 페이지를 넘어가도 이어짐 (표가 다음 페이지로 이어지는 경우 포함)
+    """
+    metadata = metadata or {}
+    docs = []
+    headings = []           # [(레벨, 제목)]
+    buffer = []             # 현재 청크에 들어갈 블록 문자열
+    buffer_page = None
+    has_content = False     # 제목 말고 내용이 들어갔는지
+    table_rows = []         # 페이지를 넘어 이어질 수 있는 표: 다른 블록이 나오면 한 번에 나눔
+    table_pages = []        # 행별 페이지
+
+    def flush():
+        nonlocal buffer, buffer_page, has_content
+        if buffer and has_content:
+            meta = dict(metadata)
+            meta["heading"] = " > ".join(title for _, title in headings)
+            if buffer_page is not None:
+                meta["page"] = buffer_page
+            docs.append(Document(page_content="\n\n".join(buffer), metadata=meta))
+        buffer, buffer_page, has_content = [], None, False
+
+    def add(piece, page):
+        nonlocal buffer_page, has_content
+        size = sum(len(b) + 2 for b in buffer)
+        if has_content and size + len(piece) > max_chars:
+            flush()
+        if buffer_page is None:
+            buffer_page = page
+        buffer.append(piece)
+        has_content = True
+
+    def flush_table():
+        nonlocal table_rows, table_pages
+        for part, start in split_table(table_rows, max_chars):
+            add(part, table_pages[start])
+        table_rows, table_pages = [], []
+
+    for page, text in pages:
+        for kind, value in parse_blocks(text):
+            if kind == "table":
+                # 머리행 없는 표가 바로 이어지면 앞 표(앞 페이지)의 계속
+                if table_rows and not table_header(value):
+                    table_rows += value
+                    table_pages += [page] * len(value)
+                    continue
+                if table_rows:
+                    flush_table()
+                table_rows, table_pages = list(value), [page] * len(value)
+                continue
+            if table_rows:
+                flush_table()
+
+            if kind == "heading":
+                level, title = value
+                if has_content:
+                    flush()
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, title))
+                if buffer_page is None:
+                    buffer_page = page
+                buffer.append(f"{'#' * level} {title}")
+            else:
+                for part in split_text(value, max_chars):
+                    add(part, page)
+    if table_rows:
+        flush_table()
+    flush()
+    return docs
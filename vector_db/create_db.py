@@ -1,13 +1,17 @@
 import os
+import subprocess
+import sys
 import time
 import json
 from dotenv import load_dotenv
 from langchain.docstore.document import Document
 from langchain_pinecone import PineconeVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pymupdf4llm import to_markdown
 import pinecone
+from lexical_index import update_lexical_index
+from onnx_embeddings import load_embeddings
+from chunking import chunk_markdown_pages
+from department_registry import load_registry, group_by_namespace
 
 load_dotenv()
 EMBEDDING_MODEL = "dragonkue/BGE-m3-ko"
@@ -54,10 +58,14 @@ def process_pdf(config_path):
             
             if not pages_list:
                 continue
-            text = to_markdown(path, pages=pages_list)
-            text = text.replace('\uFFFD', ' ').replace('\u0001', ' ')
-
-            if not text.strip():
+            # 페이지별 마크다운 (청크 메타데이터에 페이지 번호 기록)
+            pages = []
+            for page in to_markdown(path, pages=pages_list, page_chunks=True):
+                page_text = page['text'].replace('\uFFFD', ' ').replace('\u0001', ' ')
+                if page_text.strip():
+                    pages.append((page['metadata'].get('page'), page_text))
+
+            if not pages:
                 continue
 
             
@@ -66,13 +74,8 @@ def process_pdf(config_path):
             final_meta.update(section.get("metadata", {}))
             final_meta['source'] = os.path.basename(path)
 
-            # 청크 분할
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = splitter.create_documents([text])
-
-            # 메타데이터 주입
-            for chunk in chunks:
-                chunk.metadata.update(final_meta)
+            # 청크 분할 (표는 행 단위로만 나누고 머리행 반복, 본문은 제목 단위, 겹침 없음)
+            chunks = chunk_markdown_pages(pages, final_meta)
             
             docs.extend(chunks)
         
@@ -83,11 +86,14 @@ def process_pdf(config_path):
 
     # 순번 부여
     print(f"총 {len(docs)}개 청크 업로드")
+    # 검색 범위(scope): 이 청크를 검색할 수 있는 학과 목록 (단과대학 공통 문서는 소속 학과 전체)
+    registry = load_registry()
     for i, chunk in enumerate(docs):
         chunk.metadata['seq_num'] = prev_count + i + 1
+        chunk.metadata['scope'] = registry.scope(chunk.metadata)
     
     # 임베딩 
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    embeddings = load_embeddings(EMBEDDING_MODEL)
     
     # 업로드(100개씩)
     vectorstore = PineconeVectorStore.from_existing_index(
@@ -95,10 +101,19 @@ def process_pdf(config_path):
         embedding=embeddings
     )
 
+    # VECTOR_NAMESPACES=year 이면 연도별 namespace 로 나눠서 업로드 (기본 none: 기본 namespace)
     batch_size = 100
-    for i in range(0, len(docs), batch_size):
-        batch = docs[i : i + batch_size]
-        vectorstore.add_documents(batch)
+    for namespace, group in group_by_namespace(docs).items():
+        for i in range(0, len(group), batch_size):
+            batch = group[i : i + batch_size]
+            vectorstore.add_documents(batch, namespace=namespace or None)
+
+    # 로컬 키워드 색인(BM25)에도 같은 청크 추가
+    update_lexical_index(docs)
+
+    # 챗봇 프로세스들의 공유 캐시 무효화 (SHARED_CACHE_URL 설정 시)
+    if os.getenv("SHARED_CACHE_URL"):
+        subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared_cache.py"), "bump"])
 
     time.sleep(2)
     total = index.describe_index_stats()
@@ -0,0 +1,111 @@
+"""
+학과 / 단과대학 목록과 Vector DB 검색 범위(namespace, scope)
+
+학과 -> 단과대학 매핑, 교육과정 연도 목록(최신 연도)을 코드 대신 데이터에서 읽음
+- DEPARTMENTS_PATH (JSON, 선택): {"colleges": {"단과대학": ["학과", ...]}, "years": [2020, ...]}
+- 없으면 vector_db/config.json (PDF 구간별 college / department / year)
+  + KG/output/requirement_nodes.json (학과별 졸업요건 연도)
+
+Vector DB 청크 (create_db.py, update_db_from_web.py 에서 기록)
+- namespace: VECTOR_NAMESPACES=year 이면 연도별 (year-2025) -> 검색할 연도의 namespace 만 조회
+  (기본값 none: 기존처럼 기본 namespace 하나 + 연도 / 학과 복합 필터,
+   기존 인덱스에는 연도별 namespace / scope 가 없으므로 year 로 다시 구축한 뒤에 바꿈)
+- scope: 이 청크를 검색할 수 있는 학과 목록 (학과 문서는 [학과], 단과대학 공통 문서는 [공통, 소속 학과 전체])
+  -> 검색 필터는 {"scope": {"$eq": 학과}} 하나
+"""
+
+import json
+import os
+from collections import defaultdict
+
+VECTOR_DB_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(VECTOR_DB_DIR, "config.json")
+REQUIREMENT_NODES_PATH = os.path.join(os.path.dirname(VECTOR_DB_DIR), "KG", "output", "requirement_nodes.json")
+NAMESPACE_MODE = os.getenv("VECTOR_NAMESPACES", "none")     # none / year (다시 구축한 인덱스만)
+COMMON_SUFFIX = " 공통"
+
+
+class DepartmentRegistry:
+    def __init__(self, colleges, years):
+        # 학과 순서는 데이터 순서 그대로 (첫 학과가 화면의 기본 선택값)
+        self.colleges = {college: list(dict.fromkeys(depts)) for college, depts in colleges.items()}
+        self.years = sorted({int(y) for y in years})
+        self.college_of = {dept: college for college, depts in self.colleges.items() for dept in depts}
+        if not self.college_of or not self.years:
+            raise ValueError("학과 / 연도 정보가 없음")
+
+    @property
+    def latest_year(self):
+        return self.years[-1]
+
+    @property
+    def first_year(self):
+        return self.years[0]
+
+    def departments(self):
+        return list(self.college_of)
+
+    def common_department(self, department):
+        # 학과가 속한 단과대학 공통 문서의 department 값 (예: "소프트웨어융합대학 공통")
+        college = self.college_of.get(department)
+        return college + COMMON_SUFFIX if college else None
+
+    def scope(self, metadata):
+        department = metadata.get("department")
+        if department and department.endswith(COMMON_SUFFIX):
+            return [department] + self.colleges.get(department[:-len(COMMON_SUFFIX)], [])
+        return [department]
+
+    def to_dict(self):
+        return {"colleges": self.colleges, "years": self.years}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["colleges"], data["years"])
+
+    @classmethod
+    def from_data(cls, config_path=CONFIG_PATH, nodes_path=REQUIREMENT_NODES_PATH):
+        colleges, years = defaultdict(dict), set()     # 단과대학 -> {학과: None} (순서 유지)
+
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                for file in json.load(f):
+                    common = file.get("common_metadata", {})
+                    for section in file["sections"]:
+                        meta = dict(common, **section.get("metadata", {}))
+                        if meta.get("year") is not None:
+                            years.add(meta["year"])
+                        dept = meta.get("department")
+                        if dept and meta.get("college") and not dept.endswith(COMMON_SUFFIX):
+                            colleges[meta["college"]][dept] = None
+
+        # 졸업요건이 있는 학과 / 연도 (PDF 설정에 없는 학과는 단과대학 미상)
+        if os.path.exists(nodes_path):
+            with open(nodes_path, "r", encoding="utf-8") as f:
+                nodes = json.load(f)["nodes"]
+            known = {dept for depts in colleges.values() for dept in depts}
+            for node in nodes:
+                years.add(node["year"])
+                if node["department"] not in known:
+                    colleges[node.get("college") or ""][node["department"]] = None
+
+        return cls(colleges, years)
+
+
+def load_registry(path=None):
+    path = path or os.getenv("DEPARTMENTS_PATH")
+    return DepartmentRegistry.from_file(path) if path else DepartmentRegistry.from_data()
+
+
+def namespace_for(metadata, mode=NAMESPACE_MODE):
+    # 청크를 저장 / 검색할 namespace ("" 은 기본 namespace)
+    return f"year-{int(metadata['year'])}" if mode == "year" else ""
+
+
+def group_by_namespace(docs, mode=NAMESPACE_MODE):
+    groups = defaultdict(list)
+    for doc in docs:
+        groups[namespace_for(doc.metadata, mode)].append(doc)
+    return groups
@@ -0,0 +1,198 @@
+"""
+청크 텍스트에 대한 로컬 역색인(BM25)
+
+- 학수번호(CSE101, SWCON103 등)와 한글 문자 bigram을 토큰으로 사용
+- DB 구축 시 청크와 함께 생성해 vector_db/lexical_index.json 에 저장
+- 챗봇에서는 Pinecone 검색과 같은 연도/학과 조건으로 검색 후 RRF로 결합
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+LEXICAL_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexical_index.json")
+
+COURSE_CODE_RE = re.compile(r"[A-Za-z]{2,6}\s?\d{3,4}[A-Za-z]?")
+LATIN_RE = re.compile(r"[A-Za-z]+|\d+")
+HANGUL_RE = re.compile(r"[가-힣]+")
+
+
+def extract_course_codes(text):
+    # "CSE 101", "cse101" -> "CSE101"
+    return [m.group().replace(" ", "").upper() for m in COURSE_CODE_RE.finditer(text or "")]
+
+
+def tokenize(text):
+    """
+    검색용 토큰 리스트 생성
+    1. 학수번호 (대문자, 공백 제거)
+    2. 영문 단어 / 숫자 (소문자)
+    3. 한글은 띄어쓰기가 일정하지 않으므로 문자 bigram으로 분할 (예: 자료구조 -> 자료, 료구, 구조)
+    """
+    text = text or ""
+    tokens = extract_course_codes(text)
+    tokens += [t.lower() for t in LATIN_RE.findall(text)]
+
+    for run in HANGUL_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens += [run[i:i + 2] for i in range(len(run) - 1)]
+    return tokens
+
+
+def doc_key(metadata):
+    # 기존 중복 제거 기준과 동일하게 (source, seq_num)
+    return (metadata.get("source"), metadata.get("seq_num", 0))
+
+
+class LexicalIndex:
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = []        # [{"page_content":..., "metadata":...}]
+        self.doc_len = []
+        self.postings = defaultdict(list)   # term -> [[doc_id, tf], ...]
+        self.keys = {}        # (source, seq_num) -> doc_id
+        self._prepare()
+
+    # ------------------------------------------------------------
+    # 구축 / 저장
+    # ------------------------------------------------------------
+    def add_documents(self, documents):
+        # langchain Document, dict 모두 허용
+        added = 0
+        for doc in documents:
+            if isinstance(doc, dict):
+                content, metadata = doc.get("page_content", ""), dict(doc.get("metadata", {}))
+            else:
+                content, metadata = doc.page_content, dict(doc.metadata)
+
+            key = doc_key(metadata)
+            if key in self.keys:
+                continue
+
+            doc_id = len(self.docs)
+            terms = tokenize(content)
+            for term, tf in Counter(terms).items():
+                self.postings[term].append([doc_id, tf])
+
+            self.docs.append({"page_content": content, "metadata": metadata})
+            self.doc_len.append(len(terms))
+            self.keys[key] = doc_id
+            added += 1
+
+        self._prepare()
+        return added
+
+    def save(self, path=LEXICAL_INDEX_PATH):
+        data = {
+            "params": {"k1": self.k1, "b": self.b},
+            "docs": self.docs,
+            "doc_len": self.doc_len,
+            "postings": self.postings,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=LEXICAL_INDEX_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls(**data.get("params", {}))
+        index.docs = data["docs"]
+        index.doc_len = data["doc_len"]
+        index.postings = defaultdict(list, data["postings"])
+        index.keys = {doc_key(d["metadata"]): i for i, d in enumerate(index.docs)}
+        index._prepare()
+        return index
+
+    def _prepare(self):
+        # 검색 시 반복 계산을 피하기 위해 idf, 필터용 집합을 미리 계산
+        n = len(self.docs)
+        self.avg_len = (sum(self.doc_len) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+        self.by_year = defaultdict(set)
+        self.by_department = defaultdict(set)
+        for i, d in enumerate(self.docs):
+            meta = d["metadata"]
+            if meta.get("year") is not None:
+                self.by_year[int(meta["year"])].add(i)
+            self.by_department[meta.get("department")].add(i)
+
+    # ------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------
+    def allowed_ids(self, years=None, departments=None):
+        # Pinecone 필터와 같은 조건 (year ∈ years AND department ∈ departments)
+        allowed = None
+        if years is not None:
+            allowed = set().union(*(self.by_year.get(int(y), set()) for y in years))
+        if departments is not None:
+            dept_ids = set().union(*(self.by_department.get(d, set()) for d in departments))
+            allowed = dept_ids if allowed is None else allowed & dept_ids
+        return allowed
+
+    def search(self, query, k=8, years=None, departments=None):
+        """
+        BM25 점수 상위 k개 반환: [(score, {"page_content", "metadata"}), ...]
+        """
+        if not self.docs:
+            return []
+
+        allowed = self.allowed_ids(years, departments)
+        if allowed is not None and not allowed:
+            return []
+
+        scores = defaultdict(float)
+        k1, b, avg_len = self.k1, self.b, self.avg_len or 1.0
+
+        for term, qtf in Counter(tokenize(query)).items():
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in plist:
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * self.doc_len[doc_id] / avg_len))
+                scores[doc_id] += idf * norm * qtf
+
+        top = sorted(scores.items(), key=lambda x: -x[1])[:k]
+        return [(score, self.docs[doc_id]) for doc_id, score in top]
+
+
+def reciprocal_rank_fusion(ranked_lists, key, k=60, limit=None):
+    """
+    여러 검색 결과 리스트를 순위 기반으로 결합 (RRF)
+    score(d) = sum(1 / (k + rank))
+    """
+    scores = {}
+    items = {}
+    for ranked in ranked_lists:
+        for rank, item in enumerate(ranked, start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+
+    ordered = sorted(scores, key=lambda x: -scores[x])
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [items[x] for x in ordered]
+
+
+def update_lexical_index(documents, path=LEXICAL_INDEX_PATH):
+    # DB 구축 스크립트에서 호출: 기존 색인에 새 청크를 추가하고 저장
+    index = LexicalIndex.load(path) if os.path.exists(path) else LexicalIndex()
+    added = index.add_documents(documents)
+    index.save(path)
+    print(f"로컬 색인 업데이트: {added}개 추가 (총 {len(index.docs)}개)")
+    return index
@@ -0,0 +1,177 @@
+"""
+임베딩 모델 선택 + ONNX(int8) 임베딩 백엔드 (CPU 질문 임베딩용)
+
+기본(HuggingFaceEmbeddings)은 PyTorch fp32 BGE-m3-ko 모델을 그대로 사용
+-> CPU 서버에서 질문 하나에 수십 ms, 프로세스당 메모리 약 2GB
+-> 모델을 한 번 ONNX 로 내보내면서 가중치를 int8 로 동적 양자화하고, onnxruntime + fast tokenizer 로 실행
+
+- sentence-transformers 모델 전체(Transformer + CLS 풀링 + 정규화)를 그래프 하나로 내보냄
+  -> 풀링/정규화 방식이 기존 벡터와 항상 같음 (같은 Pinecone 인덱스에 섞어 써도 됨)
+- 문서 임베딩은 길이순으로 정렬해 배치로 실행 (패딩 최소화), 결과는 원래 순서로 반환
+- EMBEDDING_BACKEND=onnx 일 때 챗봇(backend.py)과 DB 구축 스크립트(create_db.py, update_db_from_web.py) 모두 사용
+
+준비 (프로젝트 루트에서, torch / sentence-transformers / onnx / onnxruntime / tokenizers 필요):
+    python vector_db/onnx_embeddings.py export            # -> vector_db/onnx/bge-m3-ko-int8/
+    python -m benchmarks.bench_embeddings                  # fp32 대비 코사인 유사도 + 지연시간/메모리 측정
+"""
+
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "dragonkue/BGE-m3-ko"
+ONNX_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx", "bge-m3-ko-int8")
+MODEL_FILE = "model.onnx"
+CONFIG_FILE = "embedding_config.json"
+
+
+def load_embeddings(model_name=EMBEDDING_MODEL):
+    """
+    EMBEDDING_BACKEND 에 따라 임베딩 객체 생성
+    - hf (기본): HuggingFaceEmbeddings (PyTorch fp32)
+    - onnx: OnnxEmbeddings (ONNX_MODEL_DIR, 기본 vector_db/onnx/bge-m3-ko-int8)
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "hf").lower()
+    if backend == "onnx":
+        return OnnxEmbeddings(os.getenv("ONNX_MODEL_DIR", ONNX_MODEL_DIR), model_name=model_name)
+    if backend != "hf":
+        raise ValueError(f"알 수 없는 EMBEDDING_BACKEND: {backend} (hf 또는 onnx)")
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+# =========================================================
+# ONNX 실행
+# =========================================================
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_dir=ONNX_MODEL_DIR, model_name=None, batch_size=16, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        config_path = os.path.join(model_dir, CONFIG_FILE)
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(
+                f"ONNX 모델 없음: {model_dir} (python vector_db/onnx_embeddings.py export 로 먼저 생성)")
+        with open(config_path, "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        if model_name and self.config["model_name"] != model_name:
+            # 다른 모델로 만든 벡터와 섞이면 검색 결과가 틀어지므로 바로 실패
+            raise ValueError(f"ONNX 모델({self.config['model_name']})과 설정된 모델({model_name})이 다름")
+
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = threads or int(os.getenv("ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = os.path.join(model_dir, MODEL_FILE)
+        if not self.config.get("quantized", True):
+            model_path = os.path.join(model_dir, "fp32", MODEL_FILE)
+        self.session = ort.InferenceSession(model_path, options,
+                                            providers=["CPUExecutionProvider"])
+
+    def _encode(self, texts):
+        # 한 배치: 토큰화(가장 긴 문장 길이로 패딩) -> (배치, 차원) 정규화된 벡터
+        encoded = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        return self.session.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        # 길이가 비슷한 문장끼리 배치로 묶어 패딩 줄이기
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vec in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[i] = vec.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return self._encode([text])[0].tolist()
+
+
+# =========================================================
+# 내보내기 (한 번만 실행)
+# =========================================================
+def export_model(model_name=EMBEDDING_MODEL, output_dir=ONNX_MODEL_DIR, quantize=True, opset=17):
+    """
+    sentence-transformers 모델 -> ONNX (fp32) -> 동적 int8 양자화
+    출력: model.onnx, tokenizer.json, embedding_config.json
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    st_model.eval()
+
+    class SentenceEncoder(torch.nn.Module):
+        # (input_ids, attention_mask) -> sentence_embedding (풀링/정규화 포함)
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model({"input_ids": input_ids, "attention_mask": attention_mask})["sentence_embedding"]
+
+    sample = st_model.tokenizer(["임베딩 내보내기", "졸업 요건"], padding=True, return_tensors="pt")
+    # fp32 모델은 2GB 이상이라 가중치가 외부 파일 여러 개로 저장될 수 있음 -> 별도 폴더에 만들고 나중에 삭제
+    fp32_dir = os.path.join(output_dir, "fp32")
+    os.makedirs(fp32_dir, exist_ok=True)
+    fp32_path = os.path.join(fp32_dir, MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            SentenceEncoder(st_model), (sample["input_ids"], sample["attention_mask"]), fp32_path,
+            input_names=["input_ids", "attention_mask"], output_names=["sentence_embedding"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                          "attention_mask": {0: "batch", 1: "sequence"},
+                          "sentence_embedding": {0: "batch"}},
+            opset_version=opset,
+        )
+
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    if quantize:
+        # 가중치만 int8 (활성값은 실행 시 동적으로 양자화) -> 보정 데이터 불필요
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        shutil.rmtree(fp32_dir)
+    else:
+        model_path = fp32_path
+
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+        "quantized": quantize,
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    print(f"{model_path} 저장됨 ({os.path.getsize(model_path) / 2**20:.0f} MB)")
+    return model_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 모델 ONNX(int8) 내보내기")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--output", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="fp32 그대로 저장 (비교용)")
+    args = parser.parse_args()
+
+    export_model(args.model, args.output, quantize=not args.no_quantize)
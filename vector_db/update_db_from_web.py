@@ -1,11 +1,15 @@
 import os
+import subprocess
+import sys
 import time
 from dotenv import load_dotenv
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_pinecone import PineconeVectorStore
 import pinecone
+from lexical_index import update_lexical_index
+from onnx_embeddings import load_embeddings
+from department_registry import load_registry, group_by_namespace
 
 load_dotenv()
 EMBEDDING_MODEL = "dragonkue/BGE-m3-ko"
@@ -13,22 +17,20 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = os.getenv("PINECONE_ENVIRONMENT")
 INDEX_NAME = "chatbot-project"
 
-# 처리할 URL 및 메타데이터 정의
+# 처리할 URL 및 메타데이터 정의 (year 가 없으면 최신 교육과정 연도)
 URLS_TO_PROCESS = [
     {
         "url": "https://ce.khu.ac.kr/ce/user/contents/view.do?menuNo=1600056",
         "metadata": {
             "college": "소프트웨어융합대학",
-            "department": "컴퓨터공학과",
-            "year": 2025
+            "department": "컴퓨터공학과"
         }
     },
     {
         "url": "https://ce.khu.ac.kr/ce/user/contents/view.do?menuNo=1600015",
         "metadata": {
             "college": "소프트웨어융합대학",
-            "department": "소프트웨어융합대학 공통",
-            "year": 2025
+            "department": "소프트웨어융합대학 공통"
         }
     },
     {
@@ -36,8 +38,7 @@ URLS_TO_PROCESS = [
         "url": "https://ce.khu.ac.kr/ce/user/bbs/BMSR00040/list.do?menuNo=1600123",
         "metadata": {
             "college": "소프트웨어융합대학",
-            "department": "소프트웨어융합대학 공통",
-            "year": 2025
+            "department": "소프트웨어융합대학 공통"
         }
     }
 ]
@@ -57,6 +58,7 @@ def update_db_from_web():
     prev_count = index.describe_index_stats()['total_vector_count']
     print(f"현재 문서 개수: {prev_count}")
 
+    registry = load_registry()
     docs = []
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
 
@@ -65,6 +67,7 @@ def update_db_from_web():
         url = item["url"]
         meta = item["metadata"]
         meta["source"] = url 
+        meta.setdefault("year", registry.latest_year)
 
         print(f"처리 중: {url}")
         
@@ -92,14 +95,24 @@ def update_db_from_web():
     print(f"총 {len(docs)}개 청크 업로드")
     for i, chunk in enumerate(docs):
         chunk.metadata['seq_num'] = prev_count + i + 1
+        chunk.metadata['scope'] = registry.scope(chunk.metadata)
 
-    # 업로드
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    # 업로드 (VECTOR_NAMESPACES=year 이면 연도별 namespace, 기본 none: 기본 namespace)
+    embeddings = load_embeddings(EMBEDDING_MODEL)
     
-    PineconeVectorStore.from_existing_index(
+    vectorstore = PineconeVectorStore.from_existing_index(
         index_name=INDEX_NAME,
         embedding=embeddings
-    ).add_documents(docs)
+    )
+    for namespace, group in group_by_namespace(docs).items():
+        vectorstore.add_documents(group, namespace=namespace or None)
+
+    # 로컬 키워드 색인(BM25)에도 같은 청크 추가
+    update_lexical_index(docs)
+
+    # 챗봇 프로세스들의 공유 캐시 무효화 (SHARED_CACHE_URL 설정 시)
+    if os.getenv("SHARED_CACHE_URL"):
+        subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared_cache.py"), "bump"])
     
     # 결과 확인
     time.sleep(5)